@@ -1,11 +1,25 @@
 import os
-from fastapi import FastAPI, HTTPException
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from backend.classifier_agent import GrievanceClassifier
-from backend.retriever_agent import PolicyRetriever
+from backend.classifier_agent import (
+    CATEGORIES_FILE, GrievanceClassifier, load_shared_categories, save_shared_categories,
+)
+from backend.retriever_agent import CHROMA_DIR, PolicyRetriever
 from backend.recommender_agent import RecommenderAgent # <-- Imports the new recommender
+from backend.inference_pool import InferencePool, PoolSaturated
+from backend.response_cache import ResponseCache
+from backend.batch_pipeline import analyze_batch
+from backend.job_store import JOB_DB_PATH, JobStore, IdempotencyConflict, QueueFull
+from backend.job_runner import JobRunner
+from backend import index_versions, metrics, model_registry
+from backend.llm_client import http_session
+import asyncio
+import json
 from dotenv import load_dotenv
-import requests
 
 # Environment setup
 os.environ.setdefault("TRANSFORMERS_NO_TF", "1")
@@ -15,14 +29,256 @@ os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "0")
 # Load environment variables
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env"))
 
+# Agents are created in the lifespan hook, not at import time
+classifier: GrievanceClassifier = None
+retriever: PolicyRetriever = None
+recommender: RecommenderAgent = None
+
+# Dedicated executor for CPU-bound inference (size via HR_INFERENCE_WORKERS)
+inference_pool = InferencePool()
+
+# Exact + semantic response cache in front of the pipeline (HR_CACHE_* settings)
+response_cache = ResponseCache()
+
+# Load models after the server starts listening, so liveness answers at once and
+# /readyz reports progress. Set to 0 to finish loading before accepting connections.
+BACKGROUND_LOAD = os.getenv("HR_BACKGROUND_LOAD", "1") == "1"
+
+# Readiness state reported by /readyz
+startup_state = {"ready": False, "error": None, "load_seconds": None}
+
+# POST /jobs queue (SQLite at HR_JOB_DB), drained by background workers in every process
+job_store: JobStore = None
+job_runner: JobRunner = None
+# Longest GET /jobs/{id}?wait= long-poll
+JOB_WAIT_MAX_S = float(os.getenv("HR_JOB_WAIT_MAX_S", "30"))
+
+# How often each process checks chroma_db/ACTIVE.json for a newly activated index version (0 disables)
+INDEX_WATCH_S = float(os.getenv("HR_INDEX_WATCH_S", "5"))
+# Serializes retriever swaps within this process
+index_lock = asyncio.Lock()
+# Longest wait for requests on a swapped-out index version before its client is closed
+INDEX_DRAIN_S = float(os.getenv("HR_INDEX_DRAIN_S", "120"))
+background_tasks = set()
+
+# How often each process checks HR_CATEGORIES_FILE for a label set changed through another worker
+CATEGORIES_WATCH_S = float(os.getenv("HR_CATEGORIES_WATCH_S", "5"))
+# mtime of the shared categories file last applied by this process
+categories_state = {"stamp": None}
+
+# Multiprocess metrics: how often each worker writes its callback gauges
+METRICS_REFRESH_S = float(os.getenv("HR_METRICS_REFRESH_S", "5"))
+
+
+async def load_agents() -> None:
+    """Load every model once per process (off the event loop) and warm it up."""
+    global classifier, retriever, recommender
+    start = time.perf_counter()
+    try:
+        retriever = await inference_pool.run(PolicyRetriever)
+        # The embedding classifier backend reuses the retriever's MiniLM encoder
+        # Forward passes (batched or not) run on the bounded inference pool, never on the event loop
+        classifier = await inference_pool.run(
+            lambda: GrievanceClassifier(embedder=retriever.embedder, executor=inference_pool)
+        )
+        recommender = RecommenderAgent(api_key=os.getenv("GEMINI_API_KEY"))
+        metrics.gauge_callback(metrics.CLASSIFIER_QUEUE, classifier.queue_depth)
+        await sync_categories()
+
+        # Dummy forward passes so the first real request doesn't pay for lazy init
+        await asyncio.gather(
+            inference_pool.run(retriever.warmup),
+            inference_pool.run(classifier.warmup),
+        )
+    except Exception as e:
+        startup_state["error"] = str(e)
+        print(f"❌ Model loading failed: {e}")
+        raise
+    startup_state["load_seconds"] = round(time.perf_counter() - start, 2)
+    startup_state["ready"] = True
+    print(f"✅ Models warmed up in {startup_state['load_seconds']}s, ready to serve.")
+
+
+async def reload_index() -> dict:
+    """Switch to the active index version without a restart.
+
+    The new retriever is opened and warmed up off the inference pool while the
+    old one keeps serving, then swapped in with a single assignment. In-flight
+    requests finish on the version they started with.
+    """
+    global retriever
+    async with index_lock:
+        version = index_versions.active_version(CHROMA_DIR)
+        old = retriever
+        if old.version == version:
+            return {"version": version, "reloaded": False}
+        start = time.perf_counter()
+        new = await asyncio.to_thread(PolicyRetriever, version=version)
+        await asyncio.to_thread(new.warmup)
+        retriever = new
+        # Cached answers quote the old policies
+        response_cache.clear()
+        _spawn(_close_when_idle(old))
+        seconds = round(time.perf_counter() - start, 2)
+        print(f"🔀 Switched index version {old.version} → {version} in {seconds}s.")
+        return {"version": version, "previous": old.version, "reloaded": True, "load_seconds": seconds}
+
+
+async def _close_when_idle(old: PolicyRetriever) -> None:
+    """Close a swapped-out retriever's Chroma client once its in-flight requests have finished."""
+    deadline = time.monotonic() + INDEX_DRAIN_S
+    while old.in_use and time.monotonic() < deadline:
+        await asyncio.sleep(0.5)
+    if old.in_use:
+        print(f"⚠️ Closing index version {old.version} with {old.in_use} request(s) still using it.")
+    try:
+        await asyncio.to_thread(old.close)
+    except Exception as e:
+        print(f"❌ Could not close index version {old.version}; its files stay open until restart: {e!r}")
+
+
+def _spawn(coro) -> None:
+    """Fire-and-forget task that is kept referenced until it finishes."""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+def _categories_stamp() -> Optional[int]:
+    try:
+        return os.stat(CATEGORIES_FILE).st_mtime_ns
+    except OSError:
+        return None
+
+
+async def sync_categories() -> None:
+    """Apply the shared label set if the file changed since this process last looked."""
+    stamp = _categories_stamp()
+    if stamp is None or stamp == categories_state["stamp"]:
+        return
+    categories_state["stamp"] = stamp
+    shared = load_shared_categories()
+    if shared is None:
+        return
+    threshold = classifier.threshold if shared["threshold"] is None else shared["threshold"]
+    if shared["categories"] == classifier.categories and threshold == classifier.threshold:
+        return
+    await inference_pool.run(classifier.set_categories, shared["categories"], shared["threshold"])
+    # Cached responses carry categories from the old label set
+    response_cache.clear()
+    print(f"🏷️ Switched to the shared label set ({len(classifier.categories)} categories).")
+
+
+async def watch_categories() -> None:
+    """Follow HR_CATEGORIES_FILE, so a PUT /admin/categories on any worker reaches every worker."""
+    while True:
+        await asyncio.sleep(CATEGORIES_WATCH_S)
+        if not startup_state["ready"]:
+            continue
+        try:
+            await sync_categories()
+        except Exception as e:
+            print(f"⚠️ Could not apply the shared label set: {e}")
+
+
+async def refresh_gauges_loop() -> None:
+    """Multiprocess metrics: keep this worker's callback gauges current for scrapes answered elsewhere."""
+    while True:
+        await asyncio.to_thread(metrics.refresh_gauges)
+        await asyncio.sleep(METRICS_REFRESH_S)
+
+
+async def watch_index() -> None:
+    """Follow ACTIVE.json, so every worker picks up a version activated by ingestion or another worker."""
+    failed = None
+    while True:
+        await asyncio.sleep(INDEX_WATCH_S)
+        if not startup_state["ready"]:
+            continue
+        version = None
+        try:
+            # Raises on a pointer naming an invalid version
+            version = index_versions.active_version(CHROMA_DIR)
+            if version in (retriever.version, failed):
+                continue
+            await reload_index()
+            failed = None
+        except Exception as e:
+            # Don't retry a broken version every tick; a new activation or POST /admin/index/reload will
+            failed = version
+            print(f"⚠️ Could not switch to index version {version or '?'}: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global job_store, job_runner
+    response_cache.load()
+    job_store = JobStore(JOB_DB_PATH)
+    job_runner = JobRunner(job_store, _run_job, is_ready=lambda: startup_state["ready"])
+    job_runner.start()
+
+    # Queue and cache gauges are sampled at scrape time
+    metrics.gauge_callback(metrics.INFERENCE_PENDING, lambda: inference_pool.pending)
+    metrics.gauge_callback(metrics.CACHE_ENTRIES, lambda: len(response_cache))
+    metrics.gauge_callback(metrics.JOBS_QUEUED, lambda: job_store.count("queued"))
+    if metrics.MULTIPROC_DIR:
+        _spawn(refresh_gauges_loop())
+
+    watchers = []
+    if INDEX_WATCH_S > 0:
+        watchers.append(asyncio.create_task(watch_index()))
+    if CATEGORIES_WATCH_S > 0:
+        watchers.append(asyncio.create_task(watch_categories()))
+    loader = None
+    if BACKGROUND_LOAD:
+        loader = asyncio.create_task(load_agents())
+        # Failures are already reported in startup_state; don't warn about an unretrieved exception
+        loader.add_done_callback(lambda t: t.cancelled() or t.exception())
+    else:
+        await load_agents()
+    yield
+    if loader is not None and not loader.done():
+        loader.cancel()
+    for watcher in watchers:
+        watcher.cancel()
+    await job_runner.stop()
+    job_store.close()
+    response_cache.save()
+    inference_pool.shutdown()
+
+
 # Initialize FastAPI app
-app = FastAPI(title="HR Grievance Policy Agent", version="1.0")
+app = FastAPI(title="HR Grievance Policy Agent", version="1.0", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Per-request stage trace, reported as a Server-Timing header and request histogram."""
+    trace = metrics.start_trace()
+    start = time.perf_counter()
+    response = await call_next(request)
+    total = time.perf_counter() - start
+
+    trace["total"] = total * 1000
+    response.headers["Server-Timing"] = metrics.server_timing(trace)
+    if request.url.path != "/metrics":
+        metrics.REQUEST_SECONDS.labels(path=request.url.path, status=str(response.status_code)).observe(total)
+        metrics.log_trace(request.url.path, response.status_code, total * 1000, trace)
+    return response
+
+
+def _require_ready() -> None:
+    """Reject pipeline requests with 503 until the models have loaded."""
+    if not startup_state["ready"]:
+        detail = startup_state["error"] or "Models are still loading, retry shortly"
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "5"})
+
+
+async def _timed(awaitable, stage: str):
+    """Await something and record the wait as a pipeline stage."""
+    with metrics.stage(stage):
+        return await awaitable
 
-# Initialize agents once at startup
-# This will now print "🤖 Google GenAI library configured successfully!"
-classifier = GrievanceClassifier()
-retriever = PolicyRetriever()
-recommender = RecommenderAgent(api_key=os.getenv("GEMINI_API_KEY"))
 
 # Request/Response models
 class GrievanceRequest(BaseModel):
@@ -34,35 +290,358 @@ class GrievanceResponse(BaseModel):
     relevant_policies: list[str]
     recommendation: str
 
+class BatchRequest(BaseModel):
+    grievances: list[str]
+
+class BatchResponse(BaseModel):
+    results: list[GrievanceResponse]
+
+class JobResponse(BaseModel):
+    id: str
+    status: str
+    created: float
+    updated: float
+    attempts: int
+    result: Optional[GrievanceResponse] = None
+    error: Optional[str] = None
+
+class CategoriesRequest(BaseModel):
+    categories: list[str]
+    threshold: Optional[float] = None
+
+class IndexReloadRequest(BaseModel):
+    version: Optional[str] = None
+
+# Largest batch accepted by /analyze/batch; bigger backlogs go through the CLI
+BATCH_MAX_ITEMS = int(os.getenv("HR_BATCH_MAX_ITEMS", "256"))
+
 @app.post("/analyze", response_model=GrievanceResponse)
-def analyze_grievance(req: GrievanceRequest):
+async def analyze_grievance(req: GrievanceRequest):
     grievance_text = req.grievance.strip()
     if not grievance_text:
         raise HTTPException(status_code=400, detail="Grievance cannot be empty")
+    _require_ready()
+
+    try:
+        return await run_analysis(grievance_text)
+    except PoolSaturated as e:
+        # Backpressure: shed load instead of queueing unboundedly behind torch work
+        raise HTTPException(status_code=503, detail=f"Server busy, retry later ({e})")
+    except Exception as e:
+        print(f"Error during analysis: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def run_analysis(grievance_text: str) -> GrievanceResponse:
+    """Cache tiers, then classifier → retriever → recommender for one grievance.
+
+    Raises PoolSaturated when the inference pool has no free slot.
+    """
+    # One retriever for the whole request, even if the index is swapped meanwhile
+    with retriever.lease() as policy_retriever:
+        return await _analyze(policy_retriever, grievance_text)
+
+
+async def _analyze(policy_retriever: PolicyRetriever, grievance_text: str) -> GrievanceResponse:
+    # Exact-match cache tier: no model work at all
+    version = policy_retriever.index_version()
+    cached = response_cache.get_exact(grievance_text, version)
+    if cached is not None:
+        return GrievanceResponse(**{**cached, "grievance": grievance_text})
+
+    inference_pool.acquire()
     try:
-        # Step 1: Classify grievance
-        categories = [c["label"] for c in classifier.classify(grievance_text)]
+        # The query embedding serves both the semantic cache tier and retrieval.
+        # Classification is queued on the classifier's micro-batcher meanwhile.
+        classify_future = asyncio.wrap_future(classifier.classify_future(grievance_text))
+        embedding = await inference_pool.run(policy_retriever.encode_query, grievance_text)
+
+        cached = response_cache.get_semantic(embedding, version)
+        if cached is not None:
+            classify_future.cancel()
+            return GrievanceResponse(**{**cached, "grievance": grievance_text})
 
-        # Step 2: Retrieve relevant policies
-        policies = retriever.search_policies(grievance_text, top_k=3)
+        if policy_retriever.category_filter:
+            # Category-aware retrieval needs the labels first
+            categories = [c["label"] for c in await _timed(classify_future, "classify")]
+            policies = await inference_pool.run(policy_retriever.search_policies, grievance_text, 3, embedding, categories)
+        else:
+            # Steps 1 + 2: classification and retrieval are independent, run them concurrently
+            classified, policies = await asyncio.gather(
+                _timed(classify_future, "classify"),
+                inference_pool.run(policy_retriever.search_policies, grievance_text, 3, embedding),
+            )
+            categories = [c["label"] for c in classified]
 
-        # Step 3: Generate recommendation (now uses the new SDK-based agent)
-        rec = recommender.generate_recommendation(grievance_text, categories, policies)
+        # Step 3: Generate recommendation (non-blocking SDK call)
+        rec, source = await recommender.generate_with_source_async(grievance_text, categories, policies)
 
-        return GrievanceResponse(
+        response = GrievanceResponse(
             grievance=grievance_text,
             categories=categories,
             relevant_policies=[p["policy_text"] for p in policies],
             recommendation=rec,
         )
+        # Offline-fallback answers are not cached, so Gemini is retried once it recovers
+        if source == "gemini":
+            response_cache.put(grievance_text, embedding, response.model_dump(), version)
+        return response
+    finally:
+        inference_pool.release()
+
+
+async def _run_job(grievance_text: str) -> dict:
+    """Job worker entry point: like /analyze, but waits for a pool slot instead of failing."""
+    while True:
+        try:
+            return (await run_analysis(grievance_text)).model_dump()
+        except PoolSaturated:
+            await asyncio.sleep(0.2)
+
+
+def _job_response(job: dict) -> JobResponse:
+    return JobResponse(**{k: job[k] for k in JobResponse.model_fields if k in job})
+
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+async def submit_job(
+    req: GrievanceRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(default=None),
+):
+    """Queue a grievance for background analysis and return its job id at once.
+
+    Retrying with the same Idempotency-Key header returns the original job
+    instead of queueing a duplicate.
+    """
+    grievance_text = req.grievance.strip()
+    if not grievance_text:
+        raise HTTPException(status_code=400, detail="Grievance cannot be empty")
+    try:
+        job, created = await asyncio.to_thread(job_store.submit, grievance_text, idempotency_key)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=f"Job queue full, retry later ({e})", headers={"Retry-After": "5"})
+    if created:
+        job_runner.notify()
+    else:
+        response.status_code = 200
+    response.headers["Location"] = f"/jobs/{job['id']}"
+    return _job_response(job)
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, wait: float = 0):
+    """Job status and, once done, its result. ``wait`` long-polls up to that many seconds."""
+    timeout = min(max(wait, 0.0), JOB_WAIT_MAX_S)
+    if timeout > 0:
+        job = await job_runner.wait(job_id, timeout)
+    else:
+        job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+@app.post("/analyze/batch", response_model=BatchResponse)
+async def analyze_grievance_batch(req: BatchRequest):
+    """Analyze many grievances with batched classification, embedding and retrieval."""
+    grievances = [g.strip() for g in req.grievances]
+    if not grievances or any(not g for g in grievances):
+        raise HTTPException(status_code=400, detail="Grievances cannot be empty")
+    if len(grievances) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {BATCH_MAX_ITEMS} grievances per request; use the batch CLI for larger files",
+        )
+    _require_ready()
+
+    try:
+        inference_pool.acquire()
+    except PoolSaturated as e:
+        raise HTTPException(status_code=503, detail=f"Server busy, retry later ({e})")
+
+    try:
+        with retriever.lease() as policy_retriever:
+            results = await analyze_batch(
+                grievances, classifier, policy_retriever, recommender, run_blocking=inference_pool.run
+            )
+        return BatchResponse(results=[GrievanceResponse(**r) for r in results])
     except Exception as e:
-        print(f"Error during analysis: {e}")
+        print(f"Error during batch analysis: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        inference_pool.release()
+
+
+def _sse(event: str, data) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class SlotStreamingResponse(StreamingResponse):
+    """StreamingResponse that frees an inference slot once it has been sent.
+
+    Releasing here rather than in the body generator's ``finally`` also covers
+    clients that disconnect before the first chunk, when the generator is
+    never started and its ``finally`` never runs.
+    """
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+
+@app.post("/analyze/stream")
+async def analyze_grievance_stream(req: GrievanceRequest):
+    """Stream the pipeline as SSE: categories, then policies, then recommendation tokens."""
+    grievance_text = req.grievance.strip()
+    if not grievance_text:
+        raise HTTPException(status_code=400, detail="Grievance cannot be empty")
+    _require_ready()
+
+    cached = response_cache.get_exact(grievance_text, retriever.index_version())
+
+    if cached is None:
+        try:
+            inference_pool.acquire()
+        except PoolSaturated as e:
+            raise HTTPException(status_code=503, detail=f"Server busy, retry later ({e})")
+
+    async def replay(hit: dict):
+        yield _sse("categories", hit["categories"])
+        yield _sse("policies", hit["relevant_policies"])
+        yield _sse("token", hit["recommendation"])
+        yield _sse("done", {"recommendation": hit["recommendation"], "cached": True})
+
+    async def events():
+        try:
+            # Leased inside the generator: nothing is held if the client leaves before streaming starts
+            with retriever.lease() as policy_retriever:
+                index_version = policy_retriever.index_version()
+                classify_future = asyncio.wrap_future(classifier.classify_future(grievance_text))
+                embedding = await inference_pool.run(policy_retriever.encode_query, grievance_text)
+
+                hit = response_cache.get_semantic(embedding, index_version)
+                if hit is not None:
+                    classify_future.cancel()
+                    async for event in replay(hit):
+                        yield event
+                    return
+
+                policies_task = None
+                if not policy_retriever.category_filter:
+                    policies_task = asyncio.ensure_future(
+                        inference_pool.run(policy_retriever.search_policies, grievance_text, 3, embedding)
+                    )
+                categories = [c["label"] for c in await _timed(classify_future, "classify")]
+                yield _sse("categories", categories)
+                if policies_task is None:
+                    policies_task = asyncio.ensure_future(
+                        inference_pool.run(policy_retriever.search_policies, grievance_text, 3, embedding, categories)
+                    )
+
+                policies = await policies_task
+                policy_texts = [p["policy_text"] for p in policies]
+                yield _sse("policies", policy_texts)
+
+                chunks = []
+                async for chunk in recommender.stream_recommendation_async(grievance_text, categories, policies):
+                    chunks.append(chunk)
+                    yield _sse("token", chunk)
+
+                recommendation = "".join(chunks)
+                yield _sse("done", {"recommendation": recommendation, "cached": False})
+        except Exception as e:
+            print(f"Error during streaming analysis: {e}")
+            yield _sse("error", {"detail": str(e)})
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if cached is not None:
+        return StreamingResponse(replay(cached), media_type="text/event-stream", headers=headers)
+    return SlotStreamingResponse(events(), inference_pool.release, media_type="text/event-stream", headers=headers)
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint."""
+    payload, content_type = metrics.render_latest()
+    return Response(content=payload, media_type=content_type)
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters and size of the /analyze response cache."""
+    return response_cache.snapshot()
+
+@app.get("/admin/categories")
+def get_categories():
+    """The classifier's current label set and score threshold."""
+    _require_ready()
+    return {"categories": classifier.categories, "threshold": classifier.threshold}
+
+@app.put("/admin/categories")
+async def set_categories(req: CategoriesRequest):
+    """Swap the classifier's label set at runtime.
+
+    Applied here at once, then shared through HR_CATEGORIES_FILE; other
+    workers pick it up within HR_CATEGORIES_WATCH_S.
+    """
+    _require_ready()
+    try:
+        # Label embeddings / hypotheses for the new set are computed on the inference pool
+        await inference_pool.run(classifier.set_categories, req.categories, req.threshold)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Cached responses carry categories from the old label set
+    response_cache.clear()
+    await asyncio.to_thread(save_shared_categories, classifier.categories, classifier.threshold)
+    categories_state["stamp"] = _categories_stamp()
+    return {"categories": classifier.categories, "threshold": classifier.threshold}
+
+@app.get("/admin/index")
+def get_index():
+    """Index versions on disk, the active one, and the one this worker is serving."""
+    _require_ready()
+    return {**index_versions.describe(CHROMA_DIR), "serving": retriever.version}
+
+@app.post("/admin/index/reload")
+async def reload_policy_index(req: Optional[IndexReloadRequest] = None):
+    """Switch this worker to the active index version, or activate ``version`` first (e.g. a rollback).
+
+    Other workers follow within HR_INDEX_WATCH_S.
+    """
+    _require_ready()
+    if req is not None and req.version:
+        try:
+            index_versions.activate(CHROMA_DIR, req.version)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    try:
+        return await reload_index()
+    except Exception as e:
+        print(f"⚠️ Index reload failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Index reload failed, still serving {retriever.version}: {e}")
 
 @app.get("/")
 def home():
     return {"message": "HR Grievance Policy Agent is running 🚀"}
 
+@app.get("/healthz")
+def liveness():
+    """Liveness: the process is up and serving, whether or not models have loaded."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readiness():
+    """Readiness: 200 once every model is loaded and warmed up, 503 before that."""
+    body = {**startup_state, "models": model_registry.loaded_models()}
+    return JSONResponse(status_code=200 if startup_state["ready"] else 503, content=body)
+
 # -----------------------------------------------
 # 🕵️ NEW DIAGNOSTIC ENDPOINT
 # -----------------------------------------------
@@ -74,10 +653,11 @@ async def list_models():
     if not GEMINI_API_KEY:
         raise HTTPException(status_code=500, detail="Gemini API key not configured")
 
-    url = f"https://generativelanguage.googleapis.com/v1beta/models?key={GEMINI_API_KEY}"
+    url = "https://generativelanguage.googleapis.com/v1beta/models"
     
     try:
-        response = requests.get(url)
+        # Pooled keep-alive session; the blocking call runs off the event loop
+        response = await asyncio.to_thread(http_session().get, url, params={"key": GEMINI_API_KEY}, timeout=10)
         if response.status_code != 200:
             raise HTTPException(status_code=response.status_code, detail=response.text)
         
@@ -0,0 +1,214 @@
+# backend/batch_pipeline.py
+import os
+import csv
+import json
+import time
+import asyncio
+from typing import Dict, Iterator, List, Optional
+
+# Gemini calls in flight at once, and the per-minute cap across them
+LLM_CONCURRENCY = int(os.getenv("HR_BATCH_LLM_CONCURRENCY", "8"))
+LLM_RATE_PER_MIN = float(os.getenv("HR_BATCH_LLM_RATE_PER_MIN", "60"))
+# Rows classified/embedded/queried together, and the checkpoint granularity
+BATCH_CHUNK_SIZE = int(os.getenv("HR_BATCH_CHUNK_SIZE", "64"))
+
+
+class AsyncRateLimiter:
+    """Spaces out calls so that at most rate_per_min start in any minute."""
+
+    def __init__(self, rate_per_min: float = LLM_RATE_PER_MIN):
+        self.interval = 60.0 / rate_per_min if rate_per_min > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def analyze_batch(
+    grievances: List[str],
+    classifier,
+    retriever,
+    recommender,
+    top_k: int = 3,
+    concurrency: int = LLM_CONCURRENCY,
+    limiter: Optional[AsyncRateLimiter] = None,
+    run_blocking=None,
+) -> List[Dict]:
+    """Run the full pipeline over many grievances with batched inference.
+
+    Classification and embedding run as batches, retrieval is a single
+    Chroma query for all rows, and Gemini calls fan out under a concurrency
+    cap and rate limit. ``run_blocking`` lets the API route CPU work through
+    its inference pool; by default it goes to the loop's executor.
+    """
+    if not grievances:
+        return []
+    if run_blocking is None:
+        loop = asyncio.get_running_loop()
+
+        async def run_blocking(fn, *args):
+            return await loop.run_in_executor(None, lambda: fn(*args))
+
+    limiter = limiter or AsyncRateLimiter()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    if getattr(retriever, "category_filter", False):
+        classified = await run_blocking(classifier.classify_batch, grievances)
+        labels = [[c["label"] for c in preds] for preds in classified]
+        policies = await run_blocking(retriever.search_policies_batch, grievances, top_k, None, labels)
+    else:
+        classified, policies = await asyncio.gather(
+            run_blocking(classifier.classify_batch, grievances),
+            run_blocking(retriever.search_policies_batch, grievances, top_k),
+        )
+
+    async def recommend(text: str, cats: List[str], pols: List[Dict[str, str]]) -> str:
+        async with semaphore:
+            await limiter.wait()
+            return await recommender.generate_recommendation_async(text, cats, pols)
+
+    categories = [[c["label"] for c in preds] for preds in classified]
+    recommendations = await asyncio.gather(*[
+        recommend(text, cats, pols)
+        for text, cats, pols in zip(grievances, categories, policies)
+    ])
+
+    return [
+        {
+            "grievance": text,
+            "categories": cats,
+            "relevant_policies": [p["policy_text"] for p in pols],
+            "recommendation": rec,
+        }
+        for text, cats, pols, rec in zip(grievances, categories, policies, recommendations)
+    ]
+
+
+# ---------- offline bulk processing ----------
+
+def _parse_jsonl(lines: Iterator[str]) -> Iterator[Dict]:
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield {"_error": f"invalid JSON: {e}"}
+            continue
+        yield row if isinstance(row, dict) else {"_error": "row is not a JSON object"}
+
+
+def iter_grievances(path: str) -> Iterator[Dict[str, str]]:
+    """Stream {"id", "grievance"} rows from a JSONL or CSV file.
+
+    Rows that can't be analyzed (malformed JSON, no grievance text) carry an
+    "error" instead, so they still get an output record.
+    """
+    is_csv = path.lower().endswith(".csv")
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = csv.DictReader(f) if is_csv else _parse_jsonl(f)
+        for i, row in enumerate(rows):
+            row_id = str(row["id"] if "id" in row else i)
+            if "_error" in row:
+                yield {"id": row_id, "grievance": "", "error": row["_error"]}
+                continue
+            text = (row.get("grievance") or row.get("text") or "").strip()
+            if not text:
+                yield {"id": row_id, "grievance": "", "error": "empty grievance"}
+                continue
+            yield {"id": row_id, "grievance": text}
+
+
+def _read_checkpoint(path: str) -> Optional[Dict[str, int]]:
+    """{"rows_done", "output_bytes"}, or None when there is no usable checkpoint."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {"rows_done": int(data.get("rows_done", 0)), "output_bytes": int(data["output_bytes"])}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_checkpoint(path: str, rows_done: int, output_bytes: int) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"rows_done": rows_done, "output_bytes": output_bytes, "updated": time.time()}, f)
+    os.replace(tmp, path)
+
+
+async def run_bulk(
+    input_path: str,
+    output_path: str,
+    classifier,
+    retriever,
+    recommender,
+    chunk_size: int = BATCH_CHUNK_SIZE,
+    concurrency: int = LLM_CONCURRENCY,
+    rate_per_min: float = LLM_RATE_PER_MIN,
+) -> int:
+    """Process a grievance file in chunks, appending results to JSONL.
+
+    A checkpoint next to the output records how many input rows are done and
+    how long the output was at that point. A rerun after a crash truncates
+    the output back to that length (dropping rows written after the last
+    checkpoint) and resumes from the next chunk, so no row appears twice.
+    """
+    checkpoint = output_path + ".ckpt"
+    state = _read_checkpoint(checkpoint)
+    if state is None:
+        # Fresh run: anything already in the output predates it and is kept
+        start_bytes = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+        state = {"rows_done": 0, "output_bytes": start_bytes}
+        _write_checkpoint(checkpoint, 0, start_bytes)
+    done = state["rows_done"]
+    if done:
+        print(f"↩️ Resuming after {done} rows already processed.")
+
+    limiter = AsyncRateLimiter(rate_per_min)
+    rows_seen = 0
+    started = time.perf_counter()
+    processed = 0
+
+    with open(output_path, "a+b") as out:
+        out.truncate(state["output_bytes"])
+        chunk: List[Dict[str, str]] = []
+
+        async def flush(chunk: List[Dict[str, str]]) -> None:
+            nonlocal processed
+            valid = [r for r in chunk if "error" not in r]
+            results = iter(await analyze_batch(
+                [r["grievance"] for r in valid], classifier, retriever, recommender,
+                concurrency=concurrency, limiter=limiter,
+            ))
+            # Input order, with error records in place of rows that couldn't be analyzed
+            for row in chunk:
+                record = {"id": row["id"], "error": row["error"]} if "error" in row \
+                    else {"id": row["id"], **next(results)}
+                out.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+            out.flush()
+            os.fsync(out.fileno())
+            _write_checkpoint(checkpoint, rows_seen, out.tell())
+            processed += len(valid)
+            rate = processed / max(time.perf_counter() - started, 1e-9)
+            print(f"✅ {rows_seen} rows done ({rate:.1f} grievances/s)")
+
+        for row in iter_grievances(input_path):
+            rows_seen += 1
+            if rows_seen <= done:
+                continue
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                await flush(chunk)
+                chunk = []
+        if chunk:
+            await flush(chunk)
+
+    return processed
@@ -0,0 +1,84 @@
+# backend/batching.py
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class MicroBatcher:
+    """Collects concurrent calls for a few milliseconds and runs them as one batch.
+
+    ``batch_fn(key, items)`` must return one result per item, in order. Items
+    submitted with different keys (e.g. different label sets) are never mixed
+    in the same batch. With an ``executor`` (anything with ``submit``), batches
+    run there, so they share its bounded worker threads; otherwise they run on
+    the batching thread itself. Either way batches run one at a time: the
+    batching thread waits for each before collecting the next.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[Hashable, List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        name: str = "micro-batcher",
+        executor: Optional[Any] = None,
+    ):
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Tuple[Hashable, Any, Future]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        """Items queued but not yet picked up by the batching thread."""
+        return self._queue.qsize()
+
+    def submit_future(self, item: Any, key: Hashable = None) -> Future:
+        """Enqueue an item and return a Future for its individual result."""
+        fut: Future = Future()
+        self._queue.put((key, item, fut))
+        return fut
+
+    def submit(self, item: Any, key: Hashable = None) -> Any:
+        """Blocking helper: enqueue an item and wait for its result."""
+        return self.submit_future(item, key).result()
+
+    def _collect(self) -> List[Tuple[Hashable, Any, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._collect()
+
+            groups: Dict[Hashable, List[Tuple[Any, Future]]] = {}
+            for key, item, fut in batch:
+                if fut.set_running_or_notify_cancel():
+                    groups.setdefault(key, []).append((item, fut))
+
+            for key, entries in groups.items():
+                items = [item for item, _ in entries]
+                try:
+                    if self.executor is None:
+                        results = self.batch_fn(key, items)
+                    else:
+                        results = self.executor.submit(self.batch_fn, key, items).result()
+                    for (_, fut), res in zip(entries, results):
+                        fut.set_result(res)
+                except Exception as e:
+                    for _, fut in entries:
+                        fut.set_exception(e)
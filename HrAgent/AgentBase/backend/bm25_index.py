@@ -0,0 +1,84 @@
+# backend/bm25_index.py
+import os
+import re
+import json
+import math
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+BM25_FILE = "bm25_index.json"
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be been but by can do does for from has have i if in into is it its "
+    "me my no not of on or our so such that the their then there these they this to was we "
+    "were what when where which who will with you your q".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """Small in-process inverted index with Okapi BM25 scoring.
+
+    Document positions line up with the exported vector index, so a BM25 hit
+    can be resolved to its id, text, metadata and embedding by position.
+    """
+
+    def __init__(self, ids: List[str], doc_lens: List[int], postings: Dict[str, List[List[int]]],
+                 k1: float = 1.5, b: float = 0.75):
+        self.ids = ids
+        self.doc_lens = doc_lens
+        self.postings = postings
+        self.k1 = k1
+        self.b = b
+        n = len(ids)
+        self.avg_len = (sum(doc_lens) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for term, plist in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, ids: List[str], documents: Iterable[str]) -> "BM25Index":
+        postings: Dict[str, List[List[int]]] = defaultdict(list)
+        doc_lens = []
+        for pos, doc in enumerate(documents):
+            tokens = tokenize(doc)
+            doc_lens.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings[term].append([pos, tf])
+        return cls(list(ids), doc_lens, dict(postings))
+
+    def search(self, query: str, top_k: int) -> List[Tuple[int, float]]:
+        """Return (position, score) pairs for the top_k documents, best first."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = self.idf[term]
+            for pos, tf in plist:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lens[pos] / (self.avg_len or 1))
+                scores[pos] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+
+    # ---------- persistence ----------
+
+    def save(self, db_path: str) -> None:
+        path = os.path.join(db_path, BM25_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "doc_lens": self.doc_lens, "postings": self.postings}, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, db_path: str) -> "BM25Index":
+        with open(os.path.join(db_path, BM25_FILE), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["ids"], data["doc_lens"], data["postings"])
@@ -0,0 +1,117 @@
+# backend/chunking.py
+import os
+from typing import Iterable, Iterator, List
+
+# Long documents are split into overlapping windows of about CHUNK_CHARS characters
+# (~300 MiniLM tokens); CHUNK_OVERLAP characters are repeated so a sentence cut at a
+# boundary is still retrievable from the next chunk.
+CHUNK_CHARS = int(os.getenv("HR_CHUNK_CHARS", "1200"))
+CHUNK_OVERLAP = int(os.getenv("HR_CHUNK_OVERLAP", "200"))
+# A chunk must add at least this many characters beyond the carried-over overlap;
+# smaller remainders are folded into the previous chunk instead of near-duplicating it.
+CHUNK_MIN_NEW = int(os.getenv("HR_CHUNK_MIN_NEW", "200"))
+# Bump whenever the chunking algorithm changes, so existing indexes are re-chunked.
+CHUNKER_VERSION = 2
+
+
+def _paragraphs(lines: Iterable[str], markdown: bool) -> Iterator[str]:
+    """Group lines into blank-line separated paragraphs; Markdown headings stand alone."""
+    para: List[str] = []
+    for line in lines:
+        line = line.rstrip()
+        if markdown and line.lstrip().startswith("#"):
+            if para:
+                yield " ".join(para)
+                para = []
+            yield line.strip()
+        elif line.strip():
+            para.append(line.strip())
+        elif para:
+            yield " ".join(para)
+            para = []
+    if para:
+        yield " ".join(para)
+
+
+def _split_long(text: str, size: int) -> Iterator[str]:
+    """Cut a paragraph longer than ``size`` at word boundaries."""
+    while len(text) > size:
+        cut = text.rfind(" ", 0, size)
+        if cut <= 0:
+            cut = size
+        yield text[:cut].strip()
+        text = text[cut:].strip()
+    if text:
+        yield text
+
+
+def _tail(text: str, overlap: int) -> str:
+    """Last ``overlap`` characters of a chunk, starting on a word boundary."""
+    if overlap <= 0:
+        return ""
+    if len(text) <= overlap:
+        return text
+    tail = text[-overlap:]
+    space = tail.find(" ")
+    return tail[space + 1:] if space >= 0 else tail
+
+
+def iter_text_chunks(
+    lines: Iterable[str],
+    chunk_chars: int = CHUNK_CHARS,
+    overlap: int = CHUNK_OVERLAP,
+    markdown: bool = False,
+    min_new: int = CHUNK_MIN_NEW,
+) -> Iterator[str]:
+    """Stream overlapping chunks of roughly ``chunk_chars`` from a line iterator.
+
+    Only the chunk being built is held in memory, so a handbook of any size
+    can be fed straight from an open file. Chunks break on paragraph
+    boundaries where possible. For Markdown, each heading starts a new chunk
+    (no overlap across sections) and is prefixed to every chunk under it.
+
+    A chunk that would add fewer than ``min_new`` characters beyond the
+    overlap is appended to the previous chunk instead, so that chunk may run
+    up to ``min_new`` characters over ``chunk_chars``. Chunks are therefore
+    yielded one step behind.
+    """
+    chunk_chars = max(1, chunk_chars)
+    overlap = max(0, min(overlap, chunk_chars // 2))
+    min_new = max(0, min(min_new, chunk_chars))
+    heading = ""
+    buf = ""
+    carried = 0  # leading characters of buf repeated from the previous chunk
+    pending = None  # previous chunk, held back in case the next one gets folded into it
+
+    def close(text: str, carried: int) -> Iterator[str]:
+        nonlocal pending
+        if pending is not None and carried and len(text) - carried < min_new:
+            pending += text[carried:]
+            return
+        if pending is not None:
+            yield pending
+        pending = f"{heading}\n{text}" if heading else text
+
+    for para in _paragraphs(lines, markdown):
+        if markdown and para.startswith("#"):
+            if len(buf) > carried:
+                yield from close(buf, carried)
+            if pending is not None:
+                yield pending
+                pending = None
+            heading, buf, carried = para.lstrip("#").strip(), "", 0
+            continue
+        for piece in _split_long(para, chunk_chars):
+            if buf and len(buf) + 1 + len(piece) > chunk_chars:
+                if len(buf) > carried:
+                    yield from close(buf, carried)
+                buf = _tail(buf, overlap)
+                # Drop the carried-over text if it can't fit next to the new piece
+                if len(buf) + 1 + len(piece) > chunk_chars:
+                    buf = ""
+                carried = len(buf)
+            buf = f"{buf}\n{piece}" if buf else piece
+    if len(buf) > carried:
+        yield from close(buf, carried)
+    if pending is not None:
+        yield pending
@@ -1,7 +1,14 @@
 # backend/classifier_agent.py
 import os
-from transformers import pipeline
-from typing import List, Dict
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import numpy as np
+from typing import List, Dict, Optional, Tuple
+from backend import metrics, model_registry
+from backend.batching import MicroBatcher
+from backend.response_cache import normalize_text
 
 # Disable TensorFlow / Flax imports (important for Windows setups)
 os.environ.setdefault("TRANSFORMERS_NO_TF", "1")
@@ -23,24 +30,327 @@ DEFAULT_CATEGORIES = [
     "Retaliation or Whistleblowing"
 ]
 
+# Short descriptions used by the embedding backend; a bare label like
+# "Leave and PTO" embeds poorly, so each one is expanded with typical wording.
+CATEGORY_DESCRIPTIONS = {
+    "Workplace Conduct": "unprofessional behaviour, rudeness, bullying or misconduct by colleagues at work",
+    "Harassment or Discrimination": "harassment, sexual harassment, discrimination, racism, unfair treatment based on gender, age or religion",
+    "Manager Conflict": "conflict or disagreement with my manager or supervisor, poor communication from my boss",
+    "Scheduling or Shifts": "shift timings, work schedule changes, rosters, night shifts, working hours without notice",
+    "Payroll or Compensation": "salary not paid, delayed wages, overtime pay, bonus, payslip errors, compensation",
+    "Leave and PTO": "leave requests, vacation, sick leave, paid time off denied or not approved",
+    "Health and Safety": "unsafe working conditions, injury, hazards, health risks, safety equipment",
+    "Performance Management": "performance review, appraisal, ratings, performance improvement plan, promotion",
+    "Facilities or Equipment": "broken equipment, laptop, office facilities, workspace, air conditioning, tools",
+    "Policy Clarification": "question about company policy, unclear rules, how a policy applies",
+    "Retaliation or Whistleblowing": "retaliation after reporting a problem, whistleblowing, punished for complaining",
+}
+
+# Classifier backends: two NLI models served through the zero-shot pipeline,
+# and an embedding mode that reuses the retriever's MiniLM encoder.
+CLASSIFIER_BACKENDS = {
+    "bart-mnli": "facebook/bart-large-mnli",
+    "distilbart-mnli": "valhalla/distilbart-mnli-12-1",
+    "embedding": "all-MiniLM-L6-v2",
+}
+DEFAULT_THRESHOLDS = {
+    "bart-mnli": 0.35,
+    "distilbart-mnli": 0.35,
+    "embedding": 0.30,
+}
+CLASSIFIER_BACKEND = os.getenv("HR_CLASSIFIER_BACKEND", "bart-mnli")
+
+# Micro-batching: concurrent classify calls are held for up to MAX_WAIT_MS and
+# run together; FORWARD_BATCH is how many (grievance, label) pairs go through
+# the model per padded forward pass. MAX_BATCH=1 disables batching.
+CLASSIFY_MAX_BATCH = int(os.getenv("HR_CLASSIFY_MAX_BATCH", "8"))
+CLASSIFY_MAX_WAIT_MS = float(os.getenv("HR_CLASSIFY_MAX_WAIT_MS", "10"))
+CLASSIFY_FORWARD_BATCH = int(os.getenv("HR_CLASSIFY_FORWARD_BATCH", "32"))
+# Results kept per (normalized grievance, label set, threshold); 0 disables the cache
+CLASSIFY_CACHE_SIZE = int(os.getenv("HR_CLASSIFY_CACHE_SIZE", "4096"))
+# NLI hypothesis per label, same as the transformers zero-shot pipeline default
+HYPOTHESIS_TEMPLATE = "This example is {}."
+# Label sets whose embeddings / hypothesis ids are kept (callers may pass their own sets)
+LABEL_SET_CACHE_SIZE = 32
+# Label set shared by every server process; PUT /admin/categories writes it, workers follow it
+CATEGORIES_FILE = os.getenv("HR_CATEGORIES_FILE", "./classifier_categories.json")
+
+
+def load_shared_categories(path: str = CATEGORIES_FILE) -> Optional[Dict]:
+    """The shared {"categories": [...], "threshold": float|None}, or None if not set."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {"categories": list(data["categories"]), "threshold": data.get("threshold")}
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"⚠️ Ignoring unreadable {path}: {e}")
+        return None
+
+
+def save_shared_categories(categories: List[str], threshold: Optional[float], path: str = CATEGORIES_FILE) -> None:
+    """Write the shared label set atomically, so readers never see a partial file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"categories": categories, "threshold": threshold}, f)
+    os.replace(tmp, path)
+
+
 class GrievanceClassifier:
     """Multi-label classifier for HR grievances using zero-shot learning."""
 
-    def __init__(self, categories: List[str] = None, threshold: float = 0.35):
+    def __init__(
+        self,
+        categories: List[str] = None,
+        threshold: Optional[float] = None,
+        backend: str = CLASSIFIER_BACKEND,
+        embedder=None,
+        classifier=None,
+        max_batch_size: int = CLASSIFY_MAX_BATCH,
+        max_wait_ms: float = CLASSIFY_MAX_WAIT_MS,
+        executor=None,
+    ):
+        if backend not in CLASSIFIER_BACKENDS:
+            raise ValueError(f"Unknown classifier backend '{backend}'. Choose from {sorted(CLASSIFIER_BACKENDS)}")
+        self.backend = backend
         self.categories = categories or DEFAULT_CATEGORIES
-        self.threshold = threshold
-        print("🚀 Loading zero-shot classifier model (facebook/bart-large-mnli)...")
-        self.classifier = pipeline(
-            "zero-shot-classification",
-            model="facebook/bart-large-mnli"
-        )
-        print("✅ Classifier loaded successfully.")
+        self.threshold = DEFAULT_THRESHOLDS[backend] if threshold is None else threshold
+        self.classifier = None
+        self.embedder = None
+        self._label_embeddings: "OrderedDict[Tuple[str, ...], np.ndarray]" = OrderedDict()
+        self._hypothesis_ids: "OrderedDict[Tuple[str, ...], List[List[int]]]" = OrderedDict()
+        self._labels_lock = threading.Lock()
+        self._results: "OrderedDict[Tuple, List[Dict[str, float]]]" = OrderedDict()
+        self._results_lock = threading.Lock()
+
+        model_name = CLASSIFIER_BACKENDS[backend]
+        if backend == "embedding":
+            self.embedder = embedder or model_registry.get_embedder(model_name)
+        else:
+            self.classifier = classifier or model_registry.get_zero_shot_pipeline(model_name)
+        self._prepare_labels(tuple(self.categories))
+        print(f"✅ Classifier loaded successfully (backend: {backend}).")
+
+        # Where classify_future's forward passes run (e.g. the server's InferencePool);
+        # without one they run on the batching thread, or on the caller when unbatched
+        self.executor = executor
+        self.batcher: Optional[MicroBatcher] = None
+        if max_batch_size > 1:
+            self.batcher = MicroBatcher(
+                self._run_queued,
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+                name="classifier-batcher",
+                executor=executor,
+            )
+
+    def warmup(self) -> None:
+        """Run a dummy forward pass so the first real request doesn't pay for lazy init."""
+        self.classify_batch(["warm-up"])
+
+    def queue_depth(self) -> int:
+        return self.batcher.pending if self.batcher is not None else 0
+
+    def set_categories(self, categories: List[str], threshold: Optional[float] = None) -> None:
+        """Switch the default label set (and optionally the threshold) without reloading the model."""
+        categories = [c.strip() for c in categories if c and c.strip()]
+        if not categories:
+            raise ValueError("At least one category is required")
+        labels = tuple(dict.fromkeys(categories))
+        self._prepare_labels(labels)
+        self.categories = list(labels)
+        if threshold is not None:
+            self.threshold = threshold
+        with self._results_lock:
+            self._results.clear()
+
+    def _prepare_labels(self, labels: Tuple[str, ...]) -> None:
+        """Precompute the label embeddings or tokenized NLI hypotheses for a label set."""
+        with model_registry.inference_mode():
+            if self.backend == "embedding":
+                self._label_matrix(labels)
+            else:
+                self._hypotheses(labels)
+
+    def _label_cache(self, cache: OrderedDict, labels: Tuple[str, ...], compute):
+        """Per-label-set LRU (LABEL_SET_CACHE_SIZE) for label embeddings and hypothesis ids."""
+        with self._labels_lock:
+            value = cache.get(labels)
+            if value is not None:
+                cache.move_to_end(labels)
+                return value
+        value = compute()
+        with self._labels_lock:
+            cache[labels] = value
+            cache.move_to_end(labels)
+            while len(cache) > LABEL_SET_CACHE_SIZE:
+                cache.popitem(last=False)
+        return value
+
+    # ---------- result cache ----------
+
+    def _cache_key(self, grievance: str, labels: Tuple[str, ...]) -> Tuple:
+        return normalize_text(grievance), labels, self.threshold
+
+    def _cache_get(self, key: Tuple, record: bool = True) -> Optional[List[Dict[str, float]]]:
+        if CLASSIFY_CACHE_SIZE <= 0:
+            return None
+        with self._results_lock:
+            hit = self._results.get(key)
+            if hit is not None:
+                self._results.move_to_end(key)
+        if record:
+            metrics.CACHE_LOOKUPS.labels(tier="classify", result="miss" if hit is None else "hit").inc()
+        return None if hit is None else [dict(p) for p in hit]
+
+    def _cache_put(self, key: Tuple, predictions: List[Dict[str, float]]) -> None:
+        if CLASSIFY_CACHE_SIZE <= 0:
+            return
+        with self._results_lock:
+            self._results[key] = predictions
+            self._results.move_to_end(key)
+            while len(self._results) > CLASSIFY_CACHE_SIZE:
+                self._results.popitem(last=False)
 
     def classify(self, grievance: str, categories: List[str] = None) -> List[Dict[str, float]]:
         """Classify a grievance text into one or more HR categories."""
-        labels = categories or self.categories
-        result = self.classifier(sequences=grievance, candidate_labels=labels, multi_label=True)
+        return self.classify_future(grievance, categories).result()
+
+    def classify_future(self, grievance: str, categories: List[str] = None) -> Future:
+        """Queue a grievance for the next micro-batch and return a Future of its predictions."""
+        labels = tuple(categories or self.categories)
+        cached = self._cache_get(self._cache_key(grievance, labels))
+        if cached is not None:
+            fut: Future = Future()
+            fut.set_result(cached)
+            return fut
+        if self.batcher is None:
+            if self.executor is not None:
+                # Never run the forward pass on the caller's thread (it may be the event loop)
+                return self.executor.submit(lambda: self._run_queued(labels, [grievance])[0])
+            fut = Future()
+            try:
+                fut.set_result(self._run_queued(labels, [grievance])[0])
+            except Exception as e:
+                fut.set_exception(e)
+            return fut
+        return self.batcher.submit_future(grievance, key=labels)
 
+    def classify_batch(self, grievances: List[str], categories: List[str] = None) -> List[List[Dict[str, float]]]:
+        """Classify many grievances at once, bypassing the micro-batch wait."""
+        if not grievances:
+            return []
+        return self._run_batch(tuple(categories or self.categories), grievances)
+
+    def _run_queued(self, labels: Tuple[str, ...], grievances: List[str]) -> List[List[Dict[str, float]]]:
+        """_run_batch for grievances whose cache lookup classify_future already counted."""
+        return self._run_batch(labels, grievances, record=False)
+
+    def _run_batch(
+        self, labels: Tuple[str, ...], grievances: List[str], record: bool = True
+    ) -> List[List[Dict[str, float]]]:
+        """Score a batch of grievances against a label set with the configured backend.
+
+        Cached and duplicate grievances (same normalized text) are scored once.
+        """
+        keys = [self._cache_key(g, labels) for g in grievances]
+        results: Dict[Tuple, List[Dict[str, float]]] = {}
+        todo: Dict[Tuple, str] = {}
+        for key, grievance in zip(keys, grievances):
+            if key in results or key in todo:
+                continue
+            cached = self._cache_get(key, record)
+            if cached is not None:
+                results[key] = cached
+            else:
+                todo[key] = grievance
+
+        if todo:
+            metrics.CLASSIFY_BATCH_SIZE.observe(len(todo))
+            with metrics.stage("classify_forward"), model_registry.inference_mode():
+                scored = self._score(labels, list(todo.values()))
+            for key, predictions in zip(todo, scored):
+                self._cache_put(key, predictions)
+                results[key] = predictions
+        return [[dict(p) for p in results[key]] for key in keys]
+
+    def _score(self, labels: Tuple[str, ...], grievances: List[str]) -> List[List[Dict[str, float]]]:
+        if self.backend == "embedding":
+            return self._run_embedding_batch(labels, grievances)
+        return self._run_nli_batch(labels, grievances)
+
+    def _hypotheses(self, labels: Tuple[str, ...]) -> List[List[int]]:
+        """Token ids of each label's NLI hypothesis, tokenized once per label set."""
+        def compute() -> List[List[int]]:
+            hypotheses = [HYPOTHESIS_TEMPLATE.format(label) for label in labels]
+            return self.classifier.tokenizer(hypotheses, add_special_tokens=False)["input_ids"]
+
+        return self._label_cache(self._hypothesis_ids, labels, compute)
+
+    def _run_nli_batch(self, labels: Tuple[str, ...], grievances: List[str]) -> List[List[Dict[str, float]]]:
+        """Score every (grievance, label) pair with the NLI model, as the zero-shot pipeline does.
+
+        Each grievance is tokenized once and joined with the precomputed
+        hypothesis ids, instead of re-tokenizing both for every pair.
+        """
+        tokenizer = self.classifier.tokenizer
+        model = self.classifier.model
+        hypotheses = self._hypotheses(labels)
+        premises = tokenizer(list(grievances), add_special_tokens=False)["input_ids"]
+        max_len = min(tokenizer.model_max_length, getattr(model.config, "max_position_embeddings", tokenizer.model_max_length))
+        special = tokenizer.num_special_tokens_to_add(pair=True)
+        pairs = [
+            tokenizer.build_inputs_with_special_tokens(premise[:max(1, max_len - special - len(h))], h)
+            for premise in premises
+            for h in hypotheses
+        ]
+
+        logits = []
+        for start in range(0, len(pairs), CLASSIFY_FORWARD_BATCH):
+            batch = tokenizer.pad({"input_ids": pairs[start:start + CLASSIFY_FORWARD_BATCH]}, return_tensors="pt")
+            logits.append(model(**batch).logits.float().cpu().numpy())
+        logits = np.concatenate(logits).reshape(len(grievances), len(labels), -1)
+
+        # Multi-label scoring: softmax over (contradiction, entailment) for each pair
+        entailment_id = self.classifier.entailment_id
+        contradiction_id = -1 if entailment_id == 0 else 0
+        pair_logits = logits[..., [contradiction_id, entailment_id]]
+        pair_logits -= pair_logits.max(axis=-1, keepdims=True)
+        probs = np.exp(pair_logits)
+        scores = probs[..., 1] / probs.sum(axis=-1)
+        return [
+            self._predictions({"labels": list(labels), "scores": row.tolist()})
+            for row in scores
+        ]
+
+    def _label_matrix(self, labels: Tuple[str, ...]) -> np.ndarray:
+        """Normalized label/description embeddings, computed once per label set."""
+        def compute() -> np.ndarray:
+            texts = [f"{label}: {CATEGORY_DESCRIPTIONS[label]}" if label in CATEGORY_DESCRIPTIONS else label
+                     for label in labels]
+            return self.embedder.encode(texts, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+
+        return self._label_cache(self._label_embeddings, labels, compute)
+
+    def _run_embedding_batch(self, labels: Tuple[str, ...], grievances: List[str]) -> List[List[Dict[str, float]]]:
+        vectors = self.embedder.encode(list(grievances), convert_to_numpy=True, normalize_embeddings=True)
+        return self.classify_embeddings(vectors, list(labels))
+
+    def classify_embeddings(self, vectors: np.ndarray, categories: List[str] = None) -> List[List[Dict[str, float]]]:
+        """Embedding backend only: score already-computed, unit-length MiniLM vectors."""
+        if self.embedder is None:
+            raise RuntimeError("classify_embeddings requires the 'embedding' backend")
+        labels = tuple(categories or self.categories)
+        scores = np.asarray(vectors, dtype=np.float32) @ self._label_matrix(labels).T
+        return [
+            self._predictions({"labels": list(labels), "scores": row.tolist()})
+            for row in scores
+        ]
+
+    def _predictions(self, result: Dict) -> List[Dict[str, float]]:
         predictions = [
             {"label": label, "score": float(score)}
             for label, score in zip(result["labels"], result["scores"])
@@ -53,7 +363,7 @@ class GrievanceClassifier:
 # Run a test directly
 if __name__ == "__main__":
     grievance = "I haven’t received my salary for two months."
-        
+
     clf = GrievanceClassifier()
     result = clf.classify(grievance)
     print("\n📊 Classification Results:")
@@ -0,0 +1,79 @@
+# backend/eval_classifier.py
+"""Compare classifier backends on the labeled evaluation set.
+
+Usage:
+    python -m backend.eval_classifier
+    python -m backend.eval_classifier --backends embedding distilbart-mnli
+"""
+import os
+import json
+import time
+import argparse
+from typing import Dict, List
+
+from backend.classifier_agent import CLASSIFIER_BACKENDS, GrievanceClassifier
+
+EVAL_FILE = os.path.join(os.path.dirname(__file__), "eval", "classifier_eval.jsonl")
+
+
+def load_eval_set(path: str = EVAL_FILE) -> List[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate_backend(backend: str, rows: List[Dict]) -> Dict[str, float]:
+    """Report top-1 accuracy, multi-label P/R/F1, load time and per-item latency."""
+    start = time.perf_counter()
+    # Batching off: we want single-request latency, not throughput
+    clf = GrievanceClassifier(backend=backend, max_batch_size=1)
+    load_s = time.perf_counter() - start
+
+    clf.classify("warm-up")
+    latencies, top1_hits = [], 0
+    tp = fp = fn = 0
+    for row in rows:
+        t0 = time.perf_counter()
+        preds = clf.classify(row["grievance"])
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+        gold = set(row["labels"])
+        predicted = {p["label"] for p in preds}
+        if preds and preds[0]["label"] in gold:
+            top1_hits += 1
+        tp += len(predicted & gold)
+        fp += len(predicted - gold)
+        fn += len(gold - predicted)
+
+    latencies.sort()
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "backend": backend,
+        "top1_accuracy": top1_hits / len(rows),
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "load_s": load_s,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate classifier backends for accuracy and latency.")
+    parser.add_argument("--backends", nargs="+", default=list(CLASSIFIER_BACKENDS),
+                        choices=list(CLASSIFIER_BACKENDS))
+    parser.add_argument("--eval-file", default=EVAL_FILE)
+    args = parser.parse_args()
+
+    rows = load_eval_set(args.eval_file)
+    print(f"\n📊 Evaluating {len(args.backends)} backend(s) on {len(rows)} grievances\n")
+    results = [evaluate_backend(b, rows) for b in args.backends]
+
+    header = f"{'backend':<18}{'top1':>7}{'P':>7}{'R':>7}{'F1':>7}{'load s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+    print("\n" + header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['backend']:<18}{r['top1_accuracy']:>7.2f}{r['precision']:>7.2f}{r['recall']:>7.2f}"
+              f"{r['f1']:>7.2f}{r['load_s']:>9.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}")
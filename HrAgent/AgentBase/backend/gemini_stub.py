@@ -0,0 +1,72 @@
+# backend/gemini_stub.py
+"""Offline stand-in for genai.GenerativeModel, used for benchmarks and load tests.
+
+Enable it with HR_GEMINI_STUB=1; HR_GEMINI_STUB_LATENCY_MS sets the simulated
+time to complete a response and HR_GEMINI_STUB_CHUNKS how many pieces a
+streamed response is split into.
+"""
+import os
+import time
+import asyncio
+from types import SimpleNamespace
+from typing import List
+
+STUB_ENABLED = os.getenv("HR_GEMINI_STUB", "0") == "1"
+STUB_LATENCY_MS = float(os.getenv("HR_GEMINI_STUB_LATENCY_MS", "800"))
+STUB_CHUNKS = int(os.getenv("HR_GEMINI_STUB_CHUNKS", "8"))
+
+_STUB_TEXT = (
+    "1. Acknowledge the grievance in writing and open a case file.\n"
+    "2. Review the relevant policy sections with the employee's manager.\n"
+    "3. Verify the facts with records and, where needed, witnesses.\n"
+    "4. Agree corrective actions and a timeline, and confirm them to the employee.\n"
+    "5. Follow up within two weeks to confirm the issue is resolved."
+)
+
+
+class StubResponse:
+    def __init__(self, text: str, prompt: str):
+        self.text = text
+        self.candidates = [SimpleNamespace(content=text)]
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=max(1, len(prompt) // 4),
+            candidates_token_count=max(1, len(_STUB_TEXT) // 4),
+        )
+
+
+class _StubStream:
+    def __init__(self, chunks: List[StubResponse], delay_s: float):
+        self._chunks = chunks
+        self._delay_s = delay_s
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self._chunks:
+            await asyncio.sleep(self._delay_s)
+            yield chunk
+
+
+class StubGenerativeModel:
+    """Mimics the parts of genai.GenerativeModel the recommender uses."""
+
+    def __init__(self, model_name: str = "stub", latency_ms: float = STUB_LATENCY_MS, chunks: int = STUB_CHUNKS, **_):
+        self.model_name = model_name
+        self.latency_s = latency_ms / 1000.0
+        self.chunks = max(1, chunks)
+
+    def generate_content(self, prompt, stream: bool = False, **_):
+        time.sleep(self.latency_s)
+        return StubResponse(_STUB_TEXT, str(prompt))
+
+    async def generate_content_async(self, prompt, stream: bool = False, **_):
+        if not stream:
+            await asyncio.sleep(self.latency_s)
+            return StubResponse(_STUB_TEXT, str(prompt))
+        size = -(-len(_STUB_TEXT) // self.chunks)
+        pieces = [_STUB_TEXT[i:i + size] for i in range(0, len(_STUB_TEXT), size)]
+        return _StubStream([StubResponse(p, str(prompt)) for p in pieces], self.latency_s / len(pieces))
+
+    def count_tokens(self, contents):
+        return SimpleNamespace(total_tokens=max(1, len(str(contents)) // 4))
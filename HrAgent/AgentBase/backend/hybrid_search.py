@@ -0,0 +1,50 @@
+# backend/hybrid_search.py
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Standard RRF damping constant; larger values flatten the contribution of top ranks
+RRF_K = 60
+
+
+def rrf_fuse(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Reciprocal-rank fusion of several ranked id lists into one (id, score) ranking."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+
+
+def mmr_select(
+    relevance: np.ndarray,
+    candidates: np.ndarray,
+    top_k: int,
+    lambda_: float = 0.7,
+    duplicate_threshold: float = 0.92,
+) -> List[int]:
+    """Maximal-marginal-relevance pick over unit-length candidate vectors.
+
+    ``relevance`` holds one score per candidate in [0, 1] (e.g. normalized
+    fused rank scores); redundancy is cosine similarity between candidates.
+
+    Candidates whose cosine to an already selected one reaches
+    duplicate_threshold are dropped outright, so paraphrased Q&A variants of
+    the same policy collapse into a single slot.
+    """
+    if len(candidates) == 0 or top_k <= 0:
+        return []
+    pairwise = candidates @ candidates.T
+    selected: List[int] = []
+    remaining = list(range(len(candidates)))
+
+    while remaining and len(selected) < top_k:
+        if selected:
+            redundancy = pairwise[np.ix_(remaining, selected)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining))
+        scores = lambda_ * relevance[remaining] - (1 - lambda_) * redundancy
+        best = remaining[int(np.argmax(scores))]
+        selected.append(best)
+        remaining = [i for i in remaining if i != best and pairwise[i, best] < duplicate_threshold]
+    return selected
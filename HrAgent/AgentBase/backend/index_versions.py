@@ -0,0 +1,105 @@
+# backend/index_versions.py
+"""Versioned policy index snapshots with an atomically switched active pointer.
+
+Each ingestion run builds a complete snapshot (Chroma database, exported
+matrix, BM25 index and manifest) in its own directory::
+
+    chroma_db/
+        ACTIVE.json                 {"version": "...", "activated": ...}
+        versions/20261018-093000-1a2b3c/
+        versions/20261018-120500-4d5e6f/
+
+Nobody reads a snapshot until ACTIVE.json points at it, so ingestion never
+races live queries. Servers notice the new pointer and swap their retriever
+without a restart. A database from before versioning (collection files
+directly in chroma_db/) is served as the "legacy" version until the first
+versioned build.
+"""
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+from typing import Dict, List, Optional
+
+ACTIVE_FILE = "ACTIVE.json"
+VERSIONS_DIR = "versions"
+LEGACY_VERSION = "legacy"
+# Names made by create_version; anything else (e.g. "../..") is rejected
+_VERSION_NAME = re.compile(r"\d{8}-\d{6}-[0-9a-f]{6}")
+# Snapshots kept on disk, newest first; the one before the active snapshot must
+# survive so processes that haven't switched yet can finish their queries.
+KEEP_VERSIONS = max(2, int(os.getenv("HR_INDEX_KEEP_VERSIONS", "3")))
+
+
+def version_path(db_path: str, version: str) -> str:
+    if version == LEGACY_VERSION:
+        return db_path
+    if not _VERSION_NAME.fullmatch(version):
+        raise ValueError(f"Invalid index version name '{version}'")
+    return os.path.join(db_path, VERSIONS_DIR, version)
+
+
+def active_version(db_path: str) -> str:
+    """The version ACTIVE.json points at, or "legacy" when there is no pointer."""
+    try:
+        with open(os.path.join(db_path, ACTIVE_FILE), "r", encoding="utf-8") as f:
+            version = json.load(f)["version"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return LEGACY_VERSION
+    if version != LEGACY_VERSION and not _VERSION_NAME.fullmatch(str(version)):
+        raise ValueError(f"{ACTIVE_FILE} points at an invalid index version '{version}'")
+    return version
+
+
+def list_versions(db_path: str) -> List[str]:
+    """Snapshot versions on disk, oldest first (names sort by build time)."""
+    root = os.path.join(db_path, VERSIONS_DIR)
+    if not os.path.isdir(root):
+        return []
+    return sorted(d for d in os.listdir(root) if _VERSION_NAME.fullmatch(d) and os.path.isdir(os.path.join(root, d)))
+
+
+def create_version(db_path: str, base: Optional[str] = None) -> str:
+    """Make a new snapshot directory, seeded with a copy of ``base`` so ingestion stays incremental."""
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    path = version_path(db_path, version)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    base_path = version_path(db_path, base) if base else None
+    if base_path and os.path.isdir(base_path):
+        # The legacy layout shares its directory with the pointer and the other snapshots
+        shutil.copytree(base_path, path, ignore=shutil.ignore_patterns(VERSIONS_DIR, ACTIVE_FILE, "*.tmp"))
+    else:
+        os.makedirs(path)
+    return version
+
+
+def discard_version(db_path: str, version: str) -> None:
+    if version != LEGACY_VERSION:
+        shutil.rmtree(version_path(db_path, version), ignore_errors=True)
+
+
+def activate(db_path: str, version: str) -> None:
+    """Point ACTIVE.json at ``version`` (atomic rename, so readers never see a partial file)."""
+    if version != LEGACY_VERSION and version not in list_versions(db_path):
+        raise ValueError(f"Unknown index version '{version}'")
+    path = os.path.join(db_path, ACTIVE_FILE)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "activated": time.time()}, f)
+    os.replace(tmp, path)
+
+
+def collect_garbage(db_path: str, keep: int = KEEP_VERSIONS) -> List[str]:
+    """Delete all but the newest ``keep`` snapshots, never the active one. Returns what was removed."""
+    active = active_version(db_path)
+    versions = list_versions(db_path)
+    stale = [v for v in versions[:max(0, len(versions) - max(2, keep))] if v != active]
+    for version in stale:
+        discard_version(db_path, version)
+    return stale
+
+
+def describe(db_path: str) -> Dict:
+    return {"active": active_version(db_path), "versions": list_versions(db_path)}
@@ -0,0 +1,55 @@
+# backend/inference_pool.py
+import os
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+# Worker threads dedicated to CPU-bound model inference (classifier, embedder)
+INFERENCE_WORKERS = int(os.getenv("HR_INFERENCE_WORKERS", "2"))
+# Max pipeline requests allowed in flight before new ones are rejected
+MAX_PENDING = int(os.getenv("HR_MAX_PENDING", "32"))
+
+
+class PoolSaturated(Exception):
+    """Raised when the inference pool already has MAX_PENDING requests in flight."""
+
+
+class InferencePool:
+    """Bounded executor that keeps torch work off the event loop and Starlette's threadpool."""
+
+    def __init__(self, workers: int = INFERENCE_WORKERS, max_pending: int = MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def acquire(self) -> None:
+        """Reserve a request slot, or raise PoolSaturated when the queue is full."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PoolSaturated(f"{self._pending} requests already in flight")
+            self._pending += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._pending = max(0, self._pending - 1)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking callable on the inference executor and await its result."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Schedule a blocking callable on the inference executor; usable from any thread."""
+        # Carry the caller's context (e.g. its latency trace) into the worker thread
+        ctx = contextvars.copy_context()
+        return self._executor.submit(ctx.run, fn, *args)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,7 +1,13 @@
 # backend/ingest_policies.py
 import os
 import json
-import uuid
+import time
+import queue
+import hashlib
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from tqdm import tqdm
 
 
@@ -10,61 +16,506 @@ os.environ.setdefault("TRANSFORMERS_NO_TF", "1")
 os.environ.setdefault("TRANSFORMERS_NO_FLAX", "1")
 os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "0")
 
-from chromadb import PersistentClient
-from sentence_transformers import SentenceTransformer
+from backend import index_versions, model_registry
+from backend.bm25_index import BM25_FILE, BM25Index
+from backend.chunking import CHUNK_CHARS, CHUNK_MIN_NEW, CHUNK_OVERLAP, CHUNKER_VERSION, iter_text_chunks
+from backend.classifier_agent import GrievanceClassifier
+from backend.vector_index import INDEX_MATRIX, NumpyPolicyIndex, export_index
 
 # Config
 POLICY_FOLDER = os.path.join(os.path.dirname(__file__), "policies")
 CHROMA_DIR = "./chroma_db"
 EMBED_MODEL = "all-MiniLM-L6-v2"
+COLLECTION_NAME = "hr_policies"
+MANIFEST_NAME = "ingest_manifest.json"
+# JSONL holds one Q&A row per line; plain-text and Markdown handbooks are chunked
+SUPPORTED_EXTENSIONS = (".jsonl", ".txt", ".md")
 
-# Initialize embedding model
-print("🚀 Loading embedding model...")
-embedder = SentenceTransformer(EMBED_MODEL)
+# Batching knobs: rows are accumulated into chunks of INGEST_BATCH_SIZE, encoded
+# with ENCODE_BATCH_SIZE per forward pass and written with one upsert per chunk.
+INGEST_BATCH_SIZE = int(os.getenv("HR_INGEST_BATCH_SIZE", "512"))
+ENCODE_BATCH_SIZE = int(os.getenv("HR_ENCODE_BATCH_SIZE", "64"))
+# Parser processes; the embedding stage always runs in the main process
+INGEST_WORKERS = int(os.getenv("HR_INGEST_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+# Parsed batches allowed in flight between the parsers and the embedding stage.
+# Parsers block once it is full, which bounds memory when encoding is the bottleneck.
+INGEST_QUEUE_BATCHES = int(os.getenv("HR_INGEST_QUEUE_BATCHES", "8"))
 
-# Initialize Chroma client
-client = PersistentClient(path=CHROMA_DIR)
-collection = client.get_or_create_collection(name="hr_policies")
 
-def ingest_jsonl():
-    """Read all JSONL files and embed Q&A text."""
-    jsonl_files = [f for f in os.listdir(POLICY_FOLDER) if f.lower().endswith(".jsonl")]
-    if not jsonl_files:
-        print("⚠️ No JSONL files found in policies folder!")
-        return
+def parse_record(item: dict) -> Tuple[str, str]:
+    """Extract a (question, answer) pair from a chat-style or flat JSONL row."""
+    q, a = "", ""
+    if "messages" in item:
+        q = next((m["content"] for m in item["messages"] if m["role"] == "user"), "")
+        a = next((m["content"] for m in item["messages"] if m["role"] == "assistant"), "")
+    else:
+        q = item.get("question") or item.get("user") or ""
+        a = item.get("answer") or item.get("assistant") or ""
+    return q, a
 
-    for fname in tqdm(jsonl_files, desc="📥 Ingesting policy files"):
-        path = os.path.join(POLICY_FOLDER, fname)
+
+def document_id(source: str, document: str) -> str:
+    """Deterministic content-hash ID, so re-ingesting the same row is a no-op."""
+    return hashlib.sha256(f"{source}\0{document}".encode("utf-8")).hexdigest()
+
+
+def _iter_jsonl(path: str, fname: str) -> Iterator[Tuple[str, str]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            q, a = parse_record(item)
+            if not q and not a:
+                continue
+
+            combined = f"Q: {q}\nA: {a}"
+            yield document_id(fname, combined), combined
+
+
+def _iter_text(path: str, fname: str, chunk_chars: int, overlap: int) -> Iterator[Tuple[str, str]]:
+    markdown = fname.lower().endswith(".md")
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for chunk in iter_text_chunks(f, chunk_chars, overlap, markdown=markdown):
+            yield document_id(fname, chunk), chunk
+
+
+def iter_documents(
+    path: str, chunk_chars: int = CHUNK_CHARS, overlap: int = CHUNK_OVERLAP
+) -> Iterator[Tuple[str, str]]:
+    """Stream (id, document) pairs from a policy file without loading it whole."""
+    fname = os.path.basename(path)
+    if fname.lower().endswith(".jsonl"):
+        return _iter_jsonl(path, fname)
+    return _iter_text(path, fname, chunk_chars, overlap)
+
+
+def parser_signature(fname: str, chunk_chars: int, overlap: int, min_new: int = CHUNK_MIN_NEW) -> str:
+    """Recorded in the manifest, so changing the chunker or its settings re-ingests text files."""
+    if fname.lower().endswith(".jsonl"):
+        return "jsonl"
+    return f"text:v{CHUNKER_VERSION}:{chunk_chars}:{overlap}:{min_new}"
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_manifest(db_path: str = CHROMA_DIR) -> Dict[str, dict]:
+    path = os.path.join(db_path, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    try:
         with open(path, "r", encoding="utf-8") as f:
-            for line in f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        print("⚠️ Ingest manifest unreadable, treating every file as new.")
+        return {}
+
+
+def save_manifest(manifest: Dict[str, dict], db_path: str = CHROMA_DIR) -> None:
+    os.makedirs(db_path, exist_ok=True)
+    path = os.path.join(db_path, MANIFEST_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, path)
+
+
+def _chunks(items: List[str], size: int) -> Iterator[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _max_batch(client, requested: int) -> int:
+    """Respect Chroma's own per-call limit when the client exposes it."""
+    get_max = getattr(client, "get_max_batch_size", None)
+    if get_max is None:
+        return requested
+    try:
+        return max(1, min(requested, int(get_max())))
+    except Exception:
+        return requested
+
+
+def _reset_collection(client, collection, batch_size: int):
+    """Empty the collection: drop and recreate it, or delete every id when only the collection is at hand."""
+    if client is not None:
+        client.delete_collection(name=COLLECTION_NAME)
+        return client.get_or_create_collection(name=COLLECTION_NAME)
+    ids = collection.get(include=[])["ids"]
+    for chunk in _chunks(ids, batch_size):
+        collection.delete(ids=chunk)
+    return collection
+
+
+def _category_tagger(embedder) -> GrievanceClassifier:
+    """Embedding classifier that always returns a ranked label (threshold disabled)."""
+    return GrievanceClassifier(backend="embedding", embedder=embedder, threshold=-1.0, max_batch_size=1)
+
+
+def scan_file(
+    path: str,
+    previous: Optional[dict],
+    chunk_chars: int,
+    overlap: int,
+    emit: Callable[[List[Tuple[str, str, str]]], None],
+    batch_size: int = INGEST_BATCH_SIZE,
+) -> dict:
+    """Parse one file and diff it against its manifest entry.
+
+    New rows are handed to ``emit`` as (id, document, source) batches while
+    the file is streamed. Returns the file's new manifest entry plus the ids
+    to delete and counters for the stats.
+    """
+    start = time.perf_counter()
+    fname = os.path.basename(path)
+    st = os.stat(path)
+    entry = {
+        "mtime": st.st_mtime,
+        "size": st.st_size,
+        "sha256": file_sha256(path),
+        "parser": parser_signature(fname, chunk_chars, overlap),
+    }
+    result = {"entry": entry, "to_delete": [], "added": 0, "rows": 0, "bytes": st.st_size}
+    if (previous and previous.get("sha256") == entry["sha256"]
+            and previous.get("parser", "jsonl") == entry["parser"]):
+        entry["ids"] = previous.get("ids", [])
+        result.update(unchanged=True, parse_s=time.perf_counter() - start)
+        return result
+
+    # Pass 1: cheap hash-only scan to work out the diff against the manifest
+    current_ids = list(dict.fromkeys(doc_id for doc_id, _ in iter_documents(path, chunk_chars, overlap)))
+    old_ids = set(previous.get("ids", [])) if previous else set()
+    to_add = set(current_ids) - old_ids
+    entry["ids"] = current_ids
+    result["to_delete"] = list(old_ids - set(current_ids))
+    result["rows"] = len(current_ids)
+
+    # Pass 2: stream only the new rows out in batches
+    if to_add:
+        pending: List[Tuple[str, str, str]] = []
+        seen = set()
+        for doc_id, doc in iter_documents(path, chunk_chars, overlap):
+            if doc_id not in to_add or doc_id in seen:
+                continue
+            seen.add(doc_id)
+            pending.append((doc_id, doc, fname))
+            if len(pending) >= batch_size:
+                emit(pending)
+                pending = []
+        if pending:
+            emit(pending)
+        result["added"] = len(seen)
+    result.update(unchanged=False, parse_s=time.perf_counter() - start)
+    return result
+
+
+# Set in each parser process by _init_parser
+_batches = None
+
+
+def _init_parser(batches) -> None:
+    global _batches
+    _batches = batches
+
+
+def _scan_in_parser(path: str, previous: Optional[dict], chunk_chars: int, overlap: int, batch_size: int) -> dict:
+    """Pool task: scan_file with batches sent to the embedding stage, then an end-of-file marker."""
+    try:
+        return scan_file(path, previous, chunk_chars, overlap, lambda rows: _batches.put(rows), batch_size)
+    finally:
+        _batches.put(None)
+
+
+class _EmbedStage:
+    """The single embedding stage: encodes rows in large batches and upserts them.
+
+    Each row is tagged with its closest HR category, reusing the same
+    vectors, so retrieval can filter by the classifier's labels.
+    """
+
+    def __init__(self, collection, embedder, batch_size: int):
+        self.collection = collection
+        self.embedder = embedder
+        self.tagger = None
+        self.batch_size = batch_size
+        self.pending: List[Tuple[str, str, str]] = []
+        self.encoded = 0
+        self.encode_s = 0.0
+        self.upsert_s = 0.0
+
+    def add(self, rows: List[Tuple[str, str, str]]) -> None:
+        self.pending.extend(rows)
+        while len(self.pending) >= self.batch_size:
+            self._write(self.pending[:self.batch_size])
+            self.pending = self.pending[self.batch_size:]
+
+    def flush(self) -> None:
+        if self.pending:
+            self._write(self.pending)
+            self.pending = []
+
+    def _write(self, rows: List[Tuple[str, str, str]]) -> None:
+        if self.embedder is None:
+            self.embedder = model_registry.get_embedder(EMBED_MODEL)
+        if self.tagger is None:
+            self.tagger = _category_tagger(self.embedder)
+        docs = [r[1] for r in rows]
+        t0 = time.perf_counter()
+        with model_registry.inference_mode():
+            embeddings = self.embedder.encode(
+                docs,
+                batch_size=ENCODE_BATCH_SIZE,
+                show_progress_bar=False,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            )
+        categories = [preds[0]["label"] if preds else "" for preds in self.tagger.classify_embeddings(embeddings)]
+        t1 = time.perf_counter()
+        self.collection.upsert(
+            ids=[r[0] for r in rows],
+            documents=docs,
+            embeddings=embeddings.tolist(),
+            metadatas=[{"source": r[2], "category": cat} for r, cat in zip(rows, categories)],
+        )
+        self.upsert_s += time.perf_counter() - t1
+        self.encode_s += t1 - t0
+        self.encoded += len(rows)
+
+
+def _scan_parallel(tasks: List[Tuple[str, Optional[dict]]], stage: _EmbedStage, workers: int,
+                   chunk_chars: int, overlap: int, batch_size: int, progress) -> Dict[str, object]:
+    """Parse files across a process pool while the main process encodes what they send.
+
+    Returns {fname: scan result or exception}.
+    """
+    ctx = multiprocessing.get_context("spawn")  # the parent may hold torch threads, which don't survive fork
+    batches = ctx.Queue(maxsize=max(1, INGEST_QUEUE_BATCHES))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_parser, initargs=(batches,)) as pool:
+        futures = {
+            os.path.basename(path): pool.submit(_scan_in_parser, path, previous, chunk_chars, overlap, batch_size)
+            for path, previous in tasks
+        }
+        remaining = len(futures)
+        while remaining:
+            try:
+                rows = batches.get(timeout=1.0)
+            except queue.Empty:
+                # A parser that died hard never sends its marker; its future fails instead
+                if all(f.done() for f in futures.values()):
+                    break
+                continue
+            if rows is None:
+                remaining -= 1
+                progress.update(1)
+            else:
+                stage.add(rows)
+        results = {}
+        for fname, future in futures.items():
+            try:
+                results[fname] = future.result()
+            except Exception as e:
+                results[fname] = e
+    return results
+
+
+def ingest_policies(
+    policy_folder: str = POLICY_FOLDER,
+    db_path: str = CHROMA_DIR,
+    embedder=None,
+    collection=None,
+    rebuild: bool = False,
+    workers: int = INGEST_WORKERS,
+    chunk_chars: int = CHUNK_CHARS,
+    overlap: int = CHUNK_OVERLAP,
+) -> Dict[str, float]:
+    """Incrementally embed every policy file (JSONL, text, Markdown) into ChromaDB.
+
+    Files are parsed, chunked and diffed against the manifest in ``workers``
+    processes; their new rows stream through a bounded queue into a single
+    batched embedding stage here. Unchanged files are skipped, changed files
+    only have their new rows encoded and their vanished rows deleted, and
+    files that disappeared from the folder have all their rows removed.
+    """
+    start = time.perf_counter()
+    stats = {"files_scanned": 0, "files_skipped": 0, "files_failed": 0, "added": 0, "deleted": 0,
+             "purged": 0, "rows_parsed": 0, "bytes_parsed": 0, "parse_s": 0.0}
+
+    client = model_registry.get_chroma_client(db_path) if collection is None else None
+    if collection is None:
+        collection = client.get_or_create_collection(name=COLLECTION_NAME)
+    upsert_batch = _max_batch(client, INGEST_BATCH_SIZE) if client is not None else INGEST_BATCH_SIZE
+
+    manifest = {} if rebuild else load_manifest(db_path)
+    existing = collection.count()
+    if existing and (rebuild or not manifest):
+        # Without a manifest the rows can't be diffed (e.g. a database from before
+        # content-hash IDs), and re-adding them would store every policy twice
+        if not rebuild:
+            print(f"⚠️ {existing} rows but no ingest manifest in {db_path}; rebuilding the collection.")
+        collection = _reset_collection(client, collection, upsert_batch)
+        stats["purged"] = existing
+    policy_files = sorted(f for f in os.listdir(policy_folder) if f.lower().endswith(SUPPORTED_EXTENSIONS))
+    if not policy_files:
+        print(f"⚠️ No policy files ({', '.join(SUPPORTED_EXTENSIONS)}) found in policies folder!")
+
+    # Files that were ingested before but are gone now
+    for fname in [f for f in manifest if f not in policy_files]:
+        stale = manifest.pop(fname).get("ids", [])
+        for chunk in _chunks(stale, upsert_batch):
+            collection.delete(ids=chunk)
+        stats["deleted"] += len(stale)
+
+    # Same mtime, size and chunking: skip without even hashing
+    tasks = []
+    for fname in policy_files:
+        path = os.path.join(policy_folder, fname)
+        st = os.stat(path)
+        stats["files_scanned"] += 1
+        previous = manifest.get(fname)
+        if (previous and previous.get("mtime") == st.st_mtime and previous.get("size") == st.st_size
+                and previous.get("parser", "jsonl") == parser_signature(fname, chunk_chars, overlap)):
+            stats["files_skipped"] += 1
+        else:
+            tasks.append((path, previous))
+
+    stage = _EmbedStage(collection, embedder, upsert_batch)
+    workers = max(1, min(workers, len(tasks)))
+    with tqdm(total=len(tasks), desc=f"📥 Ingesting policy files ({workers} parsers)", unit="file") as progress:
+        if workers > 1:
+            results = _scan_parallel(tasks, stage, workers, chunk_chars, overlap, upsert_batch, progress)
+        else:
+            results = {}
+            for path, previous in tasks:
                 try:
-                    item = json.loads(line.strip())
+                    results[os.path.basename(path)] = scan_file(path, previous, chunk_chars, overlap,
+                                                                stage.add, upsert_batch)
+                except Exception as e:
+                    results[os.path.basename(path)] = e
+                progress.update(1)
+        stage.flush()
+
+    for fname, result in results.items():
+        if isinstance(result, Exception):
+            # Keep the old entry: whatever was upserted is content-addressed, the next run finishes the job
+            print(f"⚠️ Failed to ingest {fname}: {result}")
+            stats["files_failed"] += 1
+            continue
+        for chunk in _chunks(result["to_delete"], upsert_batch):
+            collection.delete(ids=chunk)
+        manifest[fname] = result["entry"]
+        stats["files_skipped"] += int(result["unchanged"])
+        stats["added"] += result["added"]
+        stats["deleted"] += len(result["to_delete"])
+        stats["rows_parsed"] += result["rows"]
+        stats["bytes_parsed"] += result["bytes"]
+        stats["parse_s"] += result["parse_s"]
+
+    # Refresh the memory-mapped matrix ("numpy" backend) and the BM25 index ("hybrid" mode)
+    if (stats["added"] or stats["deleted"] or stats["purged"]
+            or not os.path.exists(os.path.join(db_path, INDEX_MATRIX))
+            or not os.path.exists(os.path.join(db_path, BM25_FILE))):
+        exported = export_index(collection, db_path)
+        print(f"🧮 Exported {exported} vectors to the in-memory index.")
+        if exported:
+            index = NumpyPolicyIndex(db_path)
+            BM25Index.build(index.ids, index.documents).save(db_path)
+            print(f"🔤 Built BM25 index over {exported} documents.")
 
-                    # Handle nested messages or flat question/answer
-                    q, a = "", ""
-                    if "messages" in item:
-                        q = next((m["content"] for m in item["messages"] if m["role"] == "user"), "")
-                        a = next((m["content"] for m in item["messages"] if m["role"] == "assistant"), "")
-                    else:
-                        q = item.get("question") or item.get("user") or ""
-                        a = item.get("answer") or item.get("assistant") or ""
+    save_manifest(manifest, db_path)
+    elapsed = time.perf_counter() - start
+    stats.update(
+        workers=workers,
+        seconds=elapsed,
+        encode_s=stage.encode_s,
+        upsert_s=stage.upsert_s,
+        docs_per_s=stats["added"] / elapsed if elapsed else 0.0,
+        mb_per_s=stats["bytes_parsed"] / 1e6 / elapsed if elapsed else 0.0,
+    )
+    print(
+        f"✅ Ingestion complete! {stats['added']} added, {stats['deleted']} deleted, "
+        f"{stats['files_skipped']}/{stats['files_scanned']} files unchanged"
+        + (f", {stats['files_failed']} failed" if stats["files_failed"] else "") + "."
+    )
+    print(
+        f"⏱️ {elapsed:.1f}s total: parse {stats['parse_s']:.1f}s across {workers} parser(s), "
+        f"encode {stage.encode_s:.1f}s, upsert {stage.upsert_s:.1f}s; "
+        f"{stats['docs_per_s']:.0f} docs/s, {stats['mb_per_s']:.1f} MB/s parsed."
+    )
+    return stats
 
-                    if not q and not a:
-                        continue
 
-                    combined = f"Q: {q}\nA: {a}"
-                    emb = embedder.encode(combined).tolist()
+def build_version(
+    policy_folder: str = POLICY_FOLDER,
+    db_path: str = CHROMA_DIR,
+    rebuild: bool = False,
+    activate: bool = True,
+    keep: int = index_versions.KEEP_VERSIONS,
+    **kwargs,
+) -> Dict[str, object]:
+    """Ingest into a new index snapshot next to the live one, then switch servers to it.
 
-                    collection.add(
-                        ids=[str(uuid.uuid4())],
-                        documents=[combined],
-                        metadatas=[{"source": fname}]
-                    )
-                except json.JSONDecodeError:
-                    continue
+    The snapshot starts as a copy of the active one, so only changed files are
+    re-encoded. Nothing is created when no policy changed (unless ``rebuild``).
+    After activation, running servers pick the snapshot up through their
+    watcher or POST /admin/index/reload, and old snapshots are deleted.
+    """
+    base = index_versions.active_version(db_path)
+    version = index_versions.create_version(db_path, base=None if rebuild else base)
+    path = index_versions.version_path(db_path, version)
+    try:
+        stats = ingest_policies(policy_folder, path, rebuild=rebuild, **kwargs)
+    except BaseException:
+        index_versions.discard_version(db_path, version)
+        raise
+    finally:
+        # Don't keep this process's handle on the snapshot's SQLite file
+        model_registry.release_chroma_client(path)
+
+    unchanged = not (stats["added"] or stats["deleted"] or stats["purged"])
+    if not rebuild and unchanged and base != index_versions.LEGACY_VERSION:
+        index_versions.discard_version(db_path, version)
+        print(f"♻️ No policy changes; version {base} stays active.")
+        return {**stats, "version": base, "activated": False, "removed": []}
+
+    removed = []
+    if activate:
+        index_versions.activate(db_path, version)
+        removed = index_versions.collect_garbage(db_path, keep)
+        print(f"🔀 Activated index version {version}" + (f"; removed {', '.join(removed)}." if removed else "."))
+    else:
+        print(f"📦 Built index version {version}; activate it with POST /admin/index/reload.")
+    return {**stats, "version": version, "activated": activate, "removed": removed}
 
-    print("✅ Ingestion complete!")
 
 if __name__ == "__main__":
-    ingest_jsonl()
+    parser = argparse.ArgumentParser(description="Embed HR policy files (JSONL, .txt, .md) into ChromaDB.")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Build the new version from scratch instead of copying the active one.")
+    parser.add_argument("--folder", default=POLICY_FOLDER, help="Folder holding the policy files.")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS,
+                        help="Parser processes (1 parses in this process).")
+    parser.add_argument("--chunk-chars", type=int, default=CHUNK_CHARS,
+                        help="Target chunk size for text and Markdown files.")
+    parser.add_argument("--chunk-overlap", type=int, default=CHUNK_OVERLAP,
+                        help="Characters repeated between consecutive chunks.")
+    parser.add_argument("--no-activate", action="store_true",
+                        help="Build the new version but leave the current one active.")
+    parser.add_argument("--keep", type=int, default=index_versions.KEEP_VERSIONS,
+                        help="Index versions to keep on disk (at least 2).")
+    args = parser.parse_args()
+
+    build_version(policy_folder=args.folder, rebuild=args.rebuild, activate=not args.no_activate,
+                  keep=args.keep, workers=args.workers, chunk_chars=args.chunk_chars, overlap=args.chunk_overlap)
     print("🎉 All policies embedded into ChromaDB successfully!")
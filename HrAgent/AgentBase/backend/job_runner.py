@@ -0,0 +1,134 @@
+# backend/job_runner.py
+import os
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+from backend import metrics
+from backend.job_store import FINISHED, JOB_LEASE_S, JobStore
+
+# Jobs processed concurrently per server process
+JOB_WORKERS = int(os.getenv("HR_JOB_WORKERS", "4"))
+# How often idle workers check the store for jobs submitted through other processes
+JOB_POLL_S = float(os.getenv("HR_JOB_POLL_S", "0.5"))
+JOB_MAINTENANCE_S = 60.0
+
+
+class JobRunner:
+    """Background asyncio workers that drain the SQLite job queue through the pipeline.
+
+    ``process(grievance)`` returns the result dict to persist. Workers wait
+    for ``is_ready()`` before claiming jobs, so nothing is taken off the queue
+    while models are loading. A running job's lease is renewed until it
+    finishes, and its result is only stored if this runner still holds the
+    claim. Jobs interrupted by shutdown go back to the queue.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        process: Callable[[str], Awaitable[Dict]],
+        is_ready: Callable[[], bool] = lambda: True,
+        workers: int = JOB_WORKERS,
+    ):
+        self.store = store
+        self.process = process
+        self.is_ready = is_ready
+        self.workers = workers
+        self._tasks = []
+        self._wakeup = asyncio.Event()
+        self._waiters: Dict[str, asyncio.Event] = {}
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintenance()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake idle workers after a job was submitted in this process."""
+        self._wakeup.set()
+
+    async def wait(self, job_id: str, timeout_s: float) -> Optional[Dict]:
+        """Long-poll: return the job once finished or when timeout_s elapses."""
+        deadline = time.monotonic() + timeout_s
+        event = self._waiters.setdefault(job_id, asyncio.Event())
+        try:
+            while True:
+                job = await asyncio.to_thread(self.store.get, job_id)
+                remaining = deadline - time.monotonic()
+                if job is None or job["status"] in FINISHED or remaining <= 0:
+                    return job
+                # Woken at once for jobs finished here; jobs run by other processes are polled
+                try:
+                    await asyncio.wait_for(event.wait(), min(remaining, JOB_POLL_S))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters.pop(job_id, None)
+
+    async def _next_job(self) -> Dict:
+        while True:
+            if self.is_ready():
+                job = await asyncio.to_thread(self.store.claim)
+                if job is not None:
+                    return job
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_S)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _heartbeat(self, job: Dict) -> None:
+        """Renew the job's lease until cancelled, so maintain() doesn't hand it to another worker."""
+        while True:
+            await asyncio.sleep(JOB_LEASE_S / 3)
+            try:
+                held = await asyncio.to_thread(self.store.heartbeat, job["id"], job["claim_token"])
+            except Exception as e:
+                print(f"⚠️ Lease renewal for job {job['id']} failed: {e}")
+                continue
+            if not held:
+                print(f"⚠️ Lost the lease on job {job['id']}; its result will be discarded.")
+                return
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._next_job()
+            job_id, token = job["id"], job["claim_token"]
+            metrics.record("job_queue_wait", max(0.0, time.time() - job["created"]))
+            heartbeat = asyncio.create_task(self._heartbeat(job))
+            try:
+                with metrics.stage("job"):
+                    result = await self.process(job["grievance"])
+            except asyncio.CancelledError:
+                await asyncio.shield(asyncio.to_thread(self.store.requeue, job_id, token))
+                raise
+            except Exception as e:
+                print(f"⚠️ Job {job_id} failed: {e}")
+                if await asyncio.to_thread(self.store.fail, job_id, token, str(e)):
+                    metrics.JOBS.labels(status="failed").inc()
+            else:
+                if await asyncio.to_thread(self.store.complete, job_id, token, result):
+                    metrics.JOBS.labels(status="done").inc()
+                else:
+                    print(f"⚠️ Job {job_id} was reclaimed while running; result not stored.")
+            finally:
+                heartbeat.cancel()
+            event = self._waiters.get(job_id)
+            if event is not None:
+                event.set()
+
+    async def _maintenance(self) -> None:
+        while True:
+            try:
+                stats = await asyncio.to_thread(self.store.maintain)
+                if stats["requeued"] or stats["failed"]:
+                    print(f"♻️ Job maintenance: {stats}")
+            except Exception as e:
+                print(f"⚠️ Job maintenance failed: {e}")
+            await asyncio.sleep(JOB_MAINTENANCE_S)
@@ -0,0 +1,210 @@
+# backend/job_store.py
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+# SQLite file holding queued, running and finished analysis jobs (shared by all server workers)
+JOB_DB_PATH = os.getenv("HR_JOB_DB", "./jobs.sqlite3")
+# Most jobs allowed to wait in the queue before POST /jobs is rejected
+JOB_QUEUE_MAX = int(os.getenv("HR_JOB_QUEUE_MAX", "1000"))
+# A claimed job is leased for this many seconds; the runner renews the lease while the
+# job runs, so only jobs whose worker died (no renewal) are requeued by maintain()
+JOB_LEASE_S = float(os.getenv("HR_JOB_LEASE_S", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("HR_JOB_MAX_ATTEMPTS", "3"))
+# Finished jobs are deleted after this many seconds
+JOB_TTL_S = float(os.getenv("HR_JOB_TTL_S", "86400"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    idempotency_key TEXT UNIQUE,
+    request_hash TEXT NOT NULL,
+    grievance TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    lease_until REAL,
+    claim_token TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created);
+"""
+
+
+class QueueFull(Exception):
+    """Raised when JOB_QUEUE_MAX jobs are already waiting."""
+
+
+class IdempotencyConflict(Exception):
+    """Raised when an Idempotency-Key is reused with a different request body."""
+
+
+def request_hash(grievance: str) -> str:
+    return hashlib.sha256(grievance.encode("utf-8")).hexdigest()
+
+
+class JobStore:
+    """Durable job queue and result store on SQLite (WAL mode, safe across processes).
+
+    Methods are blocking but short; call them off the event loop.
+    """
+
+    def __init__(self, path: str = JOB_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            # Databases created before leases were tracked
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("lease_until", "REAL"), ("claim_token", "TEXT")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def submit(self, grievance: str, idempotency_key: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+        """Queue a job; returns (job, created). A known idempotency key returns its existing job."""
+        digest = request_hash(grievance)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if idempotency_key:
+                    row = self._conn.execute(
+                        "SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)
+                    ).fetchone()
+                    if row is not None:
+                        self._conn.execute("COMMIT")
+                        if row["request_hash"] != digest:
+                            raise IdempotencyConflict("Idempotency-Key was already used for a different grievance")
+                        return self._row(row), False
+                queued = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+                if queued >= JOB_QUEUE_MAX:
+                    self._conn.execute("COMMIT")
+                    raise QueueFull(f"{queued} jobs already queued")
+                job_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO jobs (id, idempotency_key, request_hash, grievance, status, created, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, idempotency_key or None, digest, grievance, QUEUED, now, now),
+                )
+                row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._row(row), True
+
+    def claim(self, lease_s: float = JOB_LEASE_S) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest queued job, mark it running and lease it to the caller.
+
+        The returned job carries the ``claim_token`` that heartbeat, complete,
+        fail and requeue must present.
+        """
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, updated = ?, "
+                        "lease_until = ?, claim_token = ? WHERE id = ?",
+                        (RUNNING, now, now + lease_s, token, row["id"]),
+                    )
+                    row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._row(row)
+
+    def heartbeat(self, job_id: str, token: str, lease_s: float = JOB_LEASE_S) -> bool:
+        """Extend a running job's lease; False if the claim was lost (e.g. requeued by maintain)."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = ? AND claim_token = ?",
+                (time.time() + lease_s, job_id, RUNNING, token),
+            ).rowcount == 1
+
+    def _finish(self, job_id: str, token: str, status: str, result: Optional[Dict], error: Optional[str]) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated = ?, lease_until = NULL "
+                "WHERE id = ? AND status = ? AND claim_token = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(),
+                 job_id, RUNNING, token),
+            ).rowcount == 1
+
+    def complete(self, job_id: str, token: str, result: Dict) -> bool:
+        """Store the result, only if the job is still held under ``token``."""
+        return self._finish(job_id, token, DONE, result, None)
+
+    def fail(self, job_id: str, token: str, error: str) -> bool:
+        return self._finish(job_id, token, FAILED, None, error)
+
+    def requeue(self, job_id: str, token: str) -> bool:
+        """Put a running job back in the queue (e.g. its worker is shutting down)."""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET status = ?, updated = ?, lease_until = NULL, claim_token = NULL "
+                "WHERE id = ? AND status = ? AND claim_token = ?",
+                (QUEUED, time.time(), job_id, RUNNING, token),
+            ).rowcount == 1
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._row(self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
+
+    def maintain(self, ttl_s: float = JOB_TTL_S) -> Dict[str, int]:
+        """Requeue jobs whose lease ran out (their worker died), fail those out of attempts, purge old results."""
+        now = time.time()
+        # Leaseless running rows predate lease tracking; fall back to their last update
+        expired = "status = ? AND COALESCE(lease_until, updated + ?) < ?"
+        with self._lock:
+            failed = self._conn.execute(
+                f"UPDATE jobs SET status = ?, error = ?, updated = ?, lease_until = NULL, claim_token = NULL "
+                f"WHERE {expired} AND attempts >= ?",
+                (FAILED, "Worker did not finish the job", now, RUNNING, JOB_LEASE_S, now, JOB_MAX_ATTEMPTS),
+            ).rowcount
+            requeued = self._conn.execute(
+                f"UPDATE jobs SET status = ?, updated = ?, lease_until = NULL, claim_token = NULL WHERE {expired}",
+                (QUEUED, now, RUNNING, JOB_LEASE_S, now),
+            ).rowcount
+            purged = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated < ?", (*FINISHED, now - ttl_s)
+            ).rowcount
+        return {"requeued": requeued, "failed": failed, "purged": purged}
@@ -0,0 +1,363 @@
+# backend/llm_client.py
+import os
+import time
+import random
+import sqlite3
+import asyncio
+import threading
+from typing import Any, Optional
+
+from backend import metrics
+
+# Seconds allowed for one Gemini attempt, and for a whole call including retries
+LLM_TIMEOUT_S = float(os.getenv("HR_LLM_TIMEOUT_S", "20"))
+LLM_DEADLINE_S = float(os.getenv("HR_LLM_DEADLINE_S", "30"))
+# Retries after the first attempt on 429/5xx/timeouts, with full-jitter exponential backoff
+LLM_MAX_RETRIES = int(os.getenv("HR_LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE_S = float(os.getenv("HR_LLM_BACKOFF_BASE_S", "0.5"))
+LLM_BACKOFF_MAX_S = float(os.getenv("HR_LLM_BACKOFF_MAX_S", "8"))
+# Gemini calls in flight per process
+LLM_MAX_CONCURRENCY = int(os.getenv("HR_LLM_MAX_CONCURRENCY", "16"))
+# Requests/second allowed (0 disables), and the burst size
+LLM_RATE_PER_S = float(os.getenv("HR_LLM_RATE_PER_S", "5"))
+LLM_BURST = int(os.getenv("HR_LLM_BURST", "10"))
+# SQLite file holding the token bucket, so the rate is shared by every server process on
+# this host however they were started. Empty gives each process its own full-rate bucket.
+LLM_RATE_DB = os.getenv("HR_LLM_RATE_DB", "./llm_rate.sqlite3")
+# Consecutive upstream failures that open the breaker, and how long it stays open
+BREAKER_FAILURES = int(os.getenv("HR_BREAKER_FAILURES", "5"))
+BREAKER_RESET_S = float(os.getenv("HR_BREAKER_RESET_S", "30"))
+# Connection pool for plain HTTP calls to the Gemini REST API (e.g. /list-models)
+HTTP_POOL_SIZE = int(os.getenv("HR_HTTP_POOL_SIZE", "10"))
+
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class LLMUnavailable(Exception):
+    """Gemini could not be used for this call; ``reason`` labels the fallback metric."""
+
+    def __init__(self, reason: str, message: str = ""):
+        super().__init__(message or reason)
+        self.reason = reason
+
+
+def _status(exc: BaseException) -> Optional[int]:
+    """HTTP status of a google.api_core or requests error, if it carries one."""
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return code
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    return _status(exc) in RETRYABLE_STATUS
+
+
+class TokenBucket:
+    """Thread-safe token bucket; callers reserve a token and sleep for the returned wait."""
+
+    def __init__(self, rate_per_s: float, burst: int):
+        self.rate = rate_per_s
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """Take a token, returning how long to wait for it, or None if that exceeds max_wait."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1.0 - self._tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            self._tokens -= 1.0
+            return wait
+
+
+class SharedTokenBucket(TokenBucket):
+    """TokenBucket whose state lives in SQLite, so all processes on the host draw from one budget.
+
+    Each reserve() is one short IMMEDIATE transaction. The connection is opened
+    lazily and reopened after a fork.
+    """
+
+    def __init__(self, rate_per_s: float, burst: int, path: str = LLM_RATE_DB):
+        super().__init__(rate_per_s, burst)
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bucket "
+                "(id INTEGER PRIMARY KEY CHECK (id = 0), tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Wall-clock time, since monotonic clocks aren't comparable across processes
+                now = time.time()
+                row = conn.execute("SELECT tokens, updated FROM bucket WHERE id = 0").fetchone()
+                tokens = self.capacity
+                if row is not None:
+                    tokens = min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+                wait = max(0.0, (1.0 - tokens) / self.rate)
+                if wait > max_wait:
+                    return None
+                conn.execute(
+                    "INSERT OR REPLACE INTO bucket (id, tokens, updated) VALUES (0, ?, ?)",
+                    (tokens - 1.0, now),
+                )
+                conn.execute("COMMIT")
+                return wait
+            finally:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+
+
+class CircuitBreaker:
+    """Closed → open after N consecutive failures → half-open single probe after a cool-down."""
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES, reset_after_s: float = BREAKER_RESET_S):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_after_s = reset_after_s
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at >= self.reset_after_s:
+                # Let one request through to test the upstream. A probe that never
+                # reports back is replaced after another cool-down.
+                self.state = self.HALF_OPEN
+                self._opened_at = now
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"⚠️ Gemini circuit opened after {self._failures} failures.")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class _SlotStream:
+    """Streamed response that holds its concurrency slot until it is exhausted, fails or is closed."""
+
+    def __init__(self, response: Any, release):
+        self._response = response
+        self._release = release
+        self._iterator = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._iterator is None:
+            self._iterator = self._response.__aiter__()
+        try:
+            return await self._iterator.__anext__()
+        except BaseException:
+            await self.aclose()
+            raise
+
+    async def aclose(self) -> None:
+        release, self._release = self._release, None
+        if release is None:
+            return
+        try:
+            close = getattr(self._iterator, "aclose", None)
+            if close is not None:
+                await close()
+        finally:
+            release()
+
+
+class LLMClient:
+    """Deadline, retry, rate-limit and circuit-breaker policy around GenerativeModel calls.
+
+    Upstream failures (429/5xx/timeouts) count against the breaker; other
+    errors such as invalid requests are raised unchanged and don't. While the
+    breaker is open, calls raise LLMUnavailable("circuit_open") immediately.
+    """
+
+    def __init__(
+        self,
+        timeout_s: float = LLM_TIMEOUT_S,
+        deadline_s: float = LLM_DEADLINE_S,
+        max_retries: int = LLM_MAX_RETRIES,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        limiter: Optional[TokenBucket] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.timeout_s = timeout_s
+        self.deadline_s = deadline_s
+        self.max_retries = max_retries
+        self.max_concurrency = max(1, max_concurrency)
+        if limiter is None:
+            limiter = SharedTokenBucket(LLM_RATE_PER_S, LLM_BURST) if LLM_RATE_DB else TokenBucket(LLM_RATE_PER_S, LLM_BURST)
+        self.limiter = limiter
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        metrics.gauge_callback(metrics.LLM_CIRCUIT_STATE, lambda: self.breaker.state)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(LLM_BACKOFF_MAX_S, LLM_BACKOFF_BASE_S * 2 ** attempt))
+
+    def _admit(self, deadline: float) -> float:
+        """Check the breaker and take a rate-limit token; returns the wait before calling."""
+        if not self.breaker.allow():
+            raise LLMUnavailable("circuit_open", "Gemini circuit breaker is open")
+        wait = self.limiter.reserve(deadline - time.monotonic())
+        if wait is None:
+            raise LLMUnavailable("rate_limited", "Gemini rate limit would exceed the deadline")
+        return wait
+
+    def _on_error(self, exc: BaseException, attempt: int, deadline: float) -> float:
+        """Record a failed attempt and return the backoff before retrying, or raise."""
+        if not is_retryable(exc):
+            # The upstream answered; the request itself was bad
+            self.breaker.record_success()
+            raise exc
+        self.breaker.record_failure()
+        delay = self._backoff(attempt)
+        if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+            reason = "timeout" if isinstance(exc, (asyncio.TimeoutError, TimeoutError)) else "upstream"
+            raise LLMUnavailable(reason, f"Gemini call failed: {exc}") from exc
+        metrics.LLM_RETRIES.labels(status=str(_status(exc) or "timeout")).inc()
+        return delay
+
+    def _attempt_timeout(self, deadline: float) -> float:
+        timeout = min(self.timeout_s, deadline - time.monotonic())
+        if timeout <= 0:
+            raise LLMUnavailable("timeout", "Gemini deadline exceeded")
+        return timeout
+
+    def generate(self, model, prompt: Any, **kwargs) -> Any:
+        """Blocking generate_content with the full policy applied."""
+        deadline = time.monotonic() + self.deadline_s
+        attempt = 0
+        while True:
+            time.sleep(self._admit(deadline))
+            timeout = self._attempt_timeout(deadline)
+            if not self._slots.acquire(timeout=timeout):
+                raise LLMUnavailable("saturated", "Too many Gemini calls in flight")
+            try:
+                response = model.generate_content(prompt, request_options={"timeout": timeout}, **kwargs)
+            except Exception as e:
+                delay = self._on_error(e, attempt, deadline)
+            else:
+                self.breaker.record_success()
+                return response
+            finally:
+                self._slots.release()
+            time.sleep(delay)
+            attempt += 1
+
+    async def generate_async(self, model, prompt: Any, **kwargs) -> Any:
+        """Non-blocking generate_content_async with the full policy applied.
+
+        With stream=True, retries only cover opening the stream; chunk-level
+        failures surface to the caller, which should call record_failure().
+        The stream keeps its concurrency slot until it is exhausted or the
+        caller awaits its aclose().
+        """
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.max_concurrency)
+        deadline = time.monotonic() + self.deadline_s
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._admit(deadline))
+            timeout = self._attempt_timeout(deadline)
+            try:
+                await asyncio.wait_for(self._async_slots.acquire(), timeout)
+            except asyncio.TimeoutError:
+                raise LLMUnavailable("saturated", "Too many Gemini calls in flight")
+            stream = None
+            try:
+                response = await asyncio.wait_for(
+                    model.generate_content_async(prompt, request_options={"timeout": timeout}, **kwargs),
+                    timeout,
+                )
+            except Exception as e:
+                delay = self._on_error(e, attempt, deadline)
+            else:
+                self.breaker.record_success()
+                if not kwargs.get("stream"):
+                    return response
+                stream = _SlotStream(response, self._async_slots.release)
+                return stream
+            finally:
+                if stream is None:
+                    self._async_slots.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def record_failure(self, exc: BaseException) -> None:
+        """Count an error raised outside generate*() (e.g. mid-stream) against the breaker."""
+        if is_retryable(exc):
+            self.breaker.record_failure()
+
+
+_http_session = None
+_http_lock = threading.Lock()
+
+
+def http_session():
+    """Process-wide requests.Session with a keep-alive connection pool and transport retries."""
+    global _http_session
+    if _http_session is None:
+        with _http_lock:
+            if _http_session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                retry = Retry(
+                    total=LLM_MAX_RETRIES,
+                    backoff_factor=LLM_BACKOFF_BASE_S,
+                    status_forcelist=sorted(RETRYABLE_STATUS),
+                    allowed_methods=frozenset({"GET"}),
+                )
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                _http_session = session
+    return _http_session
@@ -1,24 +1,50 @@
 # backend/main.py
 import os
+import asyncio
+import argparse
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
-from backend.classifier_agent import GrievanceClassifier
-from backend.retriever_agent import PolicyRetriever
-from backend.recommender_agent import RecommenderAgent
+from backend.batch_pipeline import BATCH_CHUNK_SIZE, LLM_CONCURRENCY, LLM_RATE_PER_MIN, run_bulk
+
+if TYPE_CHECKING:
+    # Agents are imported when first needed, so --help doesn't pay for them
+    from backend.classifier_agent import GrievanceClassifier
+    from backend.retriever_agent import PolicyRetriever
+    from backend.recommender_agent import RecommenderAgent
 
 # Load environment variables
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env"))
 
+def load_agents():
+    """Create the classifier, retriever and recommender, importing them on first use."""
+    from backend.classifier_agent import GrievanceClassifier
+    from backend.retriever_agent import PolicyRetriever
+    from backend.recommender_agent import RecommenderAgent
+
+    retriever = PolicyRetriever()
+    classifier = GrievanceClassifier(embedder=retriever.embedder, max_batch_size=1)
+    recommender = RecommenderAgent(api_key=os.getenv("GEMINI_API_KEY"))
+    return classifier, retriever, recommender
+
+
 def run_pipeline():
     print("\n🤖 HR Grievance Policy Analyzer — CLI Mode\n")
-    
-    grievance = input("📝 Enter the employee grievance: ").strip()
-    if not grievance:
-        print("⚠️ Grievance cannot be empty. Exiting.")
-        return
 
+    # Models are loaded once and reused for every grievance in this session
+    print("🚀 Loading agents...")
+    classifier, retriever, recommender = load_agents()
+
+    while True:
+        grievance = input("\n📝 Enter the employee grievance (blank to exit): ").strip()
+        if not grievance:
+            print("👋 Exiting.")
+            return
+        analyze(grievance, classifier, retriever, recommender)
+
+
+def analyze(grievance: str, classifier: "GrievanceClassifier", retriever: "PolicyRetriever", recommender: "RecommenderAgent"):
     # Step 1 — Classification
     print("\n🔍 Step 1: Classifying grievance...")
-    classifier = GrievanceClassifier()
     categories = [c["label"] for c in classifier.classify(grievance)]
     if categories:
         print(f"✅ Detected Categories: {', '.join(categories)}")
@@ -27,7 +53,6 @@ def run_pipeline():
 
     # Step 2 — Policy Retrieval
     print("\n📚 Step 2: Retrieving relevant HR policies...")
-    retriever = PolicyRetriever()
     policies = retriever.search_policies(grievance, top_k=3)
     if not policies:
         print("⚠️ No relevant policies found.")
@@ -38,7 +63,6 @@ def run_pipeline():
 
     # Step 3 — Recommendation Generation
     print("\n💡 Step 3: Generating HR recommendation...")
-    recommender = RecommenderAgent(api_key=os.getenv("GEMINI_API_KEY"))
     recommendation = recommender.generate_recommendation(grievance, categories, policies)
 
     print("\n🎯 FINAL RECOMMENDATION:\n")
@@ -46,5 +70,35 @@ def run_pipeline():
     print("\n✅ Process completed successfully.\n")
 
 
+def run_batch(args):
+    print("\n🤖 HR Grievance Policy Analyzer — Batch Mode\n")
+    classifier, retriever, recommender = load_agents()
+
+    processed = asyncio.run(run_bulk(
+        args.input,
+        args.output,
+        classifier,
+        retriever,
+        recommender,
+        chunk_size=args.batch_size,
+        concurrency=args.concurrency,
+        rate_per_min=args.rate,
+    ))
+    print(f"\n🎉 Processed {processed} grievances into {args.output}\n")
+
+
 if __name__ == "__main__":
-    run_pipeline()
+    parser = argparse.ArgumentParser(description="HR Grievance Policy Analyzer")
+    parser.add_argument("--input", help="JSONL/CSV file of grievances (a 'grievance' or 'text' field per row); omit for interactive mode")
+    parser.add_argument("--output", help="JSONL file results are appended to (required with --input)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_CHUNK_SIZE, help="Rows per inference batch and checkpoint")
+    parser.add_argument("--concurrency", type=int, default=LLM_CONCURRENCY, help="Concurrent Gemini calls")
+    parser.add_argument("--rate", type=float, default=LLM_RATE_PER_MIN, help="Max Gemini calls per minute")
+    args = parser.parse_args()
+
+    if args.input:
+        if not args.output:
+            parser.error("--output is required with --input")
+        run_batch(args)
+    else:
+        run_pipeline()
@@ -0,0 +1,140 @@
+# backend/metrics.py
+import os
+import json
+import time
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+# Print one JSON line with the per-stage breakdown of every request
+TRACE_LOG = os.getenv("HR_TRACE_LOG", "0") == "1"
+# Set (before this module is imported) by backend.serve: every worker writes its samples to
+# files in this directory and /metrics aggregates them, whichever worker answers the scrape
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+STAGE_SECONDS = Histogram(
+    "hr_stage_seconds", "Latency of each pipeline stage", ["stage"], buckets=_LATENCY_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "hr_request_seconds", "End-to-end request latency", ["path", "status"], buckets=_LATENCY_BUCKETS
+)
+CLASSIFY_BATCH_SIZE = Histogram(
+    "hr_classify_batch_size", "Grievances per classifier forward batch", buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+FALLBACKS = Counter(
+    "hr_recommender_fallback_total", "Recommendations served by the offline fallback", ["reason"]
+)
+PROMPT_CHARS = Histogram(
+    "hr_prompt_chars", "Characters in the Gemini prompt", buckets=(500, 1000, 2000, 4000, 8000, 16000, 32000)
+)
+LLM_TOKENS = Counter("hr_llm_tokens_total", "Gemini tokens used", ["kind"])
+LLM_REQUEST_TOKENS = Histogram(
+    "hr_llm_request_tokens", "Gemini tokens per request", ["kind"],
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000),
+)
+LLM_RETRIES = Counter("hr_llm_retries_total", "Gemini calls retried after an upstream error", ["status"])
+# multiprocess_mode says how per-worker gauge values combine in multiprocess mode
+LLM_CIRCUIT_STATE = Gauge(
+    "hr_llm_circuit_state", "Gemini circuit breaker (0 closed, 1 half-open, 2 open)", multiprocess_mode="livemax"
+)
+CACHE_LOOKUPS = Counter("hr_cache_lookups_total", "Response cache lookups", ["tier", "result"])
+CACHE_ENTRIES = Gauge("hr_cache_entries", "Entries in the response cache", multiprocess_mode="livesum")
+INFERENCE_PENDING = Gauge("hr_inference_pending", "Pipeline requests in flight", multiprocess_mode="livesum")
+JOBS = Counter("hr_jobs_total", "Analysis jobs finished", ["status"])
+# Every worker reads the same shared queue, so take one value rather than the sum
+JOBS_QUEUED = Gauge("hr_jobs_queued", "Analysis jobs waiting in the job store", multiprocess_mode="livemax")
+CLASSIFIER_QUEUE = Gauge(
+    "hr_classifier_queue_depth", "Grievances waiting for the classifier micro-batcher", multiprocess_mode="livesum"
+)
+
+# Gauges sampled from a callback: at scrape time in a single process; in multiprocess
+# mode refresh_gauges() copies them into the shared files instead (set_function
+# values never leave the process)
+_gauge_callbacks: List[Tuple[Gauge, Callable[[], float]]] = []
+
+# stage name -> milliseconds for the request currently being handled
+_current_trace: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "hr_trace", default=None
+)
+
+
+def start_trace() -> Dict[str, float]:
+    trace: Dict[str, float] = {}
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Dict[str, float]]:
+    return _current_trace.get()
+
+
+def record(stage: str, seconds: float) -> None:
+    """Observe a stage duration in the histogram and the active request trace."""
+    STAGE_SECONDS.labels(stage=stage).observe(seconds)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace[stage] = trace.get(stage, 0.0) + seconds * 1000
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as a named pipeline stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def server_timing(trace: Dict[str, float]) -> str:
+    """Render a trace as a Server-Timing header value."""
+    return ", ".join(f"{name};dur={ms:.1f}" for name, ms in trace.items())
+
+
+def log_trace(path: str, status: int, total_ms: float, trace: Dict[str, float]) -> None:
+    if TRACE_LOG:
+        print(json.dumps({
+            "path": path,
+            "status": status,
+            "total_ms": round(total_ms, 1),
+            "stages": {k: round(v, 1) for k, v in trace.items()},
+        }))
+
+
+def gauge_callback(gauge: Gauge, fn: Callable[[], float]) -> None:
+    """Report fn() as the gauge's value."""
+    if MULTIPROC_DIR:
+        _gauge_callbacks.append((gauge, fn))
+    else:
+        gauge.set_function(fn)
+
+
+def refresh_gauges() -> None:
+    """Multiprocess mode: write the current callback gauge values of this process."""
+    for gauge, fn in _gauge_callbacks:
+        try:
+            gauge.set(fn())
+        except Exception:
+            pass
+
+
+def render_latest():
+    """Prometheus exposition payload and its content type (aggregated over workers in multiprocess mode)."""
+    if not MULTIPROC_DIR:
+        return generate_latest(), CONTENT_TYPE_LATEST
+    refresh_gauges()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop a dead worker's live gauges from the aggregate (its counters and histograms stay)."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,174 @@
+# backend/model_registry.py
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+# Prevent TensorFlow / Flax imports (important for Windows)
+os.environ.setdefault("TRANSFORMERS_NO_TF", "1")
+os.environ.setdefault("TRANSFORMERS_NO_FLAX", "1")
+os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "0")
+
+
+def physical_cores() -> int:
+    """Physical cores this process may run on; hyperthreads add little to torch matmuls."""
+    logical = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    cores = set()
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            package = None
+            for line in f:
+                key, _, value = line.partition(":")
+                key = key.strip()
+                if key == "physical id":
+                    package = value.strip()
+                elif key == "core id":
+                    cores.add((package, value.strip()))
+    except OSError:
+        pass
+    return max(1, min(logical, len(cores)) if cores else logical)
+
+
+# Intra-op threads per torch call. Defaults to the physical cores split across the
+# WEB_CONCURRENCY worker processes; torch's own default (one per logical CPU, per
+# process) oversubscribes the CPU. Set 0 to keep torch's default.
+TORCH_THREADS = int(
+    os.getenv("HR_TORCH_THREADS")
+    or max(1, physical_cores() // max(1, int(os.getenv("WEB_CONCURRENCY", "1"))))
+)
+# "torch" (eager PyTorch) or "onnx" (ONNX Runtime int8, see backend/onnx_backend.py).
+# The onnx backend falls back to torch for any model without exported artifacts.
+INFERENCE_BACKEND = os.getenv("HR_INFERENCE_BACKEND", "torch")
+
+_models: Dict[str, Any] = {}
+_key_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+_torch_configured = False
+
+
+def _get_or_load(key: str, loader: Callable[[], Any]) -> Any:
+    """Load a model at most once per process, even with concurrent first callers."""
+    model = _models.get(key)
+    if model is not None:
+        return model
+    with _registry_lock:
+        lock = _key_locks.setdefault(key, threading.Lock())
+    with lock:
+        model = _models.get(key)
+        if model is None:
+            configure_torch()
+            model = loader()
+            _models[key] = model
+    return model
+
+
+def configure_torch(num_threads: Optional[int] = None) -> None:
+    """Pin torch thread counts and disable autograd once per process."""
+    global _torch_configured
+    if _torch_configured:
+        return
+    import torch
+
+    threads = TORCH_THREADS if num_threads is None else num_threads
+    if threads > 0:
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(max(1, threads // 2))
+        except RuntimeError:
+            # Only allowed before any inter-op work has started
+            pass
+    torch.set_grad_enabled(False)
+    _torch_configured = True
+
+
+@contextmanager
+def inference_mode():
+    """torch.inference_mode() for the current thread (autograd state is thread-local)."""
+    import torch
+
+    with torch.inference_mode():
+        yield
+
+
+def get_embedder(model_name: str):
+    """Shared SentenceTransformer used by the retriever, ingestion and embedding classifier."""
+    def load():
+        if INFERENCE_BACKEND == "onnx":
+            model = _load_onnx("load_embedder", model_name)
+            if model is not None:
+                return model
+        from sentence_transformers import SentenceTransformer
+        print(f"🚀 Loading embedding model ({model_name})...")
+        return SentenceTransformer(model_name)
+
+    return _get_or_load(f"embedder:{model_name}", load)
+
+
+def get_zero_shot_pipeline(model_name: str):
+    """Shared transformers zero-shot-classification pipeline."""
+    def load():
+        if INFERENCE_BACKEND == "onnx":
+            model = _load_onnx("load_zero_shot_pipeline", model_name)
+            if model is not None:
+                return model
+        from transformers import pipeline
+        print(f"🚀 Loading zero-shot classifier model ({model_name})...")
+        return pipeline("zero-shot-classification", model=model_name)
+
+    return _get_or_load(f"zero-shot:{model_name}", load)
+
+
+def _load_onnx(loader: str, model_name: str):
+    """Load an exported ONNX model, or return None so the caller falls back to torch."""
+    try:
+        from backend import onnx_backend
+        model = getattr(onnx_backend, loader)(model_name)
+    except ImportError as e:
+        print(f"⚠️ {e}. Falling back to torch for {model_name}.")
+        return None
+    if model is None:
+        print(f"⚠️ No ONNX artifacts for {model_name}. Falling back to torch.")
+    return model
+
+
+def get_chroma_client(db_path: str):
+    """Shared Chroma PersistentClient per database path."""
+    def load():
+        from chromadb import PersistentClient
+        return PersistentClient(path=db_path)
+
+    return _get_or_load(f"chroma:{os.path.abspath(db_path)}", load)
+
+
+def release_chroma_client(db_path: str) -> None:
+    """Close the client for a database that is no longer served (e.g. an old index version).
+
+    chromadb keeps one System per path in a class-level cache, so dropping our
+    reference alone would keep its SQLite connection and HNSW segments open.
+    Client.close() (chromadb >= 1.5.2) stops the System once its last client
+    is closed.
+    """
+    with _registry_lock:
+        client = _models.pop(f"chroma:{os.path.abspath(db_path)}", None)
+    if client is not None:
+        client.close()
+
+
+def loaded_models() -> List[str]:
+    return sorted(_models)
+
+
+def reset_after_fork() -> None:
+    """Re-initialise per-process state in a forked worker.
+
+    Loaded models stay shared with the parent (copy-on-write); locks are
+    recreated and torch thread settings are applied again for this process.
+    Chroma clients are dropped, since SQLite connections must not cross a fork.
+    """
+    global _registry_lock, _torch_configured
+    _registry_lock = threading.Lock()
+    _key_locks.clear()
+    for key in [k for k in _models if k.startswith("chroma:")]:
+        del _models[key]
+    _torch_configured = False
+    configure_torch()
@@ -0,0 +1,216 @@
+# backend/onnx_backend.py
+"""ONNX Runtime + dynamic int8 inference path for the classifier and embedder.
+
+Models are exported once and cached on disk:
+
+    python -m backend.onnx_backend export          # export + quantize all models
+    python -m backend.onnx_backend check           # parity vs torch, non-zero exit on drift
+
+Serving picks the artifacts up with HR_INFERENCE_BACKEND=onnx; when they
+are missing the model registry falls back to torch. Requires the optional
+`optimum[onnxruntime]` package.
+"""
+import os
+import sys
+import argparse
+from typing import List, Optional, Union
+
+import numpy as np
+
+ONNX_DIR = os.getenv("HR_ONNX_DIR", "./onnx_models")
+QUANTIZED_FILE = "model_quantized.onnx"
+ENCODE_BATCH_SIZE = 64
+
+
+def artifact_dir(model_name: str) -> str:
+    return os.path.join(ONNX_DIR, model_name.replace("/", "__"))
+
+
+def has_artifacts(model_name: str) -> bool:
+    return os.path.exists(os.path.join(artifact_dir(model_name), QUANTIZED_FILE))
+
+
+def _require_optimum():
+    try:
+        import optimum.onnxruntime  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "The ONNX backend needs optimum with onnxruntime: pip install 'optimum[onnxruntime]'"
+        ) from e
+
+
+def export_model(model_name: str, task: str) -> str:
+    """Export a Hugging Face model to ONNX and quantize it to dynamic int8."""
+    _require_optimum()
+    from transformers import AutoTokenizer
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    model_cls = ORTModelForSequenceClassification if task == "nli" else ORTModelForFeatureExtraction
+    if task == "embedding" and "/" not in model_name:
+        # sentence-transformers short names live under this org on the Hub
+        hub_name = f"sentence-transformers/{model_name}"
+    else:
+        hub_name = model_name
+
+    target = artifact_dir(model_name)
+    fp32_dir = os.path.join(target, "fp32")
+    print(f"📦 Exporting {hub_name} to ONNX...")
+    model = model_cls.from_pretrained(hub_name, export=True)
+    model.save_pretrained(fp32_dir)
+    tokenizer = AutoTokenizer.from_pretrained(hub_name)
+    tokenizer.save_pretrained(target)
+
+    print(f"🗜️ Quantizing {model_name} (dynamic int8)...")
+    quantizer = ORTQuantizer.from_pretrained(fp32_dir)
+    qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=target, quantization_config=qconfig)
+    model.config.save_pretrained(target)
+    print(f"✅ Saved {os.path.join(target, QUANTIZED_FILE)}")
+    return target
+
+
+class OnnxSentenceEncoder:
+    """Drop-in for the subset of SentenceTransformer.encode the agents use.
+
+    Mean pooling, plus L2 normalization when ``normalize_embeddings`` is set
+    (as every caller does, matching the unit-length torch output).
+    """
+
+    def __init__(self, model_name: str):
+        _require_optimum()
+        from transformers import AutoTokenizer
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+
+        path = artifact_dir(model_name)
+        self.tokenizer = AutoTokenizer.from_pretrained(path)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(path, file_name=QUANTIZED_FILE)
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = ENCODE_BATCH_SIZE,
+        normalize_embeddings: bool = False,
+        convert_to_numpy: bool = True,
+        show_progress_bar: bool = False,
+        **_,
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = []
+        for i in range(0, len(texts), batch_size):
+            batch = self.tokenizer(
+                texts[i:i + batch_size], padding=True, truncation=True, max_length=256, return_tensors="np"
+            )
+            hidden = self.model(**batch).last_hidden_state
+            hidden = np.asarray(hidden, dtype=np.float32)
+            mask = batch["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            out.append(pooled)
+        vectors = np.concatenate(out) if out else np.zeros((0, 0), dtype=np.float32)
+        if normalize_embeddings:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.clip(norms, 1e-12, None)
+        return vectors[0] if single else vectors
+
+
+def load_embedder(model_name: str) -> Optional[OnnxSentenceEncoder]:
+    if not has_artifacts(model_name):
+        return None
+    print(f"⚡ Loading ONNX int8 embedder ({model_name})...")
+    return OnnxSentenceEncoder(model_name)
+
+
+def load_zero_shot_pipeline(model_name: str):
+    if not has_artifacts(model_name):
+        return None
+    _require_optimum()
+    from transformers import AutoTokenizer, pipeline
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    print(f"⚡ Loading ONNX int8 zero-shot classifier ({model_name})...")
+    path = artifact_dir(model_name)
+    model = ORTModelForSequenceClassification.from_pretrained(path, file_name=QUANTIZED_FILE)
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    return pipeline("zero-shot-classification", model=model, tokenizer=tokenizer)
+
+
+PARITY_SENTENCES = [
+    "I haven't received my salary for two months.",
+    "My manager keeps changing my shift timings and is rude when I ask about it.",
+    "A colleague makes offensive jokes about my religion.",
+    "The fire exit on our floor has been blocked for weeks.",
+    "My leave request was rejected without any reason.",
+]
+
+
+def nli_scores(nli_pipeline, nli_model: str, sentences: List[str]) -> np.ndarray:
+    """(sentence, category) entailment scores through the classifier's serving path."""
+    from backend import model_registry
+    from backend.classifier_agent import CLASSIFIER_BACKENDS, DEFAULT_CATEGORIES, GrievanceClassifier
+
+    backend = next((k for k, v in CLASSIFIER_BACKENDS.items() if v == nli_model and k != "embedding"), "bart-mnli")
+    clf = GrievanceClassifier(backend=backend, threshold=0.0, classifier=nli_pipeline, max_batch_size=1)
+    labels = tuple(DEFAULT_CATEGORIES)
+    # Under inference mode, as the classifier's batch runner calls it
+    with model_registry.inference_mode():
+        rows = clf._run_nli_batch(labels, list(sentences))
+    return np.array([[{p["label"]: p["score"] for p in row}[label] for label in labels] for row in rows])
+
+
+def check_parity(embed_model: str, nli_model: str, embed_min_cosine: float, score_tolerance: float) -> bool:
+    """Compare ONNX int8 outputs against torch; True when within tolerance."""
+    from sentence_transformers import SentenceTransformer
+    from transformers import pipeline
+
+    ok = True
+    onnx_embedder = load_embedder(embed_model)
+    if onnx_embedder is None:
+        print(f"⚠️ No ONNX artifacts for {embed_model}; run `export` first.")
+        ok = False
+    else:
+        ref = SentenceTransformer(embed_model).encode(PARITY_SENTENCES, normalize_embeddings=True)
+        got = onnx_embedder.encode(PARITY_SENTENCES, normalize_embeddings=True)
+        cosines = (ref * got).sum(axis=1)
+        print(f"🔎 {embed_model}: min cosine vs torch = {cosines.min():.4f} (need ≥ {embed_min_cosine})")
+        ok &= bool(cosines.min() >= embed_min_cosine)
+
+    onnx_nli = load_zero_shot_pipeline(nli_model)
+    if onnx_nli is None:
+        print(f"⚠️ No ONNX artifacts for {nli_model}; run `export` first.")
+        ok = False
+    else:
+        # Scored the way the server does: precomputed hypothesis ids and padded batches
+        torch_nli = pipeline("zero-shot-classification", model=nli_model)
+        ref = nli_scores(torch_nli, nli_model, PARITY_SENTENCES)
+        got = nli_scores(onnx_nli, nli_model, PARITY_SENTENCES)
+        worst = float(np.abs(ref - got).max())
+        print(f"🔎 {nli_model}: max |score diff| vs torch = {worst:.4f} (need ≤ {score_tolerance})")
+        ok &= worst <= score_tolerance
+
+    return ok
+
+
+if __name__ == "__main__":
+    from backend.classifier_agent import CLASSIFIER_BACKENDS
+    from backend.retriever_agent import EMBED_MODEL
+
+    parser = argparse.ArgumentParser(description="Export, quantize and verify ONNX models.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="Export and int8-quantize models into HR_ONNX_DIR")
+    exp.add_argument("--nli-models", nargs="+",
+                     default=[CLASSIFIER_BACKENDS["bart-mnli"], CLASSIFIER_BACKENDS["distilbart-mnli"]])
+    chk = sub.add_parser("check", help="Parity check ONNX int8 against torch")
+    chk.add_argument("--nli-model", default=CLASSIFIER_BACKENDS["bart-mnli"])
+    chk.add_argument("--min-cosine", type=float, default=0.99)
+    chk.add_argument("--tolerance", type=float, default=0.05)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_model(EMBED_MODEL, "embedding")
+        for name in args.nli_models:
+            export_model(name, "nli")
+    else:
+        passed = check_parity(EMBED_MODEL, args.nli_model, args.min_cosine, args.tolerance)
+        print("✅ Parity OK" if passed else "❌ Parity check failed")
+        sys.exit(0 if passed else 1)
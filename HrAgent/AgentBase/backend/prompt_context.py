@@ -0,0 +1,75 @@
+# backend/prompt_context.py
+"""Token-budgeted policy context for the Gemini prompt.
+
+Token counts are estimated locally (about four characters per token for
+English text) rather than with a count_tokens round trip, so budgeting adds
+no latency to a request.
+"""
+import os
+import re
+from typing import Dict, List
+
+# Tokens of policy text allowed in one prompt, and the cap for any one snippet
+POLICY_TOKEN_BUDGET = int(os.getenv("HR_PROMPT_POLICY_TOKENS", "1200"))
+SNIPPET_TOKEN_BUDGET = int(os.getenv("HR_PROMPT_SNIPPET_TOKENS", "400"))
+# Don't bother appending a snippet that would be trimmed below this many tokens
+MIN_SNIPPET_TOKENS = 40
+CHARS_PER_TOKEN = 4
+
+NO_POLICIES = "No relevant policies found."
+
+# Sent once as the model's system instruction instead of in every prompt
+SYSTEM_INSTRUCTION = (
+    "You are an experienced HR policy assistant. You receive an employee grievance, "
+    "the grievance categories detected for it, and excerpts of relevant HR policies. "
+    "Suggest clear HR next steps or actions. Reference policies where possible, and "
+    "keep your tone formal, brief, and practical."
+)
+
+_WS = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _trim(text: str, max_tokens: int) -> str:
+    """Cut text to about max_tokens, at a sentence or word boundary where possible."""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    sentence_end = max(cut.rfind(". "), cut.rfind("? "), cut.rfind("! "))
+    if sentence_end >= limit // 2:
+        return cut[:sentence_end + 1]
+    space = cut.rfind(" ")
+    return (cut[:space] if space > 0 else cut) + " …"
+
+
+def build_policy_context(
+    policies: List[Dict[str, str]],
+    budget: int = POLICY_TOKEN_BUDGET,
+    snippet_budget: int = SNIPPET_TOKEN_BUDGET,
+) -> str:
+    """Join policy snippets, best first, dropping duplicates and staying within budget.
+
+    A snippet is a duplicate when its normalized text equals, or is contained
+    in, one already kept. Snippets longer than snippet_budget are trimmed,
+    and the last one is trimmed to whatever budget remains.
+    """
+    kept: List[str] = []
+    seen: List[str] = []
+    remaining = budget
+    for policy in policies or []:
+        text = _WS.sub(" ", policy.get("policy_text") or "").strip()
+        key = text.lower()
+        if not key or any(key in s for s in seen):
+            continue
+        allowed = min(snippet_budget, remaining)
+        if allowed < MIN_SNIPPET_TOKENS:
+            break
+        snippet = _trim(text, allowed)
+        kept.append(snippet)
+        seen.append(key)
+        remaining -= estimate_tokens(snippet)
+    return "\n\n".join(kept) if kept else NO_POLICIES
@@ -1,40 +1,69 @@
 import os
-import google.generativeai as genai
-from typing import List, Dict, Optional
+import time
+import threading
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from dotenv import load_dotenv
+from backend import gemini_stub, metrics
+from backend.llm_client import LLMClient, LLMUnavailable
+from backend.prompt_context import SYSTEM_INSTRUCTION, build_policy_context
 
 # Load environment variables
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env"))
 
-# --- We will use the genai library directly ---
-# Configure the library at the module level
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    print("🤖 Google GenAI library configured successfully!")
-else:
-    print("⚠️ GEMINI_API_KEY not found. Recommender will run in fallback mode.")
+
+_genai_lock = threading.Lock()
+_genai_key: Optional[str] = None
+
+
+def _genai(api_key: str):
+    """Import and configure google.generativeai on first use, not at module import."""
+    global _genai_key
+    import google.generativeai as genai
+
+    with _genai_lock:
+        if _genai_key != api_key:
+            genai.configure(api_key=api_key)
+            _genai_key = api_key
+            print("🤖 Google GenAI library configured successfully!")
+    return genai
 
 class RecommenderAgent:
     """Generates HR action recommendations using the Google GenAI Python SDK."""
 
-    def __init__(self, api_key: Optional[str] = None):
-        
+    def __init__(self, api_key: Optional[str] = None, client: Optional[LLMClient] = None):
+        # Timeouts, retries, rate limiting and circuit breaking for every Gemini call
+        self.client = client or LLMClient()
+
         # ✅ *** FINAL FIX ***
         # We are now using a model name that is confirmed to be in your key's access list.
         self.model_name = "models/gemini-2.5-flash-preview-09-2025"
         
         # Only initialize the model if the key exists
-        if GEMINI_API_KEY:
+        api_key = api_key or GEMINI_API_KEY
+        if gemini_stub.STUB_ENABLED:
+            self.model = gemini_stub.StubGenerativeModel(self.model_name)
+            print(f"🧪 Using offline Gemini stub ({gemini_stub.STUB_LATENCY_MS:.0f} ms latency).")
+        elif api_key:
             try:
-                self.model = genai.GenerativeModel(self.model_name)
+                self.model = self._load_model(_genai(api_key))
                 print(f"✅ Model '{self.model_name}' loaded.")
             except Exception as e:
                 print(f"⚠️ Could not load model '{self.model_name}'. Recommender may use fallback. Error: {e}")
                 self.model = None
         else:
+            print("⚠️ GEMINI_API_KEY not found. Recommender will run in fallback mode.")
             self.model = None
 
+    def _load_model(self, genai):
+        """GenerativeModel carrying the static instructions.
+
+        The instruction is far below the minimum size for explicit context
+        caching; Gemini's implicit prefix caching still applies, and the
+        cached token counts it reports are recorded by _record_usage.
+        """
+        return genai.GenerativeModel(self.model_name, system_instruction=SYSTEM_INSTRUCTION)
+
     def generate_recommendation(
         self,
         grievance: str,
@@ -46,39 +75,159 @@ class RecommenderAgent:
         # If no model or API key, use the local fallback
         if not self.model:
             print("💡 No model loaded. Using offline fallback.")
-            return self.fallback(grievance, categories)
+            return self._fallback(grievance, categories, "no_model")
 
-        policy_context = "\n\n".join([p["policy_text"] for p in policies]) if policies else "No relevant policies found."
+        prompt = self.build_prompt(grievance, categories, policies)
 
-        prompt = f"""
-        You are an experienced HR policy assistant.
-        An employee has raised the following grievance:
+        try:
+            # --- This is the new, cleaner way to call the API ---
+            with metrics.stage("llm"):
+                response = self.client.generate(self.model, prompt)
+            return self._response_text(response)
 
-        "{grievance}"
+        except LLMUnavailable as e:
+            print(f"⚠️ Gemini unavailable: {e}")
+            return self._fallback(grievance, categories, e.reason)
+        except Exception as e:
+            print(f"⚠️ Gemini SDK error: {e}")
+            # If the API call fails, use the local fallback
+            return self._fallback(grievance, categories, "error")
 
-        The detected categories are: {', '.join(categories)}.
+    async def generate_recommendation_async(
+        self,
+        grievance: str,
+        categories: List[str],
+        policies: List[Dict[str, str]]
+    ) -> str:
+        """Async variant of generate_recommendation using the SDK's non-blocking API."""
+        text, _ = await self.generate_with_source_async(grievance, categories, policies)
+        return text
 
-        Relevant HR policies:
-        {policy_context}
+    async def generate_with_source_async(
+        self,
+        grievance: str,
+        categories: List[str],
+        policies: List[Dict[str, str]]
+    ) -> Tuple[str, str]:
+        """Like generate_recommendation_async, but also reports "gemini" or "fallback" as the source."""
+        if not self.model:
+            print("💡 No model loaded. Using offline fallback.")
+            return self._fallback(grievance, categories, "no_model"), "fallback"
 
-        Based on the above, suggest clear HR next steps or actions.
-        Reference policies where possible, and keep your tone formal, brief, and practical.
-        """
+        prompt = self.build_prompt(grievance, categories, policies)
 
         try:
-            # --- This is the new, cleaner way to call the API ---
-            response = self.model.generate_content(prompt)
-            
-            # Check for safety ratings or other blocks
-            if not response.candidates:
-                return "⚠️ The model's response was blocked, possibly due to safety settings."
+            with metrics.stage("llm"):
+                response = await self.client.generate_async(self.model, prompt)
+            return self._response_text(response), "gemini"
 
-            return response.text
+        except LLMUnavailable as e:
+            print(f"⚠️ Gemini unavailable: {e}")
+            return self._fallback(grievance, categories, e.reason), "fallback"
+        except Exception as e:
+            print(f"⚠️ Gemini SDK error: {e}")
+            return self._fallback(grievance, categories, "error"), "fallback"
 
+    async def stream_recommendation_async(
+        self,
+        grievance: str,
+        categories: List[str],
+        policies: List[Dict[str, str]]
+    ) -> AsyncIterator[str]:
+        """Yield the recommendation chunk by chunk from Gemini's streaming API."""
+        if not self.model:
+            print("💡 No model loaded. Using offline fallback.")
+            yield self._fallback(grievance, categories, "no_model")
+            return
+
+        prompt = self.build_prompt(grievance, categories, policies)
+        emitted = False
+        last_chunk = None
+        response = None
+        start = time.perf_counter()
+        try:
+            response = await self.client.generate_async(self.model, prompt, stream=True)
+            async for chunk in response:
+                last_chunk = chunk
+                if not chunk.candidates:
+                    continue
+                text = chunk.text
+                if text:
+                    if not emitted:
+                        metrics.record("llm_first_token", time.perf_counter() - start)
+                    emitted = True
+                    yield text
+
+            if not emitted:
+                metrics.FALLBACKS.labels(reason="blocked").inc()
+                yield "⚠️ The model's response was blocked, possibly due to safety settings."
+
+        except LLMUnavailable as e:
+            print(f"⚠️ Gemini unavailable: {e}")
+            yield self._fallback(grievance, categories, e.reason)
         except Exception as e:
             print(f"⚠️ Gemini SDK error: {e}")
-            # If the API call fails, use the local fallback
-            return self.fallback(grievance, categories)
+            self.client.record_failure(e)
+            if emitted:
+                yield "\n\n⚠️ The response was interrupted."
+            else:
+                yield self._fallback(grievance, categories, "error")
+        finally:
+            if response is not None:
+                # Frees the Gemini slot even when the client disconnected mid-stream
+                await response.aclose()
+            metrics.record("llm", time.perf_counter() - start)
+            if last_chunk is not None:
+                self._record_usage(last_chunk)
+
+    def build_prompt(
+        self,
+        grievance: str,
+        categories: List[str],
+        policies: List[Dict[str, str]]
+    ) -> str:
+        """Assemble the per-request part of the Gemini prompt.
+
+        The standing instructions live in the model's system instruction; the
+        policy context is deduplicated and trimmed to the token budget.
+        """
+        policy_context = build_policy_context(policies)
+
+        prompt = (
+            f'Grievance:\n"{grievance}"\n\n'
+            f"Detected categories: {', '.join(categories)}.\n\n"
+            f"Relevant HR policies:\n{policy_context}"
+        )
+        metrics.PROMPT_CHARS.observe(len(prompt))
+        return prompt
+
+    def _response_text(self, response) -> str:
+        self._record_usage(response)
+        # Check for safety ratings or other blocks
+        if not response.candidates:
+            metrics.FALLBACKS.labels(reason="blocked").inc()
+            return "⚠️ The model's response was blocked, possibly due to safety settings."
+        return response.text
+
+    @staticmethod
+    def _record_usage(response) -> None:
+        """Count prompt/output tokens from the response's usage metadata, when present."""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        counts = {
+            "prompt": getattr(usage, "prompt_token_count", 0) or 0,
+            "output": getattr(usage, "candidates_token_count", 0) or 0,
+            "cached": getattr(usage, "cached_content_token_count", 0) or 0,
+        }
+        for kind, tokens in counts.items():
+            metrics.LLM_TOKENS.labels(kind=kind).inc(tokens)
+            if kind != "cached" or tokens:
+                metrics.LLM_REQUEST_TOKENS.labels(kind=kind).observe(tokens)
+
+    def _fallback(self, grievance: str, categories: List[str], reason: str) -> str:
+        metrics.FALLBACKS.labels(reason=reason).inc()
+        return self.fallback(grievance, categories)
 
     def fallback(self, grievance: str, categories: List[str]) -> str:
         """Offline fallback if Gemini API is unavailable."""
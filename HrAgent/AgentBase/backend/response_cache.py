@@ -0,0 +1,197 @@
+# backend/response_cache.py
+import os
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from backend import metrics
+
+# Cache config
+CACHE_MAX_SIZE = int(os.getenv("HR_CACHE_SIZE", "1000"))
+CACHE_TTL_S = float(os.getenv("HR_CACHE_TTL_S", "3600"))
+# Cosine similarity above which two grievances share a cached answer
+CACHE_SIMILARITY = float(os.getenv("HR_CACHE_SIMILARITY", "0.92"))
+# Optional JSON file the cache is loaded from at startup and saved to at shutdown
+CACHE_PATH = os.getenv("HR_CACHE_PATH", "")
+
+_PUNCT = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive key for the exact tier."""
+    return _SPACES.sub(" ", _PUNCT.sub(" ", text.lower())).strip()
+
+
+class ResponseCache:
+    """Two-tier (exact + semantic) LRU/TTL cache for /analyze responses.
+
+    Entries are tagged with the policy index version they were computed
+    against; a version change clears the cache so stale policies are never
+    served.
+    """
+
+    def __init__(
+        self,
+        max_size: int = CACHE_MAX_SIZE,
+        ttl_s: float = CACHE_TTL_S,
+        similarity: float = CACHE_SIMILARITY,
+        persist_path: str = CACHE_PATH,
+    ):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self.similarity = similarity
+        self.persist_path = persist_path
+        self.version: Optional[str] = None
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+        # key -> {"embedding": np.ndarray, "response": dict, "created": float}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[str] = []
+        self._lock = threading.Lock()
+
+    # ---------- lookups ----------
+
+    def get_exact(self, text: str, version: str) -> Optional[dict]:
+        with self._lock:
+            self._check_version(version)
+            entry = self._live_entry(normalize_text(text))
+            if entry is None:
+                metrics.CACHE_LOOKUPS.labels(tier="exact", result="miss").inc()
+                return None
+            self.stats["exact_hits"] += 1
+            metrics.CACHE_LOOKUPS.labels(tier="exact", result="hit").inc()
+            return entry["response"]
+
+    def get_semantic(self, embedding: List[float], version: str) -> Optional[dict]:
+        """Return the closest cached response above the similarity threshold, if any."""
+        with self._lock:
+            self._check_version(version)
+            if not self._entries:
+                self.stats["misses"] += 1
+                metrics.CACHE_LOOKUPS.labels(tier="semantic", result="miss").inc()
+                return None
+            if self._matrix is None:
+                self._matrix_keys = list(self._entries)
+                self._matrix = np.stack([self._entries[k]["embedding"] for k in self._matrix_keys])
+
+            query = self._unit(embedding)
+            scores = self._matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] >= self.similarity:
+                entry = self._live_entry(self._matrix_keys[best])
+                if entry is not None:
+                    self.stats["semantic_hits"] += 1
+                    metrics.CACHE_LOOKUPS.labels(tier="semantic", result="hit").inc()
+                    return entry["response"]
+            self.stats["misses"] += 1
+            metrics.CACHE_LOOKUPS.labels(tier="semantic", result="miss").inc()
+            return None
+
+    def put(self, text: str, embedding: List[float], response: dict, version: str) -> None:
+        with self._lock:
+            self._check_version(version)
+            key = normalize_text(text)
+            self._entries[key] = {
+                "embedding": self._unit(embedding),
+                "response": response,
+                "created": time.time(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+            self._matrix = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self.stats["invalidations"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["exact_hits"] + self.stats["semantic_hits"] + self.stats["misses"]
+            hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+            return {
+                **self.stats,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "version": self.version,
+            }
+
+    # ---------- persistence ----------
+
+    def load(self) -> None:
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Could not load response cache: {e}")
+            return
+        with self._lock:
+            self.version = data.get("version")
+            for key, entry in data.get("entries", []):
+                self._entries[key] = {
+                    "embedding": np.asarray(entry["embedding"], dtype=np.float32),
+                    "response": entry["response"],
+                    "created": entry["created"],
+                }
+            self._matrix = None
+        print(f"✅ Loaded {len(self._entries)} cached responses.")
+
+    def save(self) -> None:
+        if not self.persist_path:
+            return
+        with self._lock:
+            data = {
+                "version": self.version,
+                "entries": [
+                    [key, {"embedding": e["embedding"].tolist(), "response": e["response"], "created": e["created"]}]
+                    for key, e in self._entries.items()
+                ],
+            }
+        # Per-process temp file: several server workers may save on shutdown at once
+        tmp = f"{self.persist_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.persist_path)
+
+    # ---------- internals (call with the lock held) ----------
+
+    def _check_version(self, version: str) -> None:
+        if version != self.version:
+            if self._entries:
+                self._entries.clear()
+                self._matrix = None
+                self.stats["invalidations"] += 1
+            self.version = version
+
+    def _live_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl_s and time.time() - entry["created"] > self.ttl_s:
+            del self._entries[key]
+            self._matrix = None
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
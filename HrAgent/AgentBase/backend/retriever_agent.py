@@ -1,8 +1,13 @@
 # backend/retriever_agent.py
 import os
-from typing import List, Dict
-from chromadb import PersistentClient
-from sentence_transformers import SentenceTransformer
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Dict, Optional, Sequence
+import numpy as np
+from backend import index_versions, metrics, model_registry
+from backend.bm25_index import BM25Index
+from backend.hybrid_search import mmr_select, rrf_fuse
+from backend.vector_index import NumpyPolicyIndex
 
 # Prevent TensorFlow / Flax imports (important for Windows)
 os.environ.setdefault("TRANSFORMERS_NO_TF", "1")
@@ -13,35 +18,255 @@ os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "0")
 CHROMA_DIR = "./chroma_db"
 EMBED_MODEL = "all-MiniLM-L6-v2"
 COLLECTION_NAME = "hr_policies"
+MANIFEST_NAME = "ingest_manifest.json"
+# "chroma" queries the persistent collection; "numpy" answers from the
+# memory-mapped matrix that ingestion exports next to it.
+RETRIEVER_BACKEND = os.getenv("HR_RETRIEVER_BACKEND", "chroma")
+# "vector" is pure MiniLM similarity; "hybrid" fuses it with BM25 (RRF) and
+# diversifies the fused list with MMR, collapsing near-duplicate answers.
+RETRIEVER_MODE = os.getenv("HR_RETRIEVER_MODE", "vector")
+HYBRID_CANDIDATES = int(os.getenv("HR_HYBRID_CANDIDATES", "20"))
+MMR_LAMBDA = float(os.getenv("HR_MMR_LAMBDA", "0.7"))
+DUPLICATE_THRESHOLD = float(os.getenv("HR_DUPLICATE_THRESHOLD", "0.92"))
+# Restrict retrieval to policies tagged with the grievance's predicted categories
+CATEGORY_FILTER = os.getenv("HR_CATEGORY_FILTER", "0") == "1"
 
 class PolicyRetriever:
-    """Retrieves relevant HR policy sections from ChromaDB given a grievance."""
+    """Retrieves relevant HR policy sections from ChromaDB given a grievance.
 
-    def __init__(self, db_path: str = CHROMA_DIR, embed_model: str = EMBED_MODEL):
+    An instance serves one index version (the active one by default). To pick
+    up a new version, build a fresh retriever and swap it in; in-flight
+    searches finish on the old one, which is closed once no lease is left.
+    """
+
+    def __init__(
+        self,
+        db_path: str = CHROMA_DIR,
+        embed_model: str = EMBED_MODEL,
+        backend: str = RETRIEVER_BACKEND,
+        mode: str = RETRIEVER_MODE,
+        category_filter: bool = CATEGORY_FILTER,
+        version: Optional[str] = None,
+    ):
+        if backend not in ("chroma", "numpy"):
+            raise ValueError(f"Unknown retriever backend '{backend}'. Choose 'chroma' or 'numpy'.")
+        if mode not in ("vector", "hybrid"):
+            raise ValueError(f"Unknown retriever mode '{mode}'. Choose 'vector' or 'hybrid'.")
         print("🚀 Loading embedding model for retrieval...")
-        self.embedder = SentenceTransformer(embed_model)
-        self.client = PersistentClient(path=db_path)
+        self.embedder = model_registry.get_embedder(embed_model)
+        self.root_path = db_path
+        self._leases = 0
+        self._lease_lock = threading.Lock()
+        self.version = version or index_versions.active_version(db_path)
+        self.db_path = db_path = index_versions.version_path(db_path, self.version)
+        self.client = model_registry.get_chroma_client(db_path)
         self.collection = self.client.get_or_create_collection(name=COLLECTION_NAME)
-        print("✅ Connected to ChromaDB successfully!")
-
-    def search_policies(self, query: str, top_k: int = 5) -> List[Dict[str, str]]:
-        """Search the Chroma collection for top_k matching policy entries."""
-        query_embedding = self.embedder.encode(query).tolist()
-
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k
-        )
-
-        policies = []
-        for doc, meta in zip(results["documents"][0], results["metadatas"][0]):
-            policies.append({
-                "policy_text": doc,
-                "source": meta.get("source", "unknown"),
-                "type": meta.get("type", "")
-            })
-
-        return policies
+        print(f"✅ Connected to ChromaDB successfully (index version {self.version})!")
+
+        self.backend = backend
+        self.mode = mode
+        self.category_filter = category_filter
+        self.index: Optional[NumpyPolicyIndex] = None
+        self.bm25: Optional[BM25Index] = None
+
+        # The exported index doubles as the document store for hybrid mode
+        if backend == "numpy" or mode == "hybrid":
+            try:
+                self.index = NumpyPolicyIndex(db_path)
+                print(f"✅ Loaded in-memory policy index ({len(self.index)} vectors).")
+            except FileNotFoundError as e:
+                print(f"⚠️ {e} Falling back to Chroma vector search.")
+                self.backend, self.mode = "chroma", "vector"
+        if self.mode == "hybrid":
+            try:
+                self.bm25 = BM25Index.load(db_path)
+                print(f"✅ Loaded BM25 index ({len(self.bm25)} documents).")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ No BM25 index ({e}). Falling back to vector search.")
+                self.mode = "vector"
+
+    @contextmanager
+    def lease(self) -> Iterator["PolicyRetriever"]:
+        """Mark the retriever in use for the duration of a request."""
+        with self._lease_lock:
+            self._leases += 1
+        try:
+            yield self
+        finally:
+            with self._lease_lock:
+                self._leases -= 1
+
+    @property
+    def in_use(self) -> int:
+        return self._leases
+
+    def close(self) -> None:
+        """Release this version's Chroma client (SQLite handles, HNSW segments)."""
+        model_registry.release_chroma_client(self.db_path)
+
+    def warmup(self) -> None:
+        """Run a dummy encode and search so the first real request doesn't pay for lazy init.
+
+        The search loads the HNSW segment and pages in the exported matrix.
+        """
+        with model_registry.inference_mode():
+            self.embedder.encode("warm-up")
+        if self.collection.count():
+            self.search_policies("warm-up", top_k=1)
+
+    def encode_query(self, query: str) -> List[float]:
+        """Embed a grievance with the retrieval model (normalized, so it doubles as a cache key)."""
+        with metrics.stage("embed"), model_registry.inference_mode():
+            return self.embedder.encode(query, normalize_embeddings=True).tolist()
+
+    def search_policies(
+        self,
+        query: str,
+        top_k: int = 5,
+        query_embedding: Optional[List[float]] = None,
+        categories: Optional[List[str]] = None,
+    ) -> List[Dict[str, str]]:
+        """Search the policy index for top_k matching policy entries.
+
+        categories only narrows the search when category filtering is enabled.
+        """
+        if query_embedding is None:
+            query_embedding = self.encode_query(query)
+        return self.search_policies_batch(
+            [query], top_k, [query_embedding], [categories] if categories else None
+        )[0]
+
+    def search_policies_batch(
+        self,
+        queries: List[str],
+        top_k: int = 5,
+        query_embeddings: Optional[List[List[float]]] = None,
+        categories: Optional[List[List[str]]] = None,
+    ) -> List[List[Dict[str, str]]]:
+        """Batched search_policies: one encode call and one index query for all queries."""
+        if not queries:
+            return []
+        if query_embeddings is None:
+            with metrics.stage("embed"), model_registry.inference_mode():
+                query_embeddings = self.embedder.encode(
+                    queries, normalize_embeddings=True, show_progress_bar=False
+                ).tolist()
+
+        if not self.category_filter:
+            categories = None
+
+        if self.mode == "hybrid":
+            return [
+                self._hybrid_search(query, emb, top_k, categories[i] if categories else None)
+                for i, (query, emb) in enumerate(zip(queries, query_embeddings))
+            ]
+
+        results = self._vector_query(query_embeddings, top_k, categories)
+        return [
+            [self._policy(doc, meta) for doc, meta in zip(docs, metas)]
+            for docs, metas in zip(results["documents"], results["metadatas"])
+        ]
+
+    @staticmethod
+    def _policy(doc: str, meta: Optional[Dict]) -> Dict[str, str]:
+        meta = meta or {}
+        return {
+            "policy_text": doc,
+            "source": meta.get("source", "unknown"),
+            "type": meta.get("type", ""),
+            "category": meta.get("category", ""),
+        }
+
+    def _raw_query(self, query_embeddings: List[List[float]], n: int, categories: Optional[Sequence[str]]) -> Dict:
+        with metrics.stage("vector_query"):
+            if self.backend == "numpy":
+                return self.index.query(query_embeddings, n, categories)
+            where = {"category": {"$in": list(categories)}} if categories else None
+            return self.collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n,
+                where=where,
+            )
+
+    def _vector_query(
+        self,
+        query_embeddings: List[List[float]],
+        n: int,
+        categories: Optional[List[List[str]]] = None,
+    ) -> Dict[str, List[List]]:
+        """Top-n vector hits, optionally per-query category filtered.
+
+        A filtered query that finds fewer than n hits is topped up from the
+        unfiltered results, so rows ingested without a category still surface.
+        """
+        if not categories:
+            return self._raw_query(query_embeddings, n, None)
+
+        merged: Dict[str, List[List]] = {"ids": [], "documents": [], "metadatas": []}
+        for emb, cats in zip(query_embeddings, categories):
+            res = self._raw_query([emb], n, cats or None)
+            ids, docs, metas = list(res["ids"][0]), list(res["documents"][0]), list(res["metadatas"][0])
+            if cats and len(ids) < n:
+                extra = self._raw_query([emb], n, None)
+                for doc_id, doc, meta in zip(extra["ids"][0], extra["documents"][0], extra["metadatas"][0]):
+                    if len(ids) >= n:
+                        break
+                    if doc_id not in ids:
+                        ids.append(doc_id)
+                        docs.append(doc)
+                        metas.append(meta)
+            merged["ids"].append(ids)
+            merged["documents"].append(docs)
+            merged["metadatas"].append(metas)
+        return merged
+
+    def _hybrid_search(
+        self,
+        query: str,
+        query_embedding: List[float],
+        top_k: int,
+        categories: Optional[List[str]],
+    ) -> List[Dict[str, str]]:
+        """BM25 + vector candidates fused with RRF, then MMR with near-duplicate collapse."""
+        n = max(HYBRID_CANDIDATES, top_k)
+        vector_ids = self._vector_query([query_embedding], n, [categories] if categories else None)["ids"][0]
+
+        with metrics.stage("bm25"):
+            hits = self.bm25.search(query, n * 3 if categories else n)
+            lexical_ids = [self.bm25.ids[pos] for pos, _ in hits]
+            if categories:
+                wanted = set(categories)
+                filtered = [
+                    doc_id for doc_id in lexical_ids
+                    if doc_id in self.index.position
+                    and (self.index.metadatas[self.index.position[doc_id]] or {}).get("category") in wanted
+                ]
+                lexical_ids = filtered or lexical_ids
+            lexical_ids = lexical_ids[:n]
+
+        with metrics.stage("rerank"):
+            fused = [(doc_id, score) for doc_id, score in rrf_fuse([vector_ids, lexical_ids])
+                     if doc_id in self.index.position][:n]
+            if not fused:
+                return []
+            positions = [self.index.position[doc_id] for doc_id, _ in fused]
+            scores = np.array([score for _, score in fused], dtype=np.float32)
+            relevance = scores / scores.max()
+            vectors = np.asarray(self.index.matrix[positions], dtype=np.float32)
+            picks = mmr_select(relevance, vectors, top_k, MMR_LAMBDA, DUPLICATE_THRESHOLD)
+
+        return [
+            self._policy(self.index.documents[positions[p]], self.index.metadatas[positions[p]])
+            for p in picks
+        ]
+
+    def index_version(self) -> str:
+        """Cheap fingerprint of the policy collection: ingestion rewrites the manifest on every run."""
+        try:
+            st = os.stat(os.path.join(self.db_path, MANIFEST_NAME))
+            return f"{self.version}:{st.st_mtime_ns}:{st.st_size}"
+        except OSError:
+            return f"{self.version}:no-manifest"
 
 
 # Run standalone test
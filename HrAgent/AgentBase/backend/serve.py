@@ -0,0 +1,146 @@
+# backend/serve.py
+"""Pre-fork server: load the models once, then fork uvicorn workers that share them.
+
+``uvicorn --workers N`` starts each worker as a fresh interpreter, so every
+worker loads BART-MNLI and MiniLM and initialises torch on its own. Here the
+parent loads the models, freezes the GC, binds the socket and forks; workers
+share those pages copy-on-write and only pay for their own activations, caches
+and Chroma client (see the README for measured numbers).
+
+    python -m backend.serve --workers 4 --port 8000
+
+Linux/macOS only (needs os.fork); use ``uvicorn --workers`` elsewhere.
+"""
+import os
+import gc
+import sys
+import time
+import glob
+import signal
+import socket
+import argparse
+import tempfile
+from typing import Dict, List
+
+
+def preload() -> List[str]:
+    """Load the shared models in the parent process.
+
+    Only models (and the web framework's modules) are loaded here. backend.app
+    is imported by each worker after the fork, so its inference pool, response
+    cache, locks and .env settings belong to that worker and are never inherited.
+    """
+    from backend import model_registry
+    from backend.classifier_agent import CLASSIFIER_BACKEND, CLASSIFIER_BACKENDS
+    from backend.retriever_agent import EMBED_MODEL
+
+    # A single-threaded parent never starts an OpenMP pool, which a forked child can't inherit safely.
+    # Workers apply HR_TORCH_THREADS after the fork. No forward pass runs here for the same reason.
+    model_registry.configure_torch(num_threads=1)
+    model_registry.get_embedder(EMBED_MODEL)
+    if CLASSIFIER_BACKEND != "embedding":
+        model_registry.get_zero_shot_pipeline(CLASSIFIER_BACKENDS[CLASSIFIER_BACKEND])
+    # Library code only: these hold no app state, and sharing their pages saves memory in every worker
+    import fastapi  # noqa: F401
+    import uvicorn  # noqa: F401
+    return model_registry.loaded_models()
+
+
+def run_worker(sock: socket.socket, args) -> None:
+    import uvicorn
+    from backend import model_registry
+    from backend.app import app
+
+    model_registry.reset_after_fork()
+    config = uvicorn.Config(app, host=args.host, port=args.port, log_level=args.log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main(args) -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    start = time.perf_counter()
+    models = preload()
+    # Move everything allocated so far out of the collector's reach, so GC passes
+    # in the workers don't write to (and thereby copy) the shared pages
+    gc.collect()
+    gc.freeze()
+    print(f"✅ Preloaded {', '.join(models) or 'no models'} in {time.perf_counter() - start:.1f}s; "
+          f"forking {args.workers} workers on {args.host}:{args.port}.")
+
+    workers: Dict[int, float] = {}
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                run_worker(sock, args)
+            except BaseException as e:
+                print(f"❌ Worker {os.getpid()} crashed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        workers[pid] = time.monotonic()
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(args.workers):
+        spawn()
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = workers.pop(pid, None)
+        if started is not None:
+            from backend import metrics
+            metrics.mark_process_dead(pid)
+        if stopping or started is None:
+            continue
+        print(f"⚠️ Worker {pid} exited with status {status}; restarting.")
+        if time.monotonic() - started < 5:
+            # Don't spin if workers die on startup
+            time.sleep(1)
+        spawn()
+    sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve backend.app from pre-forked workers sharing model weights.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "2")))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        sys.exit("backend.serve needs os.fork (Linux/macOS). Use `uvicorn backend.app:app --workers N` instead.")
+    # Settings read at import time by the backend modules, so set them before preload()
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    # HR_TORCH_THREADS then defaults to physical cores / workers (see model_registry)
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    # Prometheus multiprocess mode, so /metrics covers every worker. The directory must be
+    # set before prometheus_client is imported and must not hold files from an earlier run.
+    metrics_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="hr_metrics_"))
+    os.makedirs(metrics_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(metrics_dir, "*.db")):
+        os.remove(stale)
+    main(args)
@@ -0,0 +1,148 @@
+# backend/vector_index.py
+import os
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+INDEX_MATRIX = "policy_index.npy"
+INDEX_META = "policy_index.json"
+EXPORT_PAGE_SIZE = 1000
+CATEGORY_MASK_CACHE_SIZE = 32
+
+
+def export_index(collection, db_path: str) -> int:
+    """Dump every vector in the Chroma collection to a normalized float32 .npy matrix.
+
+    Pages through the collection and writes straight into a memory-mapped
+    file, so memory stays bounded regardless of corpus size. Returns the
+    number of rows written.
+    """
+    total = collection.count()
+    matrix_path = os.path.join(db_path, INDEX_MATRIX)
+    meta_path = os.path.join(db_path, INDEX_META)
+    tmp_matrix = matrix_path + ".tmp.npy"
+    tmp_meta = meta_path + ".tmp"
+
+    if total == 0:
+        for path in (matrix_path, meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+        return 0
+
+    matrix = None
+    ids, documents, metadatas = [], [], []
+    for offset in range(0, total, EXPORT_PAGE_SIZE):
+        page = collection.get(
+            include=["embeddings", "documents", "metadatas"],
+            limit=EXPORT_PAGE_SIZE,
+            offset=offset,
+        )
+        vectors = np.asarray(page["embeddings"], dtype=np.float32)
+        if vectors.size == 0:
+            break
+        if matrix is None:
+            matrix = np.lib.format.open_memmap(tmp_matrix, mode="w+", dtype=np.float32, shape=(total, vectors.shape[1]))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix[len(ids):len(ids) + len(vectors)] = vectors / norms
+        ids.extend(page["ids"])
+        documents.extend(page["documents"])
+        metadatas.extend(page["metadatas"])
+
+    matrix.flush()
+    del matrix
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump({"ids": ids, "documents": documents, "metadatas": metadatas}, f)
+    os.replace(tmp_matrix, matrix_path)
+    os.replace(tmp_meta, meta_path)
+    return len(ids)
+
+
+class NumpyPolicyIndex:
+    """Exact in-memory top-k search over a memory-mapped, normalized embedding matrix."""
+
+    def __init__(self, db_path: str):
+        matrix_path = os.path.join(db_path, INDEX_MATRIX)
+        meta_path = os.path.join(db_path, INDEX_META)
+        if not os.path.exists(matrix_path) or not os.path.exists(meta_path):
+            raise FileNotFoundError(
+                f"No vector index in {db_path}. Run `python -m backend.ingest_policies` first."
+            )
+        self.matrix = np.load(matrix_path, mmap_mode="r")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.ids: List[str] = meta["ids"]
+        self.documents: List[str] = meta["documents"]
+        self.metadatas: List[Dict] = meta["metadatas"]
+        self.position: Dict[str, int] = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self._category_masks: "OrderedDict[Tuple[str, ...], np.ndarray]" = OrderedDict()
+        self._masks_lock = threading.Lock()
+
+    def category_mask(self, categories: Sequence[str]) -> np.ndarray:
+        """Boolean mask of rows whose "category" metadata is in categories (LRU of CATEGORY_MASK_CACHE_SIZE sets)."""
+        key = tuple(sorted(set(categories)))
+        with self._masks_lock:
+            mask = self._category_masks.get(key)
+            if mask is not None:
+                self._category_masks.move_to_end(key)
+                return mask
+        wanted = set(key)
+        mask = np.fromiter(((m or {}).get("category") in wanted for m in self.metadatas), dtype=bool, count=len(self.metadatas))
+        with self._masks_lock:
+            self._category_masks[key] = mask
+            self._category_masks.move_to_end(key)
+            while len(self._category_masks) > CATEGORY_MASK_CACHE_SIZE:
+                self._category_masks.popitem(last=False)
+        return mask
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int,
+        categories: Optional[Sequence[str]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (indices, scores) of shape (n_queries, k), best match first.
+
+        With categories, rows outside them are excluded (and k shrinks to the
+        number of matching rows).
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        scores = (queries / norms) @ self.matrix.T
+
+        k = min(top_k, scores.shape[1])
+        if categories:
+            mask = self.category_mask(categories)
+            scores = np.where(mask[None, :], scores, -np.inf)
+            k = min(k, int(mask.sum()))
+        if k <= 0:
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int,
+        categories: Optional[Sequence[str]] = None,
+    ) -> Dict[str, List[List]]:
+        """Chroma-shaped result dict ({"documents": [[...]], "metadatas": [[...]]})."""
+        indices, scores = self.search(query_embeddings, top_k, categories)
+        return {
+            "ids": [[self.ids[i] for i in row] for row in indices],
+            "documents": [[self.documents[i] for i in row] for row in indices],
+            "metadatas": [[self.metadatas[i] for i in row] for row in indices],
+            "distances": [(1.0 - row).tolist() for row in scores],
+        }
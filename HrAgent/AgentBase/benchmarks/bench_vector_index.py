@@ -0,0 +1,91 @@
+# benchmarks/bench_vector_index.py
+"""Latency and recall of the NumPy policy index vs. the Chroma HNSW path.
+
+Uses random unit vectors at MiniLM's dimensionality, so no model download
+is needed. Exact brute-force search is the ground truth for recall@k.
+
+Usage:
+    python -m benchmarks.bench_vector_index --sizes 500 2000 10000 --queries 200
+"""
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+from chromadb import PersistentClient
+
+from backend.vector_index import NumpyPolicyIndex, export_index
+from benchmarks.results import percentiles, write_results
+
+DIM = 384
+
+
+def bench_size(n: int, n_queries: int, top_k: int, rng: np.random.Generator) -> dict:
+    corpus = rng.standard_normal((n, DIM)).astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = rng.standard_normal((n_queries, DIM)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = np.argsort(-(queries @ corpus.T), axis=1)[:, :top_k]
+
+    tmp = tempfile.mkdtemp(prefix="hr_bench_")
+    try:
+        client = PersistentClient(path=tmp)
+        collection = client.get_or_create_collection(name="bench")
+        ids = [str(i) for i in range(n)]
+        step = 1000
+        for i in range(0, n, step):
+            collection.add(
+                ids=ids[i:i + step],
+                embeddings=corpus[i:i + step].tolist(),
+                documents=[f"doc {j}" for j in range(i, min(n, i + step))],
+                metadatas=[{"source": "bench"} for _ in range(i, min(n, i + step))],
+            )
+        export_index(collection, tmp)
+        index = NumpyPolicyIndex(tmp)
+
+        results = {"size": n, "queries": n_queries, "top_k": top_k}
+        for name, run in (
+            ("chroma", lambda q: collection.query(query_embeddings=[q.tolist()], n_results=top_k)["ids"][0]),
+            ("numpy", lambda q: index.query([q], top_k)["ids"][0]),
+        ):
+            latencies, hits = [], 0
+            for q, gold in zip(queries, truth):
+                t0 = time.perf_counter()
+                got = run(q)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                hits += len({int(i) for i in got} & set(gold.tolist()))
+            results[name] = {
+                **percentiles(latencies),
+                f"recall@{top_k}": hits / (n_queries * top_k),
+            }
+
+        t0 = time.perf_counter()
+        index.query(queries, top_k)
+        results["numpy_batched_ms_per_query"] = (time.perf_counter() - t0) * 1000 / n_queries
+        return results
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark NumPy vs Chroma policy retrieval.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 10000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--output", help="JSON output path (default: benchmarks/results/vector_index-<ts>.json)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    all_results = []
+    for n in args.sizes:
+        r = bench_size(n, args.queries, args.top_k, rng)
+        all_results.append(r)
+        recall_key = f"recall@{args.top_k}"
+        print(
+            f"n={n:>6}  chroma p50 {r['chroma']['p50_ms']:.2f} ms (recall {r['chroma'][recall_key]:.3f})  "
+            f"numpy p50 {r['numpy']['p50_ms']:.2f} ms (recall {r['numpy'][recall_key]:.3f})  "
+            f"numpy batched {r['numpy_batched_ms_per_query']:.3f} ms/query"
+        )
+
+    write_results("vector_index", all_results, args.output)
@@ -0,0 +1,42 @@
+# benchmarks/fixtures.py
+"""Deterministic grievance fixtures built from the questions in policies/*.jsonl."""
+import os
+import json
+import random
+from typing import List
+
+from backend.ingest_policies import POLICY_FOLDER, parse_record
+
+_TEMPLATES = [
+    "{q}",
+    "I asked HR about this and got no answer: {q}",
+    "{q} Nobody has been able to explain it to me and it is affecting my work.",
+    "My manager refused to help when I asked: {q}",
+    "I want to file a grievance. {q}",
+    "This has happened twice now and I am frustrated. {q}",
+]
+
+
+def policy_questions(policy_folder: str = POLICY_FOLDER) -> List[str]:
+    questions = []
+    for fname in sorted(os.listdir(policy_folder)):
+        if not fname.lower().endswith(".jsonl"):
+            continue
+        with open(os.path.join(policy_folder, fname), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    q, _ = parse_record(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+                if q:
+                    questions.append(q.strip())
+    return questions
+
+
+def make_grievances(n: int, seed: int = 0, policy_folder: str = POLICY_FOLDER) -> List[str]:
+    """n grievances, each a policy question wrapped in a complaint-style template."""
+    rng = random.Random(seed)
+    questions = policy_questions(policy_folder)
+    if not questions:
+        raise RuntimeError(f"No policy questions found in {policy_folder}")
+    return [rng.choice(_TEMPLATES).format(q=rng.choice(questions)) for _ in range(n)]
@@ -0,0 +1,171 @@
+# benchmarks/load_test.py
+"""End-to-end load generator for the FastAPI app.
+
+Either point it at a running server (--url) or let it spawn one with the
+offline Gemini stub (--spawn), so the run needs no network access:
+
+    python -m benchmarks.load_test --spawn --requests 500 --concurrency 16
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --path /analyze/stream
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+from collections import Counter
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.fixtures import make_grievances
+from benchmarks.results import percentiles, rss_mb, write_results
+
+AGENT_BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def spawn_server(
+    port: int,
+    stub_latency_ms: float,
+    extra_env: Dict[str, str],
+    command: Optional[List[str]] = None,
+) -> subprocess.Popen:
+    """Start the API with the Gemini stub; command defaults to a single uvicorn worker."""
+    env = {
+        **os.environ,
+        "HR_GEMINI_STUB": "1",
+        "HR_GEMINI_STUB_LATENCY_MS": str(stub_latency_ms),
+        **extra_env,
+    }
+    command = command or ["-m", "uvicorn", "backend.app:app"]
+    return subprocess.Popen(
+        [sys.executable, *command, "--host", "127.0.0.1", "--port", str(port)],
+        cwd=AGENT_BASE,
+        env=env,
+    )
+
+
+async def wait_ready(base_url: str, timeout_s: float = 300, path: str = "/readyz") -> float:
+    """Poll the readiness endpoint until the models are loaded; returns seconds waited."""
+    start = time.perf_counter()
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() - start < timeout_s:
+            try:
+                if (await client.get(f"{base_url}{path}")).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise TimeoutError(f"Server at {base_url} not ready after {timeout_s}s")
+
+
+async def sample_rss(pid: int, peak: List[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        value = rss_mb(pid)
+        if value is not None:
+            peak.append(value)
+        await asyncio.sleep(0.5)
+
+
+async def run_load(base_url: str, path: str, grievances: List[str], concurrency: int, timeout_s: float) -> Dict:
+    queue: asyncio.Queue = asyncio.Queue()
+    for g in grievances:
+        queue.put_nowait(g)
+    latencies: List[float] = []
+    ttfb: List[float] = []
+    statuses: Counter = Counter()
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout_s, limits=limits) as client:
+
+        async def worker():
+            while True:
+                try:
+                    grievance = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                t0 = time.perf_counter()
+                try:
+                    async with client.stream("POST", path, json={"grievance": grievance}) as resp:
+                        first = None
+                        async for _ in resp.aiter_bytes():
+                            if first is None:
+                                first = time.perf_counter()
+                        statuses[resp.status_code] += 1
+                        if resp.status_code == 200:
+                            latencies.append((time.perf_counter() - t0) * 1000)
+                            ttfb.append(((first or time.perf_counter()) - t0) * 1000)
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    return {
+        "path": path,
+        "requests": len(grievances),
+        "concurrency": concurrency,
+        "elapsed_s": elapsed,
+        "throughput_rps": statuses.get(200, 0) / elapsed if elapsed else 0.0,
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "latency": percentiles(latencies),
+        "time_to_first_byte": percentiles(ttfb),
+    }
+
+
+async def main(args) -> Dict:
+    server: Optional[subprocess.Popen] = None
+    base_url = args.url
+    if args.spawn:
+        base_url = f"http://127.0.0.1:{args.port}"
+        extra = dict(kv.split("=", 1) for kv in args.env)
+        server = spawn_server(args.port, args.stub_latency_ms, extra)
+    try:
+        ready_s = await wait_ready(base_url)
+        grievances = make_grievances(args.requests, seed=args.seed)
+        if args.warmup:
+            await run_load(base_url, args.path, grievances[:args.warmup], min(args.concurrency, args.warmup), args.timeout)
+
+        stop = asyncio.Event()
+        rss_samples: List[float] = []
+        sampler = asyncio.create_task(sample_rss(server.pid, rss_samples, stop)) if server else None
+        results = await run_load(base_url, args.path, grievances, args.concurrency, args.timeout)
+        stop.set()
+        if sampler:
+            await sampler
+
+        results["ready_s"] = ready_s if server else None
+        results["server_rss_mb_peak"] = max(rss_samples) if rss_samples else None
+        results["stub_latency_ms"] = args.stub_latency_ms if server else None
+        return results
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the grievance API.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn", action="store_true", help="Start a uvicorn server with the Gemini stub")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stub-latency-ms", type=float, default=800)
+    parser.add_argument("--env", nargs="*", default=[], help="Extra KEY=VALUE env vars for the spawned server")
+    parser.add_argument("--path", default="/analyze")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON output path (default: benchmarks/results/load-<ts>.json)")
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    lat = results["latency"]
+    print(
+        f"\n🚦 {results['throughput_rps']:.1f} req/s  "
+        f"p50 {lat.get('p50_ms', 0):.0f} ms  p95 {lat.get('p95_ms', 0):.0f} ms  p99 {lat.get('p99_ms', 0):.0f} ms  "
+        f"statuses {results['statuses']}  peak RSS {results['server_rss_mb_peak']} MB"
+    )
+    write_results("load", results, args.output)
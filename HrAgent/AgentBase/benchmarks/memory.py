@@ -0,0 +1,106 @@
+# benchmarks/memory.py
+"""Memory per worker: pre-fork serving (backend.serve) vs ``uvicorn --workers``.
+
+Spawns each mode with the Gemini stub and samples memory twice: once the
+workers are warmed up (the fixed cost per worker), and again after a few
+requests (adding activations and allocator growth, which depend on how the
+requests happened to spread over the workers). Each sample sums PSS over the
+process tree. PSS splits shared pages between the processes that map them,
+so it is the number that shows sharing; RSS counts shared pages once per
+worker. USS (private pages) is what each worker adds on its own. Linux only
+(reads /proc).
+
+    python -m benchmarks.memory --workers 4
+    python -m benchmarks.memory --workers 1 2 4 8 --modes prefork
+"""
+import asyncio
+import argparse
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.fixtures import make_grievances
+from benchmarks.load_test import spawn_server, wait_ready
+from benchmarks.results import memory_mb, process_tree, write_results
+
+MODES = {
+    "prefork": lambda n: ["-m", "backend.serve", "--workers", str(n)],
+    "uvicorn": lambda n: ["-m", "uvicorn", "backend.app:app", "--workers", str(n)],
+}
+
+
+async def exercise(base_url: str, requests: int) -> None:
+    """Send enough concurrent requests that each worker loads and runs its models."""
+    grievances = make_grievances(requests, seed=0)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        await asyncio.gather(*[client.post("/analyze", json={"grievance": g}) for g in grievances])
+
+
+def _is_helper(pid: int) -> bool:
+    """multiprocessing's resource tracker, which uvicorn --workers starts next to the workers."""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return b"resource_tracker" in f.read()
+    except OSError:
+        return True
+
+
+def sample(root: int, workers: int) -> Dict:
+    """PSS/RSS totals over the process tree, plus PSS and USS averaged over the worker processes."""
+    processes = {pid: memory_mb(pid) for pid in process_tree(root)}
+    processes = {pid: m for pid, m in processes.items() if m is not None}
+    # Workers alone, without the uvicorn supervisor or pre-fork parent
+    # (uvicorn with one worker serves from the root process itself)
+    children = [m for pid, m in processes.items() if pid != root and not _is_helper(pid)] or list(processes.values())
+    total_pss = sum(m["pss"] for m in processes.values())
+    return {
+        "total_pss_mb": total_pss,
+        "total_rss_mb": sum(m["rss"] for m in processes.values()),
+        "pss_per_worker_mb": total_pss / workers,
+        "worker_pss_mb": sum(m["pss"] for m in children) / len(children),
+        "worker_uss_mb": sum(m["private"] for m in children) / len(children),
+        "per_process": {str(pid): m for pid, m in processes.items()},
+    }
+
+
+async def measure(mode: str, workers: int, port: int, settle_s: float) -> Dict:
+    """Sample once after warm-up (the fixed cost per worker) and once after traffic (plus activations)."""
+    base_url = f"http://127.0.0.1:{port}"
+    server = spawn_server(port, 0, {}, command=MODES[mode](workers))
+    try:
+        ready_s = await wait_ready(base_url)
+        await asyncio.sleep(settle_s)
+        idle = sample(server.pid, workers)
+        await exercise(base_url, requests=8 * workers)
+        await asyncio.sleep(settle_s)
+        loaded = sample(server.pid, workers)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+    return {"mode": mode, "workers": workers, "ready_s": ready_s, "idle": idle, "loaded": loaded}
+
+
+async def main(args) -> List[Dict]:
+    results = []
+    for mode in args.modes:
+        for workers in args.workers:
+            result = await measure(mode, workers, args.port, args.settle_s)
+            for phase in ("idle", "loaded"):
+                m = result[phase]
+                print(f"{mode:8s} workers={workers:<2d} {phase:6s} total PSS {m['total_pss_mb']:6.0f} MB  "
+                      f"per worker {m['pss_per_worker_mb']:6.0f} MB  "
+                      f"(worker PSS {m['worker_pss_mb']:.0f} MB, USS {m['worker_uss_mb']:.0f} MB; "
+                      f"RSS sum {m['total_rss_mb']:.0f} MB)")
+            results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare memory per worker across serving modes.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[4])
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=["prefork", "uvicorn"])
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--settle-s", type=float, default=2.0, help="Pause before each sample")
+    parser.add_argument("--output", help="JSON output path (default: benchmarks/results/memory-<ts>.json)")
+    args = parser.parse_args()
+    write_results("memory", {"runs": asyncio.run(main(args))}, args.output)
@@ -0,0 +1,152 @@
+# benchmarks/micro.py
+"""Microbenchmarks for the individual pipeline components.
+
+Usage (from HrAgent/AgentBase):
+    python -m benchmarks.micro
+    python -m benchmarks.micro --only classify retrieve --iterations 100
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+from typing import Callable, Dict, List
+
+# Time the models, not the classifier's result cache (the warm-up inputs are re-timed)
+os.environ.setdefault("HR_CLASSIFY_CACHE_SIZE", "0")
+
+from benchmarks.fixtures import make_grievances
+from benchmarks.results import percentiles, rss_mb, write_results
+
+BENCHES = ["classify", "classify_batch", "retrieve", "retrieve_batch", "prompt", "ingest"]
+
+
+def _time_each(fn: Callable[[str], object], inputs: List[str], warmup: int = 3) -> Dict[str, float]:
+    for text in inputs[:warmup]:
+        fn(text)
+    samples = []
+    for text in inputs:
+        t0 = time.perf_counter()
+        fn(text)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return percentiles(samples)
+
+
+def bench_classify(grievances: List[str], backend: str) -> Dict:
+    from backend.classifier_agent import GrievanceClassifier
+
+    clf = GrievanceClassifier(backend=backend, max_batch_size=1)
+    return {"backend": backend, **_time_each(clf.classify, grievances)}
+
+
+def bench_classify_batch(grievances: List[str], backend: str, batch_size: int) -> Dict:
+    from backend.classifier_agent import GrievanceClassifier
+
+    clf = GrievanceClassifier(backend=backend, max_batch_size=1)
+    clf.classify_batch(grievances[:batch_size])
+    t0 = time.perf_counter()
+    for i in range(0, len(grievances), batch_size):
+        clf.classify_batch(grievances[i:i + batch_size])
+    elapsed = time.perf_counter() - t0
+    return {
+        "backend": backend,
+        "batch_size": batch_size,
+        "grievances_per_s": len(grievances) / elapsed,
+        "ms_per_grievance": elapsed * 1000 / len(grievances),
+    }
+
+
+def bench_retrieve(grievances: List[str]) -> Dict:
+    from backend.retriever_agent import PolicyRetriever
+
+    retriever = PolicyRetriever()
+    encode = _time_each(retriever.encode_query, grievances)
+    embeddings = [retriever.encode_query(g) for g in grievances]
+
+    samples = []
+    for text, emb in zip(grievances, embeddings):
+        t0 = time.perf_counter()
+        retriever.search_policies(text, top_k=3, query_embedding=emb)
+        samples.append((time.perf_counter() - t0) * 1000)
+    query = percentiles(samples)
+    end_to_end = _time_each(lambda g: retriever.search_policies(g, top_k=3), grievances)
+    return {"backend": retriever.backend, "encode": encode, "query": query, "end_to_end": end_to_end}
+
+
+def bench_retrieve_batch(grievances: List[str], batch_size: int) -> Dict:
+    from backend.retriever_agent import PolicyRetriever
+
+    retriever = PolicyRetriever()
+    retriever.search_policies_batch(grievances[:batch_size], top_k=3)
+    t0 = time.perf_counter()
+    for i in range(0, len(grievances), batch_size):
+        retriever.search_policies_batch(grievances[i:i + batch_size], top_k=3)
+    elapsed = time.perf_counter() - t0
+    return {"batch_size": batch_size, "ms_per_grievance": elapsed * 1000 / len(grievances)}
+
+
+def bench_prompt(grievances: List[str]) -> Dict:
+    from backend.recommender_agent import RecommenderAgent
+    from backend.retriever_agent import PolicyRetriever
+
+    recommender = RecommenderAgent()
+    retriever = PolicyRetriever()
+    contexts = retriever.search_policies_batch(grievances, top_k=3)
+    categories = ["Payroll or Compensation", "Manager Conflict"]
+    pairs = dict(zip(grievances, contexts))
+    stats = _time_each(lambda g: recommender.build_prompt(g, categories, pairs[g]), grievances)
+    sizes = [len(recommender.build_prompt(g, categories, pairs[g])) for g in grievances]
+    return {**stats, "mean_prompt_chars": sum(sizes) / len(sizes)}
+
+
+def bench_ingest() -> Dict:
+    """Cold full ingest and warm no-op re-ingest into a throwaway database."""
+    from backend.ingest_policies import POLICY_FOLDER, ingest_policies
+
+    tmp = tempfile.mkdtemp(prefix="hr_ingest_bench_")
+    try:
+        t0 = time.perf_counter()
+        cold = ingest_policies(policy_folder=POLICY_FOLDER, db_path=tmp)
+        cold_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        ingest_policies(policy_folder=POLICY_FOLDER, db_path=tmp)
+        warm_s = time.perf_counter() - t0
+        return {
+            "rows": cold["added"],
+            "cold_s": cold_s,
+            "rows_per_s": cold["added"] / cold_s if cold_s else 0.0,
+            "reingest_noop_s": warm_s,
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the grievance pipeline.")
+    parser.add_argument("--only", nargs="+", choices=BENCHES, default=BENCHES)
+    parser.add_argument("--iterations", type=int, default=50, help="Grievances per benchmark")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--classifier-backend", default=os.getenv("HR_CLASSIFIER_BACKEND", "bart-mnli"))
+    parser.add_argument("--output", help="JSON output path (default: benchmarks/results/micro-<ts>.json)")
+    args = parser.parse_args()
+
+    grievances = make_grievances(args.iterations)
+    results: Dict[str, object] = {"iterations": args.iterations}
+    for name in args.only:
+        print(f"⏱️ Running {name}...")
+        if name == "classify":
+            results[name] = bench_classify(grievances, args.classifier_backend)
+        elif name == "classify_batch":
+            results[name] = bench_classify_batch(grievances, args.classifier_backend, args.batch_size)
+        elif name == "retrieve":
+            results[name] = bench_retrieve(grievances)
+        elif name == "retrieve_batch":
+            results[name] = bench_retrieve_batch(grievances, args.batch_size)
+        elif name == "prompt":
+            results[name] = bench_prompt(grievances)
+        elif name == "ingest":
+            results[name] = bench_ingest()
+        print(f"   {results[name]}")
+    results["rss_mb"] = rss_mb()
+
+    write_results("micro", results, args.output)
@@ -0,0 +1,122 @@
+# benchmarks/startup.py
+"""Startup-time budget check for the API and CLI.
+
+Measures, in fresh interpreters:
+
+* ``import backend.app`` and ``python -m backend.main --help`` wall time,
+  and which heavy libraries (torch, transformers, ...) got imported by them;
+* with --spawn, time until a uvicorn worker answers /healthz (liveness) and
+  /readyz (models loaded).
+
+Exits non-zero when any measurement is over its budget or a heavy library is
+imported eagerly, so it can gate CI or a deploy:
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --spawn --ready-budget-s 90
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List
+
+from benchmarks.load_test import AGENT_BASE, spawn_server, wait_ready
+from benchmarks.results import write_results
+
+# Libraries that must only be imported when a model or client is first used
+HEAVY_MODULES = ("torch", "transformers", "sentence_transformers", "chromadb", "google.generativeai", "onnxruntime")
+
+_PROBE = (
+    "import sys, time, json\n"
+    "t = time.perf_counter()\n"
+    "{stmt}\n"
+    "print(json.dumps({{'seconds': time.perf_counter() - t, "
+    "'heavy': [m for m in {heavy!r} if m in sys.modules]}}))\n"
+)
+
+
+def probe_import(stmt: str, runs: int) -> Dict:
+    """Run stmt in fresh interpreters; returns median seconds and heavy modules seen."""
+    seconds: List[float] = []
+    heavy = set()
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(stmt=stmt, heavy=HEAVY_MODULES)],
+            cwd=AGENT_BASE, capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(out)
+        seconds.append(result["seconds"])
+        heavy.update(result["heavy"])
+    return {"median_s": statistics.median(seconds), "max_s": max(seconds), "heavy_imports": sorted(heavy)}
+
+
+def time_cli_help(runs: int) -> Dict:
+    seconds: List[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "backend.main", "--help"], cwd=AGENT_BASE,
+                       capture_output=True, check=True)
+        seconds.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(seconds), "max_s": max(seconds)}
+
+
+async def time_server(port: int, timeout_s: float) -> Dict:
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = spawn_server(port, 0, {})
+    try:
+        live_s = await wait_ready(base_url, timeout_s, path="/healthz")
+        ready_s = await wait_ready(base_url, max(1.0, timeout_s - live_s), path="/readyz")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return {"live_s": live_s, "ready_s": live_s + ready_s, "wall_s": time.perf_counter() - start}
+
+
+def main(args) -> int:
+    results: Dict = {
+        "import_app": probe_import("import backend.app", args.runs),
+        "cli_help": time_cli_help(args.runs),
+    }
+    if args.spawn:
+        results["server"] = asyncio.run(time_server(args.port, args.timeout))
+
+    failures = []
+    if results["import_app"]["median_s"] > args.import_budget_s:
+        failures.append(f"import backend.app took {results['import_app']['median_s']:.2f}s > {args.import_budget_s}s")
+    if results["import_app"]["heavy_imports"]:
+        failures.append(f"import backend.app pulled in {', '.join(results['import_app']['heavy_imports'])}")
+    if results["cli_help"]["median_s"] > args.cli_budget_s:
+        failures.append(f"backend.main --help took {results['cli_help']['median_s']:.2f}s > {args.cli_budget_s}s")
+    if "server" in results:
+        if results["server"]["live_s"] > args.live_budget_s:
+            failures.append(f"/healthz answered after {results['server']['live_s']:.2f}s > {args.live_budget_s}s")
+        if results["server"]["ready_s"] > args.ready_budget_s:
+            failures.append(f"/readyz ready after {results['server']['ready_s']:.2f}s > {args.ready_budget_s}s")
+
+    results["failures"] = failures
+    print(json.dumps({k: v for k, v in results.items() if k != "failures"}, indent=2))
+    write_results("startup", results, args.output)
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Startup within budget.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check API/CLI startup time against a budget.")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per import measurement")
+    parser.add_argument("--import-budget-s", type=float, default=float(os.getenv("HR_STARTUP_IMPORT_BUDGET_S", "1.5")))
+    parser.add_argument("--cli-budget-s", type=float, default=float(os.getenv("HR_STARTUP_CLI_BUDGET_S", "1.5")))
+    parser.add_argument("--spawn", action="store_true", help="Also time liveness/readiness of a spawned server")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--live-budget-s", type=float, default=float(os.getenv("HR_STARTUP_LIVE_BUDGET_S", "3")))
+    parser.add_argument("--ready-budget-s", type=float, default=float(os.getenv("HR_STARTUP_READY_BUDGET_S", "60")))
+    parser.add_argument("--output", help="JSON output path (default: benchmarks/results/startup-<ts>.json)")
+    sys.exit(main(parser.parse_args()))
@@ -1,3 +1,6 @@
+import json
+import time
+import uuid
 import streamlit as st
 import requests
 
@@ -14,7 +17,133 @@ st.markdown("This tool uses a multi-agent pipeline to analyze an employee grieva
 
 # --- Backend URL ---
 # This assumes your FastAPI backend is running on the default port 8000
-BACKEND_URL = "http://127.0.0.1:8000/analyze"
+BACKEND_BASE = "http://127.0.0.1:8000"
+STREAM_URL = f"{BACKEND_BASE}/analyze/stream"
+JOBS_URL = f"{BACKEND_BASE}/jobs"
+# Give up on a job after this long; it keeps running and can be fetched by id later
+JOB_TIMEOUT_S = 300
+
+
+def iter_sse(response):
+    """Yield (event, data) pairs from a Server-Sent Events response."""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
+
+def submit_job(grievance: str) -> dict:
+    """POST /jobs, retrying connection errors with the same Idempotency-Key so no duplicate is queued."""
+    key = st.session_state.get("job_key")
+    if st.session_state.get("job_grievance") != grievance or key is None:
+        key = uuid.uuid4().hex
+        st.session_state["job_key"], st.session_state["job_grievance"] = key, grievance
+    for attempt in range(3):
+        try:
+            response = requests.post(JOBS_URL, json={"grievance": grievance}, headers={"Idempotency-Key": key}, timeout=(5, 15))
+        except requests.exceptions.ConnectionError:
+            if attempt == 2:
+                raise
+            time.sleep(1 + attempt)
+            continue
+        if response.status_code == 503 and attempt < 2:
+            time.sleep(int(response.headers.get("Retry-After", "2")))
+            continue
+        if response.status_code not in (200, 202):
+            raise RuntimeError(response.json().get("detail", "Unknown error"))
+        return response.json()
+
+
+def wait_for_job(job_id: str, status) -> dict:
+    """Long-poll GET /jobs/{id} until the job finishes or JOB_TIMEOUT_S passes."""
+    deadline = time.monotonic() + JOB_TIMEOUT_S
+    while time.monotonic() < deadline:
+        try:
+            response = requests.get(f"{JOBS_URL}/{job_id}", params={"wait": 25}, timeout=(5, 35))
+        except requests.exceptions.ConnectionError:
+            time.sleep(2)
+            continue
+        job = response.json()
+        if response.status_code != 200:
+            raise RuntimeError(job.get("detail", "Unknown error"))
+        if job["status"] in ("done", "failed"):
+            return job
+        status.update(label=f"Analyzing... (job {job['status']})")
+    raise TimeoutError(f"Job {job_id} is still running; check {JOBS_URL}/{job_id} later.")
+
+
+def show_categories(box, categories):
+    with box:
+        if categories:
+            for cat in categories:
+                st.info(f"**{cat}**")
+        else:
+            st.write("No specific categories detected.")
+
+
+def show_policies(box, policies):
+    with box:
+        if policies:
+            for i, policy in enumerate(policies, 1):
+                with st.expander(f"**Policy {i}** (Click to see details)"):
+                    st.write(policy)
+        else:
+            st.write("No relevant policy documents were found.")
+
+
+def run_job(grievance: str, status, recommendation_box, categories_box, policies_box):
+    """Job mode: the request is acknowledged at once and the result persisted server-side."""
+    job = submit_job(grievance)
+    status.update(label=f"Queued as job {job['id']}, waiting for the result...")
+    job = wait_for_job(job["id"], status)
+    # A finished job's key is spent; submitting the same text again starts a fresh analysis
+    st.session_state.pop("job_key", None)
+    if job["status"] == "failed":
+        status.update(label="Analysis failed", state="error")
+        st.error(f"❌ Error from backend: {job.get('error') or 'Unknown error'}")
+        return
+    result = job["result"]
+    recommendation_box.markdown(result.get("recommendation") or "No recommendation provided.")
+    show_categories(categories_box, result.get("categories"))
+    show_policies(policies_box, result.get("relevant_policies"))
+    status.update(label="Analysis Complete!", state="complete")
+
+
+def run_stream(grievance: str, status, recommendation_box, categories_box, policies_box):
+    """Streaming mode: render each agent's output as the SSE events arrive."""
+    # The timeout is per read, not for the whole run
+    with requests.post(STREAM_URL, json={"grievance": grievance}, stream=True, timeout=(5, 60)) as response:
+        if response.status_code != 200:
+            # --- Handle API Errors ---
+            status.update(label="Analysis failed", state="error")
+            st.error(f"❌ Error from backend: {response.json().get('detail', 'Unknown error')}")
+            return
+        recommendation = ""
+        for event, data in iter_sse(response):
+            if event == "categories":
+                status.update(label="Categories detected, retrieving policies...")
+                show_categories(categories_box, data)
+            elif event == "policies":
+                status.update(label="Policies retrieved, generating recommendation...")
+                show_policies(policies_box, data)
+            elif event == "token":
+                recommendation += data
+                recommendation_box.markdown(recommendation + "▌")
+            elif event == "done":
+                recommendation_box.markdown(data.get("recommendation") or "No recommendation provided.")
+                status.update(label="Analysis Complete!", state="complete")
+            elif event == "error":
+                status.update(label="Analysis failed", state="error")
+                st.error(f"❌ Error from backend: {data.get('detail', 'Unknown error')}")
+
 
 # --- User Input ---
 st.subheader("📝 Enter Employee Grievance")
@@ -24,63 +153,42 @@ grievance_text = st.text_area(
     placeholder="e.g., 'My manager keeps changing my shift timings without any notice and is often rude when I ask about it. I also haven't been paid for my overtime last week.'"
 )
 
+stream = st.toggle(
+    "Stream the recommendation as it is generated",
+    value=False,
+    help="Streaming needs the connection to stay open; the default job mode survives reconnects and retries.",
+)
+
 if st.button("Analyze Grievance", type="primary"):
     if not grievance_text.strip():
         st.warning("Please enter a grievance to analyze.")
     else:
-        with st.spinner("Analyzing... Calling Classifier, Retriever, and Recommender agents..."):
-            try:
-                # --- API Call ---
-                # Call the /analyze endpoint, not the /ask endpoint
-                response = requests.post(
-                    BACKEND_URL,
-                    json={"grievance": grievance_text},
-                    timeout=60  # Give it time to run all models
-                )
-
-                if response.status_code == 200:
-                    # --- Display Results ---
-                    data = response.json()
-
-                    st.success("Analysis Complete!")
-                    st.divider()
-
-                    # Create two columns for a cleaner layout
-                    col1, col2 = st.columns([1, 1])
-
-                    with col1:
-                        # --- Recommendation (Main Output) ---
-                        st.subheader("💡 Recommended HR Next Steps")
-                        st.markdown(data.get("recommendation", "No recommendation provided."))
-
-                    with col2:
-                        # --- Categories (from Classifier) ---
-                        st.subheader("📊 Detected Categories")
-                        categories = data.get("categories", [])
-                        if categories:
-                            for cat in categories:
-                                st.info(f"**{cat}**")
-                        else:
-                            st.write("No specific categories detected.")
-
-                    st.divider()
-
-                    # --- Policies (from Retriever) ---
-                    st.subheader("📚 Retrieved Relevant Policies (Top 3)")
-                    policies = data.get("relevant_policies", [])
-                    if policies:
-                        for i, policy in enumerate(policies, 1):
-                            with st.expander(f"**Policy {i}** (Click to see details)"):
-                                st.write(policy)
-                    else:
-                        st.write("No relevant policy documents were found.")
-
-                else:
-                    # --- Handle API Errors ---
-                    st.error(f"❌ Error from backend: {response.json().get('detail', 'Unknown error')}")
-
-            except requests.exceptions.RequestException as e:
-                # --- Handle Connection Errors ---
-                st.error(f"⚠️ Could not connect to backend at {BACKEND_URL}.")
-                st.error(f"Please ensure the FastAPI server is running: `uvicorn backend.app:app --reload`")
-                print(f"Connection error: {e}")
\ No newline at end of file
+        status = st.status("Analyzing... Calling Classifier, Retriever, and Recommender agents...", expanded=False)
+        st.divider()
+
+        # Placeholders are filled in as each agent's output streams in
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            st.subheader("💡 Recommended HR Next Steps")
+            recommendation_box = st.empty()
+        with col2:
+            st.subheader("📊 Detected Categories")
+            categories_box = st.container()
+        st.divider()
+        st.subheader("📚 Retrieved Relevant Policies (Top 3)")
+        policies_box = st.container()
+
+        try:
+            # --- API Call ---
+            run = run_stream if stream else run_job
+            run(grievance_text, status, recommendation_box, categories_box, policies_box)
+
+        except requests.exceptions.RequestException as e:
+            # --- Handle Connection Errors ---
+            status.update(label="Connection failed", state="error")
+            st.error(f"⚠️ Could not connect to backend at {BACKEND_BASE}.")
+            st.error(f"Please ensure the FastAPI server is running: `uvicorn backend.app:app --reload`")
+            print(f"Connection error: {e}")
+        except (RuntimeError, TimeoutError) as e:
+            status.update(label="Analysis failed", state="error")
+            st.error(f"❌ {e}")
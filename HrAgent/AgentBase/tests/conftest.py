@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# Tests import the backend the way the app does (`from backend import ...`), from HrAgent/AgentBase
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,65 @@
+# tests/test_batch_pipeline.py
+import asyncio
+import json
+
+from backend import batch_pipeline
+
+
+def _write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_iter_grievances_jsonl(tmp_path):
+    path = _write(tmp_path / "in.jsonl",
+                  '{"id": 0, "grievance": " Late salary "}\n'
+                  "{not json\n"
+                  "\n"
+                  '{"id": "", "text": "Broken chair"}\n'
+                  '{"grievance": ""}\n'
+                  "[1, 2]\n")
+    rows = list(batch_pipeline.iter_grievances(path))
+    assert rows[0] == {"id": "0", "grievance": "Late salary"}
+    assert rows[1]["id"] == "1" and rows[1]["error"].startswith("invalid JSON")
+    assert rows[2] == {"id": "", "grievance": "Broken chair"}
+    assert rows[3]["error"] == "empty grievance"
+    assert rows[4]["error"] == "row is not a JSON object"
+
+
+def test_iter_grievances_csv(tmp_path):
+    path = _write(tmp_path / "in.csv", "id,grievance\n7,Unsafe stairs\n8,\n")
+    assert list(batch_pipeline.iter_grievances(path)) == [
+        {"id": "7", "grievance": "Unsafe stairs"},
+        {"id": "8", "grievance": "", "error": "empty grievance"},
+    ]
+
+
+def test_run_bulk_writes_error_rows_and_resumes_without_duplicates(tmp_path, monkeypatch):
+    analyzed = []
+
+    async def fake_analyze_batch(texts, *args, **kwargs):
+        analyzed.extend(texts)
+        return [{"recommendation": t.upper()} for t in texts]
+
+    monkeypatch.setattr(batch_pipeline, "analyze_batch", fake_analyze_batch)
+    src = _write(tmp_path / "in.jsonl", "".join(
+        json.dumps({"id": i, "grievance": f"g{i}" if i != 2 else ""}) + "\n" for i in range(6)
+    ))
+    out = str(tmp_path / "out.jsonl")
+
+    processed = asyncio.run(batch_pipeline.run_bulk(src, out, None, None, None, chunk_size=2, rate_per_min=0))
+    assert processed == 5
+    with open(out, encoding="utf-8") as f:
+        first = [json.loads(line) for line in f]
+    assert [r["id"] for r in first] == [str(i) for i in range(6)]
+    assert first[2] == {"id": "2", "error": "empty grievance"}
+
+    # Crash after a chunk was appended but before its checkpoint: roll the checkpoint back one chunk
+    with open(out, "rb") as f:
+        lines = f.readlines()
+    batch_pipeline._write_checkpoint(out + ".ckpt", 4, sum(len(line) for line in lines[:4]))
+    analyzed.clear()
+    asyncio.run(batch_pipeline.run_bulk(src, out, None, None, None, chunk_size=2, rate_per_min=0))
+    assert analyzed == ["g4", "g5"]
+    with open(out, encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == first
@@ -0,0 +1,27 @@
+# tests/test_bm25_index.py
+from backend.bm25_index import BM25Index, tokenize
+
+DOCS = [
+    "Salary is paid on the last working day of the month.",
+    "Employees get 20 days of annual leave.",
+    "Report unsafe working conditions to the safety officer.",
+]
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("The salary, is LATE!") == ["salary", "late"]
+
+
+def test_search_ranks_matching_document_first():
+    index = BM25Index.build(["a", "b", "c"], DOCS)
+    hits = index.search("when is my salary paid", top_k=2)
+    assert hits[0][0] == 0
+    assert index.search("unrelated words", top_k=3) == []
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = BM25Index.build(["a", "b", "c"], DOCS)
+    index.save(str(tmp_path))
+    loaded = BM25Index.load(str(tmp_path))
+    assert loaded.ids == index.ids
+    assert loaded.search("annual leave", 1) == index.search("annual leave", 1)
@@ -0,0 +1,53 @@
+# tests/test_chunking.py
+import pytest
+
+from backend.chunking import iter_text_chunks
+
+WORDS = " ".join(f"w{i:03d}" for i in range(300))
+
+
+def test_short_text_is_one_chunk():
+    assert list(iter_text_chunks(["Leave policy.", "", "Apply two weeks ahead."], 1200, 200)) == [
+        "Leave policy.\nApply two weeks ahead."
+    ]
+
+
+def test_chunks_respect_size_and_cover_all_words():
+    chunks = list(iter_text_chunks([WORDS[:1000], "", WORDS[1000:]], 300, 80, min_new=0))
+    assert all(len(c) <= 300 for c in chunks)
+    seen = set(" ".join(chunks).split())
+    assert seen == set(WORDS.split())
+
+
+def test_consecutive_chunks_overlap():
+    paragraphs = [" ".join(f"p{p}w{i}" for i in range(10)) for p in range(12)]
+    lines = [line for para in paragraphs for line in (para, "")]
+    chunks = list(iter_text_chunks(lines, 200, 60, min_new=0))
+    assert len(chunks) > 1
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert set(prev.split()) & set(nxt.split())
+
+
+def test_small_remainder_folds_into_previous_chunk():
+    lines = [WORDS[:295], "", "tail end"]
+    chunks = list(iter_text_chunks(lines, 300, 80, min_new=60))
+    assert len(chunks) == 1
+    assert chunks[0].endswith("tail end")
+    # Without the minimum, the remainder becomes a chunk that is almost all overlap
+    assert len(list(iter_text_chunks(lines, 300, 80, min_new=0))) == 2
+
+
+def test_markdown_headings_start_chunks_without_overlap():
+    lines = ["# Leave", "Annual leave is 20 days.", "", "## Payroll", "Salaries are paid monthly."]
+    chunks = list(iter_text_chunks(lines, 1200, 200, markdown=True))
+    assert chunks == ["Leave\nAnnual leave is 20 days.", "Payroll\nSalaries are paid monthly."]
+
+
+def test_parser_signature_tracks_chunker_settings():
+    pytest.importorskip("tqdm")
+    from backend.ingest_policies import parser_signature
+
+    assert parser_signature("rows.jsonl", 1200, 200) == "jsonl"
+    current = parser_signature("handbook.md", 1200, 200, min_new=200)
+    assert current != "text:1200:200"
+    assert current != parser_signature("handbook.md", 1200, 200, min_new=100)
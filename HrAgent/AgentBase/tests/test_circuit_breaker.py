@@ -0,0 +1,71 @@
+# tests/test_circuit_breaker.py
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+import asyncio  # noqa: E402
+
+from backend.llm_client import CircuitBreaker, LLMClient, SharedTokenBucket, TokenBucket  # noqa: E402
+
+
+def test_opens_after_threshold_and_probes_after_cooldown(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("backend.llm_client.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_after_s=10)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    now[0] += 10
+    assert breaker.allow() and breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    now[0] += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_token_bucket_refuses_waits_past_the_limit():
+    bucket = TokenBucket(rate_per_s=1, burst=1)
+    assert bucket.reserve(max_wait=0) == 0.0
+    assert bucket.reserve(max_wait=0.1) is None
+    assert bucket.reserve(max_wait=5) > 0
+
+
+def test_shared_token_bucket_is_one_budget_across_instances(tmp_path):
+    path = str(tmp_path / "rate.sqlite3")
+    first = SharedTokenBucket(rate_per_s=1, burst=2, path=path)
+    second = SharedTokenBucket(rate_per_s=1, burst=2, path=path)
+    assert first.reserve(max_wait=0) == 0.0
+    assert second.reserve(max_wait=0) == 0.0
+    assert first.reserve(max_wait=0.1) is None
+    assert second.reserve(max_wait=5) > 0
+
+
+class StreamingModel:
+    async def generate_content_async(self, prompt, request_options=None, stream=False):
+        async def chunks():
+            yield "a"
+            yield "b"
+        return chunks()
+
+
+def test_stream_holds_its_slot_until_consumed_or_closed():
+    async def run():
+        client = LLMClient(max_concurrency=1, limiter=TokenBucket(0, 1), breaker=CircuitBreaker())
+        stream = await client.generate_async(StreamingModel(), "p", stream=True)
+        assert client._async_slots.locked()
+        assert [chunk async for chunk in stream] == ["a", "b"]
+        assert not client._async_slots.locked()
+
+        stream = await client.generate_async(StreamingModel(), "p", stream=True)
+        assert await stream.__anext__() == "a"
+        await stream.aclose()
+        await stream.aclose()
+        assert not client._async_slots.locked()
+        assert client._async_slots._value == 1
+
+    asyncio.run(run())
@@ -0,0 +1,19 @@
+# tests/test_hybrid_search.py
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.hybrid_search import mmr_select, rrf_fuse  # noqa: E402
+
+
+def test_rrf_rewards_documents_ranked_by_both_lists():
+    fused = rrf_fuse([["a", "b", "c"], ["b", "c", "a"]])
+    assert fused[0][0] == "b"
+    assert {doc for doc, _ in fused} == {"a", "b", "c"}
+
+
+def test_mmr_drops_near_duplicates():
+    candidates = np.array([[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]])
+    relevance = np.array([1.0, 0.9, 0.5])
+    assert mmr_select(relevance, candidates, top_k=3) == [0, 2]
+    assert mmr_select(relevance, candidates[:0], top_k=3) == []
@@ -0,0 +1,51 @@
+# tests/test_index_versions.py
+import pytest
+
+from backend import index_versions
+
+
+@pytest.fixture
+def ordered_names(monkeypatch):
+    # One build per "second", so names sort in creation order
+    stamps = iter(f"20261018-0930{i:02d}" for i in range(60))
+    monkeypatch.setattr(index_versions.time, "strftime", lambda fmt: next(stamps))
+
+
+def test_create_activate_and_collect(tmp_path, ordered_names):
+    db = str(tmp_path)
+    assert index_versions.active_version(db) == index_versions.LEGACY_VERSION
+    versions = [index_versions.create_version(db) for _ in range(4)]
+    index_versions.activate(db, versions[0])
+    assert index_versions.active_version(db) == versions[0]
+    removed = index_versions.collect_garbage(db, keep=2)
+    assert versions[0] not in removed
+    assert set(index_versions.list_versions(db)) == {versions[0], *versions[2:]}
+
+
+def test_new_version_starts_from_base(tmp_path, ordered_names):
+    db = str(tmp_path)
+    base = index_versions.create_version(db)
+    with open(f"{index_versions.version_path(db, base)}/data.bin", "w") as f:
+        f.write("x")
+    child = index_versions.create_version(db, base=base)
+    with open(f"{index_versions.version_path(db, child)}/data.bin") as f:
+        assert f.read() == "x"
+
+
+def test_unknown_version_cannot_be_activated(tmp_path):
+    with pytest.raises(ValueError):
+        index_versions.activate(str(tmp_path), "20261018-093000-1a2b3c")
+
+
+@pytest.mark.parametrize("name", ["../..", ".", "20261018-093000-1a2b3c\n", "20261018-093000-1a2b3c/.."])
+def test_invalid_version_names_are_rejected(tmp_path, name):
+    with pytest.raises(ValueError):
+        index_versions.version_path(str(tmp_path), name)
+    with pytest.raises(ValueError):
+        index_versions.activate(str(tmp_path), name)
+
+
+def test_active_pointer_to_invalid_name_is_an_error(tmp_path):
+    (tmp_path / index_versions.ACTIVE_FILE).write_text('{"version": "../.."}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        index_versions.active_version(str(tmp_path))
@@ -0,0 +1,88 @@
+# tests/test_job_store.py
+import pytest
+
+from backend import job_store
+from backend.job_store import DONE, QUEUED, RUNNING, IdempotencyConflict, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = JobStore(str(tmp_path / "jobs.sqlite3"))
+    yield s
+    s.close()
+
+
+def test_submit_is_idempotent(store):
+    job, created = store.submit("Late salary", idempotency_key="k1")
+    again, created_again = store.submit("Late salary", idempotency_key="k1")
+    assert created and not created_again
+    assert again["id"] == job["id"]
+    with pytest.raises(IdempotencyConflict):
+        store.submit("Something else", idempotency_key="k1")
+
+
+def test_claim_returns_running_row_with_token(store):
+    first, _ = store.submit("first")
+    store.submit("second")
+    job = store.claim(lease_s=30)
+    assert job["id"] == first["id"]
+    assert job["status"] == RUNNING and job["attempts"] == 1 and job["claim_token"]
+    assert store.claim(lease_s=30)["grievance"] == "second"
+    assert store.claim(lease_s=30) is None
+
+
+def test_complete_requires_the_claim_token(store):
+    store.submit("g")
+    job = store.claim()
+    assert not store.complete(job["id"], "stale-token", {"recommendation": "x"})
+    assert store.heartbeat(job["id"], job["claim_token"])
+    assert store.complete(job["id"], job["claim_token"], {"recommendation": "x"})
+    done = store.get(job["id"])
+    assert done["status"] == DONE and done["result"] == {"recommendation": "x"}
+
+
+def test_requeue_puts_job_back(store):
+    store.submit("g")
+    job = store.claim()
+    assert store.requeue(job["id"], job["claim_token"])
+    assert store.get(job["id"])["status"] == QUEUED
+    again = store.claim()
+    assert again["id"] == job["id"] and again["attempts"] == 2
+    assert again["claim_token"] != job["claim_token"]
+    # The first claim can no longer write a result
+    assert not store.complete(job["id"], job["claim_token"], {})
+
+
+def test_maintain_requeues_expired_leases(store, monkeypatch):
+    store.submit("g")
+    job = store.claim(lease_s=-1)
+    assert store.maintain()["requeued"] == 1
+    assert not store.heartbeat(job["id"], job["claim_token"])
+
+    monkeypatch.setattr(job_store, "JOB_MAX_ATTEMPTS", 2)
+    store.claim(lease_s=-1)
+    assert store.maintain()["failed"] == 1
+    assert store.get(job["id"])["status"] == "failed"
+
+
+def test_old_database_gains_lease_columns(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "old.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, idempotency_key TEXT UNIQUE, request_hash TEXT NOT NULL, "
+        "grievance TEXT NOT NULL, status TEXT NOT NULL, result TEXT, error TEXT, "
+        "attempts INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL, updated REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO jobs (id, request_hash, grievance, status, created, updated) "
+                 "VALUES ('j1', 'h', 'g', 'queued', 1, 1)")
+    conn.commit()
+    conn.close()
+
+    store = JobStore(path)
+    try:
+        job = store.claim()
+        assert job["id"] == "j1" and job["claim_token"] and job["lease_until"]
+    finally:
+        store.close()
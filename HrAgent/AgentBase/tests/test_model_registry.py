@@ -0,0 +1,26 @@
+# tests/test_model_registry.py
+import pytest
+
+from backend import model_registry
+
+
+def test_release_chroma_client_closes_it(tmp_path, monkeypatch):
+    pytest.importorskip("chromadb")
+    # Opening a Chroma client doesn't need torch
+    monkeypatch.setattr(model_registry, "configure_torch", lambda: None)
+    path = str(tmp_path / "db")
+    client = model_registry.get_chroma_client(path)
+    client.get_or_create_collection("policies").add(ids=["a"], embeddings=[[1.0, 0.0]], documents=["doc"])
+
+    model_registry.release_chroma_client(path)
+    with pytest.raises(Exception):
+        client.list_collections()
+
+    reopened = model_registry.get_chroma_client(path)
+    assert reopened is not client
+    assert reopened.get_collection("policies").count() == 1
+    model_registry.release_chroma_client(path)
+
+
+def test_release_unknown_path_is_a_no_op(tmp_path):
+    model_registry.release_chroma_client(str(tmp_path / "never-opened"))
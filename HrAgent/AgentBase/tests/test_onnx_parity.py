@@ -0,0 +1,36 @@
+# tests/test_onnx_parity.py
+"""ONNX int8 vs torch parity, through the same scoring code the server uses.
+
+Skipped unless optimum/onnxruntime are installed and the models have been
+exported (python -m backend.onnx_backend export).
+"""
+import pytest
+
+pytest.importorskip("optimum.onnxruntime")
+pytest.importorskip("sentence_transformers")
+
+from backend import onnx_backend  # noqa: E402
+from backend.classifier_agent import CLASSIFIER_BACKENDS  # noqa: E402
+from backend.retriever_agent import EMBED_MODEL  # noqa: E402
+
+NLI_MODEL = CLASSIFIER_BACKENDS["bart-mnli"]
+
+
+@pytest.mark.skipif(
+    not (onnx_backend.has_artifacts(EMBED_MODEL) and onnx_backend.has_artifacts(NLI_MODEL)),
+    reason="ONNX artifacts not exported",
+)
+def test_onnx_matches_torch():
+    assert onnx_backend.check_parity(EMBED_MODEL, NLI_MODEL, embed_min_cosine=0.99, score_tolerance=0.05)
+
+
+def test_encode_honours_normalize_embeddings():
+    if not onnx_backend.has_artifacts(EMBED_MODEL):
+        pytest.skip("ONNX artifacts not exported")
+    import numpy as np
+
+    encoder = onnx_backend.OnnxSentenceEncoder(EMBED_MODEL)
+    raw = encoder.encode(onnx_backend.PARITY_SENTENCES)
+    unit = encoder.encode(onnx_backend.PARITY_SENTENCES, normalize_embeddings=True)
+    assert np.allclose(np.linalg.norm(unit, axis=1), 1.0, atol=1e-5)
+    assert np.allclose(unit, raw / np.linalg.norm(raw, axis=1, keepdims=True), atol=1e-5)
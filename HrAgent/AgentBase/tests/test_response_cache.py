@@ -0,0 +1,38 @@
+# tests/test_response_cache.py
+import pytest
+
+pytest.importorskip("numpy")
+
+from backend.response_cache import ResponseCache  # noqa: E402
+
+
+def test_exact_hit_uses_normalized_text():
+    cache = ResponseCache(max_size=10, ttl_s=60, similarity=0.9)
+    cache.put("My salary is late!", [1.0, 0.0], {"recommendation": "r"}, "v1")
+    assert cache.get_exact("  my SALARY is late ", "v1") == {"recommendation": "r"}
+
+
+def test_semantic_hit_above_threshold_only():
+    cache = ResponseCache(max_size=10, ttl_s=60, similarity=0.9)
+    cache.put("salary late", [1.0, 0.0], {"recommendation": "r"}, "v1")
+    assert cache.get_semantic([0.99, 0.05], "v1") == {"recommendation": "r"}
+    assert cache.get_semantic([0.0, 1.0], "v1") is None
+
+
+def test_version_change_and_lru_eviction():
+    cache = ResponseCache(max_size=2, ttl_s=60, similarity=0.9)
+    for i in range(3):
+        cache.put(f"g{i}", [1.0, float(i)], {"i": i}, "v1")
+    assert cache.snapshot()["size"] == 2 and cache.get_exact("g0", "v1") is None
+    assert cache.get_exact("g2", "v2") is None
+    assert cache.snapshot()["size"] == 0
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = ResponseCache(max_size=10, ttl_s=60, similarity=0.9, persist_path=path)
+    cache.put("salary late", [1.0, 0.0], {"recommendation": "r"}, "v1")
+    cache.save()
+    restored = ResponseCache(max_size=10, ttl_s=60, similarity=0.9, persist_path=path)
+    restored.load()
+    assert restored.get_exact("salary late", "v1") == {"recommendation": "r"}
@@ -0,0 +1,24 @@
+# tests/test_startup.py
+"""Startup-time budget (see benchmarks/startup.py); needs the API's own dependencies."""
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("dotenv")
+pytest.importorskip("httpx")
+
+from benchmarks.startup import probe_import, time_cli_help  # noqa: E402
+
+IMPORT_BUDGET_S = float(os.getenv("HR_STARTUP_IMPORT_BUDGET_S", "1.5"))
+CLI_BUDGET_S = float(os.getenv("HR_STARTUP_CLI_BUDGET_S", "1.5"))
+
+
+def test_import_app_is_fast_and_lazy():
+    result = probe_import("import backend.app", runs=3)
+    assert result["heavy_imports"] == []
+    assert result["median_s"] <= IMPORT_BUDGET_S
+
+
+def test_cli_help_is_fast():
+    assert time_cli_help(runs=3)["median_s"] <= CLI_BUDGET_S
@@ -0,0 +1,38 @@
+# tests/test_vector_index.py
+import json
+import os
+
+import numpy as np
+
+from backend import vector_index
+from backend.vector_index import INDEX_MATRIX, INDEX_META, NumpyPolicyIndex
+
+
+def write_index(path, categories):
+    matrix = np.eye(len(categories), dtype=np.float32)
+    np.save(os.path.join(path, INDEX_MATRIX), matrix)
+    with open(os.path.join(path, INDEX_META), "w", encoding="utf-8") as f:
+        json.dump({
+            "ids": [f"d{i}" for i in range(len(categories))],
+            "documents": [f"doc {i}" for i in range(len(categories))],
+            "metadatas": [{"category": c} for c in categories],
+        }, f)
+
+
+def test_search_filters_by_category(tmp_path):
+    write_index(str(tmp_path), ["pay", "leave", "pay"])
+    index = NumpyPolicyIndex(str(tmp_path))
+    indices, _ = index.search([[0.0, 1.0, 0.0]], top_k=3, categories=["pay"])
+    assert sorted(indices[0].tolist()) == [0, 2]
+
+
+def test_category_masks_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "CATEGORY_MASK_CACHE_SIZE", 2)
+    write_index(str(tmp_path), ["a", "b", "c"])
+    index = NumpyPolicyIndex(str(tmp_path))
+    index.category_mask(["a"])
+    index.category_mask(["b"])
+    index.category_mask(["a"])
+    index.category_mask(["c"])
+    assert list(index._category_masks) == [("a",), ("c",)]
+    assert index.category_mask(["b", "a", "b"]).tolist() == [True, True, False]